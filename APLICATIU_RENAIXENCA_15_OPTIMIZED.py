@@ -7,7 +7,7 @@ Timer application for radio show production with audio player and presidents gam
 """
 
 import tkinter as tk
-from tkinter import ttk, messagebox, simpledialog, filedialog
+from tkinter import ttk, messagebox, simpledialog, filedialog, font as tkfont
 import time
 from datetime import datetime
 import sys
@@ -15,8 +15,26 @@ import webbrowser
 import urllib.parse
 import threading
 import os
-from functools import lru_cache
-from typing import Optional, List, Dict, Any
+import math
+import queue
+import sqlite3
+import struct
+import hashlib
+import unicodedata
+import re
+import importlib.util
+import json
+import shutil
+import heapq
+import socket
+import argparse
+import csv
+import io
+from itertools import groupby
+from array import array
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, Future
+from typing import Optional, List, Dict, Any, Tuple, Callable, Iterable, Iterator, TextIO
 
 # Imports per al reproductor d'àudio
 try:
@@ -26,45 +44,225 @@ except ImportError:
     DRAG_DROP_AVAILABLE = False
     print("tkinterdnd2 no disponible. Drag and drop no funcionarà.")
 
-try:
-    import pygame
-    PYGAME_AVAILABLE = True
-except ImportError:
-    PYGAME_AVAILABLE = False
-    print("Pygame no disponible. El reproductor d'àudio no funcionarà.")
+# Els backends d'àudio (pygame i VLC) es detecten fora del camí d'arrencada:
+# importar-los i crear la instància de VLC pot trigar segons si VLC és en una
+# unitat de xarxa. Veure detect_audio_backends() i AudioPlayer.initialize_async().
+pygame = None
+vlc = None
+PYGAME_AVAILABLE = False
+VLC_AVAILABLE = False
+_backends_lock = threading.Lock()
+_backends_detected = False
 
-try:
-    import vlc
-    # Test if VLC can actually be initialized with quiet options
-    test_instance = vlc.Instance('--intf', 'dummy', '--no-video', '--quiet', '--no-osd')
-    if test_instance:
-        VLC_AVAILABLE = True
-        print("VLC disponible i funcional")
-    else:
-        VLC_AVAILABLE = False
-        print("VLC importat però no funcional")
-except Exception as e:
-    VLC_AVAILABLE = False
-    print(f"VLC no disponible: {e}")
+
+def detect_audio_backends() -> None:
+    """Importa els mòduls d'àudio opcionals (una sola vegada, des de qualsevol fil)."""
+    global pygame, vlc, PYGAME_AVAILABLE, VLC_AVAILABLE, _backends_detected
+    with _backends_lock:
+        if _backends_detected:
+            return
+        try:
+            import pygame as pygame_module
+            pygame = pygame_module
+            PYGAME_AVAILABLE = True
+        except ImportError:
+            PYGAME_AVAILABLE = False
+            print("Pygame no disponible. El reproductor d'àudio no funcionarà.")
+        
+        try:
+            import vlc as vlc_module
+            vlc = vlc_module
+            VLC_AVAILABLE = True
+        except Exception as e:
+            VLC_AVAILABLE = False
+            print(f"VLC no disponible: {e}")
+        _backends_detected = True
+
+
+def get_app_data_dir() -> str:
+    """Directori local (mai a la unitat de xarxa) per a les dades de l'aplicació."""
+    base = os.environ.get('LOCALAPPDATA') or os.path.join(os.path.expanduser('~'), '.local', 'share')
+    path = os.path.join(base, 'Renaixenca')
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+DIES_SETMANA = ("Dilluns", "Dimarts", "Dimecres", "Dijous", "Divendres", "Dissabte", "Diumenge")
+MESOS = ("", "gener", "febrer", "març", "abril", "maig", "juny", "juliol", "agost", 
+         "setembre", "octubre", "novembre", "desembre")
+
+
+def catalan_date(moment: datetime) -> str:
+    """Data en català tal com surt al registre exportat."""
+    return f"{DIES_SETMANA[moment.weekday()]}, {moment.day} de {MESOS[moment.month]} de {moment.year}"
+
+
+class TimerEvent:
+    """Esdeveniment de canvi emès per PrecisionTimer."""
+    
+    # Canvis de seccions
+    ADDED = "added"
+    REMOVED = "removed"
+    MOVED = "moved"
+    RENAMED = "renamed"
+    RETIMED = "retimed"
+    RESET = "reset"
+    # Canvis d'objectiu i de programa
+    TARGET = "target"
+    PROGRAM = "program"
+    # Canvis del cronòmetre
+    STARTED = "started"
+    STOPPED = "stopped"
+    CLEARED = "cleared"
+    LAPPED = "lapped"
+    
+    SECTION_KINDS = frozenset((ADDED, REMOVED, MOVED, RENAMED, RETIMED, RESET))
+    CLOCK_KINDS = frozenset((STARTED, STOPPED, CLEARED, LAPPED))
+    
+    __slots__ = ('kind', 'version', 'index', 'new_index', 'section', 'value')
+    
+    def __init__(self, kind: str, version: int, index: Optional[int] = None,
+                 new_index: Optional[int] = None, section: Optional[Dict[str, Any]] = None,
+                 value: Any = None):
+        self.kind = kind
+        self.version = version
+        self.index = index
+        self.new_index = new_index
+        self.section = section
+        self.value = value
+    
+    def __repr__(self) -> str:
+        return (f"TimerEvent({self.kind!r}, v{self.version}, index={self.index}, "
+                f"new_index={self.new_index}, value={self.value!r})")
+
+
+class Section:
+    """Secció cronometrada: registre compacte amb id estable.
+    
+    `started` i `ended` són instants del rellotge monòton (perf_counter) del
+    procés actual, o None per a les seccions afegides a mà; `created` és l'hora
+    de rellotge de creació. La durada formatada es guarda en memòria cau.
+    """
+    
+    __slots__ = ('id', 'name', '_duration', '_formatted', 'started', 'ended', 'created')
+    
+    def __init__(self, section_id: int, name: str, duration: int, started: Optional[float] = None,
+                 ended: Optional[float] = None, created: Optional[float] = None):
+        self.id = section_id
+        self.name = name
+        self._duration = duration
+        self._formatted: Optional[str] = None
+        self.started = started
+        self.ended = ended
+        self.created = time.time() if created is None else created
+    
+    @property
+    def duration(self) -> int:
+        """Durada en segons."""
+        return self._duration
+    
+    @duration.setter
+    def duration(self, value: int) -> None:
+        self._duration = value
+        self._formatted = None
+    
+    @property
+    def formatted(self) -> str:
+        """Durada formatada MM:SS (en memòria cau)."""
+        if self._formatted is None:
+            self._formatted = PrecisionTimer.format_time(self._duration)
+        return self._formatted
+    
+    @property
+    def timestamp(self) -> str:
+        """Hora de creació en format ISO."""
+        return datetime.fromtimestamp(self.created).isoformat()
+    
+    def to_record(self, clock_offset: float) -> Dict[str, Any]:
+        """Registre serialitzable; els instants monòtons passen a hora de rellotge.
+        
+        `clock_offset` és `time.time() - time.perf_counter()`.
+        """
+        return {
+            'id': self.id, 'name': self.name, 'duration': self._duration, 'created': self.created,
+            'started': None if self.started is None else self.started + clock_offset,
+            'ended': None if self.ended is None else self.ended + clock_offset,
+        }
+    
+    @classmethod
+    def from_record(cls, record: Dict[str, Any], clock_offset: float) -> 'Section':
+        """Reconstrueix una secció d'un registre (accepta el format antic amb 'timestamp')."""
+        created = record.get('created')
+        if created is None and 'timestamp' in record:
+            created = datetime.fromisoformat(record['timestamp']).timestamp()
+        started, ended = record.get('started'), record.get('ended')
+        return cls(record['id'], record['name'], record['duration'],
+                   None if started is None else started - clock_offset,
+                   None if ended is None else ended - clock_offset, created)
+    
+    def __repr__(self) -> str:
+        return f"Section({self.id}, {self.name!r}, {self.formatted})"
 
 
 class PrecisionTimer:
-    """Timer de precisió per cronometrar seccions."""
+    """Timer de precisió per cronometrar seccions.
+    
+    És un model observable: tots els canvis de seccions, objectiu i cronòmetre
+    passen per mètodes que incrementen `version` i notifiquen els subscriptors
+    amb un TimerEvent.
+    """
     
     def __init__(self):
         self.start_time: Optional[float] = None
         self.accumulated_time: float = 0.0
         self.is_running: bool = False
-        self.sections: List[Dict[str, Any]] = []
+        self.sections: List[Section] = []
         self.total_time: int = 0
         self.target_time: int = 46 * 60
         self.program_number: str = ""
-        
+        # Hora de rellotge en què ha començat el programa (primera secció des de l'últim buidat)
+        self.session_started: Optional[float] = None
+        self.version: int = 0
+        self._next_section_id: int = 1
+        self._segment_start: Optional[float] = None   # Inici monòton de la secció en curs
+        self._stopped_at: Optional[float] = None
+        # Posició de cada id; només és vàlida per a les posicions < _positions_valid
+        self._positions: Dict[int, int] = {}
+        self._positions_valid: int = 0
+        self._subscribers: List[Callable[[TimerEvent], None]] = []
+    
+    # SUBSCRIPCIONS
+    def subscribe(self, callback: Callable[[TimerEvent], None]) -> Callable[[TimerEvent], None]:
+        """Registra un subscriptor de canvis. Retorna el mateix callback."""
+        if callback not in self._subscribers:
+            self._subscribers.append(callback)
+        return callback
+    
+    def unsubscribe(self, callback: Callable[[TimerEvent], None]) -> None:
+        """Dona de baixa un subscriptor."""
+        if callback in self._subscribers:
+            self._subscribers.remove(callback)
+    
+    def _notify(self, kind: str, **kwargs) -> TimerEvent:
+        """Incrementa la versió i notifica els subscriptors."""
+        self.version += 1
+        event = TimerEvent(kind, self.version, **kwargs)
+        for callback in list(self._subscribers):
+            try:
+                callback(event)
+            except Exception as e:
+                print(f"Error notificant canvi del timer ({kind}): {e}")
+        return event
+    
+    # CRONÒMETRE
     def start(self) -> bool:
         """Inicia el timer."""
         if not self.is_running:
             self.start_time = time.perf_counter()
             self.is_running = True
+            if self._segment_start is None:
+                self._segment_start = self.start_time
+            self._notify(TimerEvent.STARTED, value=self.start_time)
             return True
         return False
     
@@ -76,6 +274,8 @@ class PrecisionTimer:
             self.accumulated_time += elapsed
             self.is_running = False
             self.start_time = None
+            self._stopped_at = now
+            self._notify(TimerEvent.STOPPED, value=self.accumulated_time)
             return True
         return False
     
@@ -84,81 +284,3866 @@ class PrecisionTimer:
         self.is_running = False
         self.start_time = None
         self.accumulated_time = 0.0
+        self._segment_start = None
+        self._notify(TimerEvent.CLEARED)
+    
+    def lap(self) -> None:
+        """Torna el cronòmetre a zero sense aturar-lo (només si està en marxa, com sempre)."""
+        if not self.is_running:
+            return
+        self.accumulated_time = 0.0
+        self.start_time = time.perf_counter()
+        self._segment_start = self.start_time
+        self._notify(TimerEvent.LAPPED, value=self.start_time)
     
-    def get_current_time(self) -> int:
+    def get_current_time(self, now: Optional[float] = None) -> int:
         """Obté el temps actual en segons."""
+        return int(self.get_elapsed(now))
+    
+    def get_elapsed(self, now: Optional[float] = None) -> float:
+        """Temps actual en segons, amb decimals."""
         if self.is_running and self.start_time:
-            now = time.perf_counter()
-            elapsed = now - self.start_time
-            return int(self.accumulated_time + elapsed)
-        return int(self.accumulated_time)
+            if now is None:
+                now = time.perf_counter()
+            return self.accumulated_time + (now - self.start_time)
+        return self.accumulated_time
+    
+    def next_second_boundary(self, now: float) -> Optional[float]:
+        """Instant perf_counter en què canviarà el segon mostrat (None si està parat)."""
+        if not self.is_running or self.start_time is None:
+            return None
+        elapsed = self.accumulated_time + (now - self.start_time)
+        return self.start_time + (math.floor(elapsed) + 1 - self.accumulated_time)
+    
+    # SECCIONS
+    def index_of(self, section_id: int) -> Optional[int]:
+        """Posició actual d'una secció pel seu id (O(1) amortitzat)."""
+        position = self._positions.get(section_id)
+        if position is not None and position < self._positions_valid:
+            return position
+        if self._positions_valid < len(self.sections):
+            # Reindexa només la cua invalidada per l'últim canvi
+            for i in range(self._positions_valid, len(self.sections)):
+                self._positions[self.sections[i].id] = i
+            self._positions_valid = len(self.sections)
+            position = self._positions.get(section_id)
+            if position is not None and position < len(self.sections):
+                return position
+        return None
+    
+    def get_section(self, section_id: int) -> Optional[Section]:
+        """Secció pel seu id."""
+        index = self.index_of(section_id)
+        return None if index is None else self.sections[index]
+    
+    def _invalidate_positions(self, index: int) -> None:
+        """Les posicions a partir de `index` han canviat."""
+        self._positions_valid = min(self._positions_valid, index)
     
-    def add_section(self, name: str, duration: int) -> int:
+    def segment_bounds(self, now: Optional[float] = None) -> Tuple[Optional[float], Optional[float]]:
+        """Inici i final monòtons de la secció en curs (None si no ha començat)."""
+        if self._segment_start is None:
+            return None, None
+        if not self.is_running:
+            return self._segment_start, self._stopped_at
+        return self._segment_start, time.perf_counter() if now is None else now
+    
+    def add_section(self, name: str, duration: int, started: Optional[float] = None,
+                    ended: Optional[float] = None) -> int:
         """Afegeix una nova secció."""
-        section = {
-            'name': name, 
-            'duration': duration, 
-            'timestamp': datetime.now().isoformat()
-        }
+        section = Section(self._next_section_id, name, duration, started, ended)
+        self._next_section_id += 1
+        if self.session_started is None:
+            self.session_started = section.created
+        index = len(self.sections)
         self.sections.append(section)
+        self._positions[section.id] = index
+        if self._positions_valid == index:
+            self._positions_valid = index + 1
         self.total_time += duration
+        self._notify(TimerEvent.ADDED, index=index, section=section)
         return len(self.sections)
     
-    def remove_section(self, index: int) -> bool:
-        """Elimina una secció per índex."""
-        if 0 <= index < len(self.sections):
-            removed = self.sections.pop(index)
-            self.total_time -= removed['duration']
-            return True
-        return False
+    def split_section(self, name: str) -> int:
+        """Guarda el temps actual com a secció i continua cronometrant des de zero."""
+        count = self.add_section(name, self.get_current_time(), *self.segment_bounds())
+        self.lap()
+        return count
+    
+    def remove_section(self, index: int) -> bool:
+        """Elimina una secció per índex."""
+        if 0 <= index < len(self.sections):
+            removed = self.sections.pop(index)
+            del self._positions[removed.id]
+            self._invalidate_positions(index)
+            self.total_time -= removed.duration
+            self._notify(TimerEvent.REMOVED, index=index, section=removed)
+            return True
+        return False
+    
+    def move_section(self, index: int, new_index: int) -> bool:
+        """Mou una secció a una altra posició."""
+        if (index != new_index and 0 <= index < len(self.sections) 
+                and 0 <= new_index < len(self.sections)):
+            section = self.sections.pop(index)
+            self.sections.insert(new_index, section)
+            low, high = min(index, new_index), max(index, new_index)
+            if self._positions_valid > high:
+                # Només canvien les posicions entre origen i destí
+                for i in range(low, high + 1):
+                    self._positions[self.sections[i].id] = i
+            else:
+                self._invalidate_positions(low)
+            self._notify(TimerEvent.MOVED, index=index, new_index=new_index, section=section)
+            return True
+        return False
+    
+    def rename_section(self, index: int, name: str) -> bool:
+        """Canvia el nom d'una secció."""
+        if 0 <= index < len(self.sections):
+            section = self.sections[index]
+            old_name = section.name
+            if old_name != name:
+                section.name = name
+                self._notify(TimerEvent.RENAMED, index=index, section=section, value=old_name)
+            return True
+        return False
+    
+    def retime_section(self, index: int, duration: int) -> bool:
+        """Canvia la durada d'una secció."""
+        if 0 <= index < len(self.sections):
+            section = self.sections[index]
+            old_duration = section.duration
+            if old_duration != duration:
+                section.duration = duration
+                self.total_time += duration - old_duration
+                self._notify(TimerEvent.RETIMED, index=index, section=section, value=old_duration)
+            return True
+        return False
+    
+    def clear_sections(self) -> None:
+        """Elimina totes les seccions."""
+        self.sections = []
+        self.session_started = None
+        self._positions = {}
+        self._positions_valid = 0
+        self.total_time = 0
+        self._notify(TimerEvent.RESET)
+    
+    def set_target(self, seconds: int) -> None:
+        """Estableix l'objectiu de temps en segons."""
+        if seconds != self.target_time:
+            self.target_time = seconds
+            self._notify(TimerEvent.TARGET, value=seconds)
+    
+    def set_program_number(self, number: str) -> None:
+        """Estableix el número de programa."""
+        if number != self.program_number:
+            self.program_number = number
+            self._notify(TimerEvent.PROGRAM, value=number)
+    
+    def restore(self, sections: List[Section], target_time: int, program_number: str,
+                accumulated: float, running_since: Optional[float] = None,
+                session_started: Optional[float] = None) -> None:
+        """Restaura un estat desat. `running_since` és l'inici del cronòmetre en hora de rellotge."""
+        self.sections = list(sections)
+        if session_started is None and self.sections:
+            # Diaris anteriors a `session_started`: la secció més antiga
+            session_started = min(section.created for section in self.sections)
+        self.session_started = session_started
+        self._positions = {}
+        self._positions_valid = 0
+        self.total_time = sum(section.duration for section in self.sections)
+        self._next_section_id = max((section.id for section in self.sections), default=0) + 1
+        self.target_time = target_time
+        self.program_number = program_number
+        self.accumulated_time = accumulated
+        if running_since is not None:
+            # L'hora de rellotge es torna a convertir al rellotge monòton d'aquest procés
+            self.start_time = time.perf_counter() - max(0.0, time.time() - running_since)
+            self.is_running = True
+        else:
+            self.start_time = None
+            self.is_running = False
+        self._segment_start = self.start_time
+        self._notify(TimerEvent.RESET)
+    
+    def get_catalan_date(self) -> str:
+        """Obté la data d'avui en català."""
+        return catalan_date(datetime.now())
+    
+    def export_sections(self, format_name: str = "text") -> str:
+        """Exporta les seccions amb un dels formatadors registrats."""
+        if not self.sections:
+            return ""
+        return get_formatter(format_name).format(ProgramRecord.from_timer(self))
+    
+    @staticmethod
+    def format_time(seconds: int) -> str:
+        """Formata segons a MM:SS."""
+        return f"{int(seconds) // 60:02d}:{int(seconds) % 60:02d}"
+
+
+class SessionJournal:
+    """Diari d'escriptura anticipada de la sessió del timer.
+    
+    Cada canvi del PrecisionTimer s'afegeix com un registre JSON compacte (una
+    línia) a un fitxer local. El fil de Tk només encua registres: l'escriptura i
+    el fsync es fan per lots en un fil propi, com a molt un cop per
+    `flush_interval`. En arrencar, el diari es reprodueix per reconstruir les
+    seccions i el cronòmetre, també si estava en marxa. Quan el diari creix, o
+    quan es buiden les seccions, es compacta en una instantània.
+    """
+    
+    SNAPSHOT = "snap"
+    COMPACT_EVERY = 500
+    
+    def __init__(self, timer: PrecisionTimer, path: Optional[str] = None, flush_interval: float = 0.5):
+        self.timer = timer
+        self.path = path or os.path.join(get_app_data_dir(), 'session.journal')
+        self.flush_interval = flush_interval
+        self.flushes: int = 0
+        self._pending: List[Tuple[bool, str]] = []   # (és instantània, línia)
+        self._records: int = 0                       # Registres des de l'última instantània
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._closing = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+    
+    # REPRODUCCIÓ
+    @staticmethod
+    def empty_state() -> Dict[str, Any]:
+        """Estat inicial d'una sessió."""
+        return {'sections': [], 'target': 46 * 60, 'program': "", 'accumulated': 0.0,
+                'running_since': None, 'session': None}
+    
+    def load(self) -> Optional[Dict[str, Any]]:
+        """Reprodueix el diari. Retorna l'estat si hi ha alguna cosa a recuperar."""
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                lines = f.readlines()
+        except OSError:
+            return None
+        
+        state = self.empty_state()
+        for line in lines:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                break  # Última línia a mig escriure: s'atura aquí
+            try:
+                self._apply(state, record)
+            except (KeyError, IndexError, TypeError) as e:
+                print(f"Registre del diari ignorat ({e}): {line.strip()}")
+        
+        if not state['sections'] and not state['accumulated'] and state['running_since'] is None:
+            return None
+        return state
+    
+    @classmethod
+    def _apply(cls, state: Dict[str, Any], record: Dict[str, Any]) -> None:
+        """Aplica un registre a l'estat."""
+        kind = record['k']
+        sections = state['sections']
+        if kind == cls.SNAPSHOT:
+            state.clear()
+            state.update(record['s'])
+        elif kind == TimerEvent.STARTED:
+            state['running_since'] = record['w']
+        elif kind == TimerEvent.STOPPED:
+            state['accumulated'] = record['a']
+            state['running_since'] = None
+        elif kind == TimerEvent.CLEARED:
+            state['accumulated'] = 0.0
+            state['running_since'] = None
+        elif kind == TimerEvent.LAPPED:
+            state['accumulated'] = 0.0
+            state['running_since'] = record.get('w')
+        elif kind == TimerEvent.ADDED:
+            sections.insert(record['i'], record['s'])
+            if state.get('session') is None:
+                state['session'] = record['s'].get('created')
+        elif kind == TimerEvent.REMOVED:
+            sections.pop(record['i'])
+        elif kind == TimerEvent.MOVED:
+            sections.insert(record['j'], sections.pop(record['i']))
+        elif kind == TimerEvent.RENAMED:
+            sections[record['i']]['name'] = record['n']
+        elif kind == TimerEvent.RETIMED:
+            sections[record['i']]['duration'] = record['d']
+        elif kind == TimerEvent.RESET:
+            sections.clear()
+            state['session'] = None
+        elif kind == TimerEvent.TARGET:
+            state['target'] = record['v']
+        elif kind == TimerEvent.PROGRAM:
+            state['program'] = record['v']
+    
+    def restore(self, state: Dict[str, Any]) -> None:
+        """Aplica un estat recuperat al timer."""
+        clock_offset = time.time() - time.perf_counter()
+        sections = [Section.from_record(record, clock_offset) for record in state['sections']]
+        self.timer.restore(sections, state['target'], state['program'],
+                           state['accumulated'], state['running_since'], state.get('session'))
+    
+    # ESCRIPTURA
+    def start(self) -> None:
+        """Comença a registrar els canvis del timer (partint d'una instantània)."""
+        self.timer.subscribe(self._on_timer_changed)
+        self._enqueue_snapshot()
+        self._thread = threading.Thread(target=self._writer_loop, name="session-journal", daemon=True)
+        self._thread.start()
+    
+    @staticmethod
+    def _wall_clock(perf_value: Optional[float]) -> Optional[float]:
+        """Converteix un instant perf_counter a hora de rellotge."""
+        if perf_value is None:
+            return None
+        return time.time() - (time.perf_counter() - perf_value)
+    
+    def _snapshot_state(self) -> Dict[str, Any]:
+        """Estat actual del timer en el format del diari."""
+        timer = self.timer
+        clock_offset = time.time() - time.perf_counter()
+        return {
+            'sections': [section.to_record(clock_offset) for section in timer.sections],
+            'target': timer.target_time,
+            'program': timer.program_number,
+            'accumulated': timer.accumulated_time,
+            'running_since': self._wall_clock(timer.start_time) if timer.is_running else None,
+            'session': timer.session_started,
+        }
+    
+    def _enqueue_snapshot(self) -> None:
+        """Encua una instantània; el fil d'escriptura hi reescriurà el diari."""
+        line = json.dumps({'k': self.SNAPSHOT, 's': self._snapshot_state()},
+                          ensure_ascii=False, separators=(',', ':'))
+        with self._lock:
+            self._pending.append((True, line))
+            self._records = 0
+        self._wakeup.set()
+    
+    def _on_timer_changed(self, event: TimerEvent) -> None:
+        """Converteix un TimerEvent en un registre del diari (fil de Tk, sense disc)."""
+        kind = event.kind
+        if kind == TimerEvent.RESET or self._records >= self.COMPACT_EVERY:
+            self._enqueue_snapshot()
+            return
+        
+        record: Dict[str, Any] = {'k': kind}
+        if kind in (TimerEvent.STARTED, TimerEvent.LAPPED):
+            record['w'] = self._wall_clock(event.value)
+        elif kind == TimerEvent.STOPPED:
+            record['a'] = event.value
+        elif kind == TimerEvent.ADDED:
+            record['i'] = event.index
+            record['s'] = event.section.to_record(time.time() - time.perf_counter())
+        elif kind in (TimerEvent.REMOVED, TimerEvent.MOVED, TimerEvent.RENAMED, TimerEvent.RETIMED):
+            record['i'] = event.index
+            if kind == TimerEvent.MOVED:
+                record['j'] = event.new_index
+            elif kind == TimerEvent.RENAMED:
+                record['n'] = event.section.name
+            elif kind == TimerEvent.RETIMED:
+                record['d'] = event.section.duration
+        elif kind in (TimerEvent.TARGET, TimerEvent.PROGRAM):
+            record['v'] = event.value
+        
+        line = json.dumps(record, ensure_ascii=False, separators=(',', ':'))
+        with self._lock:
+            self._pending.append((False, line))
+            self._records += 1
+        self._wakeup.set()
+    
+    def _writer_loop(self) -> None:
+        """Fil d'escriptura: agrupa els registres pendents i fa un fsync per lot."""
+        handle = None
+        try:
+            while True:
+                self._wakeup.wait()
+                self._wakeup.clear()
+                with self._lock:
+                    batch, self._pending = self._pending, []
+                if batch:
+                    handle = self._write_batch(handle, batch)
+                if self._closing.is_set():
+                    break
+                # Els registres que arribin mentrestant s'agrupen al lot següent
+                self._closing.wait(self.flush_interval)
+        finally:
+            if handle is not None:
+                handle.close()
+    
+    def _write_batch(self, handle, batch: List[Tuple[bool, str]]):
+        """Escriu un lot. Si conté una instantània, reescriu el diari a partir d'ella."""
+        last_snapshot = max((i for i, (is_snapshot, _) in enumerate(batch) if is_snapshot), default=None)
+        try:
+            if last_snapshot is not None:
+                if handle is not None:
+                    handle.close()
+                temp_path = self.path + '.tmp'
+                with open(temp_path, 'w', encoding='utf-8') as f:
+                    f.write(''.join(line + '\n' for _, line in batch[last_snapshot:]))
+                    f.flush()
+                    os.fsync(f.fileno())
+                os.replace(temp_path, self.path)
+                handle = open(self.path, 'a', encoding='utf-8')
+            else:
+                if handle is None:
+                    handle = open(self.path, 'a', encoding='utf-8')
+                handle.write(''.join(line + '\n' for _, line in batch))
+                handle.flush()
+                os.fsync(handle.fileno())
+            self.flushes += 1
+        except OSError as e:
+            print(f"Error escrivint el diari de sessió: {e}")
+        return handle
+    
+    def close(self) -> None:
+        """Escriu els registres pendents i atura el fil d'escriptura."""
+        self.timer.unsubscribe(self._on_timer_changed)
+        if self._thread is not None:
+            self._closing.set()
+            self._wakeup.set()
+            self._thread.join(timeout=2.0)
+            self._thread = None
+
+
+class ProgramArchive:
+    """Arxiu històric (SQLite local) dels programes acabats.
+    
+    Cada programa es desa amb les seves seccions; hi ha índexs per número de
+    programa, data i nom de secció perquè els filtres i els agregats es
+    resolguin a la base de dades sense carregar cap programa sencer. Un mateix
+    programa (número + hora d'inici de la sessió) es desa una sola vegada:
+    tornar-lo a desar el substitueix, encara que se n'hagin mogut o esborrat
+    seccions.
+    """
+    
+    def __init__(self, db_path: Optional[str] = None):
+        if db_path is None:
+            db_path = os.path.join(get_app_data_dir(), 'archive.sqlite')
+        self.db_path = db_path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA foreign_keys=ON")
+            self._conn.executescript(
+                "CREATE TABLE IF NOT EXISTS programs ("
+                " id INTEGER PRIMARY KEY, number TEXT NOT NULL, date TEXT NOT NULL,"
+                " session_key TEXT NOT NULL, saved_at TEXT NOT NULL, target INTEGER NOT NULL,"
+                " total INTEGER NOT NULL, section_count INTEGER NOT NULL,"
+                " UNIQUE(number, session_key));"
+                "CREATE TABLE IF NOT EXISTS sections ("
+                " program_id INTEGER NOT NULL REFERENCES programs(id) ON DELETE CASCADE,"
+                " position INTEGER NOT NULL, name TEXT NOT NULL, name_key TEXT NOT NULL,"
+                " duration INTEGER NOT NULL, PRIMARY KEY (program_id, position));"
+                "CREATE INDEX IF NOT EXISTS programs_number ON programs(number);"
+                "CREATE INDEX IF NOT EXISTS programs_date ON programs(date);"
+                "CREATE INDEX IF NOT EXISTS sections_name ON sections(name_key, program_id);"
+            )
+            self._conn.commit()
+    
+    @staticmethod
+    def name_key(name: str) -> str:
+        """Clau de cerca d'un nom de secció (sense majúscules ni espais sobrers)."""
+        return " ".join(name.split()).casefold()
+    
+    def store(self, timer: PrecisionTimer) -> Optional[int]:
+        """Desa (o substitueix) el programa actual del timer. Retorna l'id."""
+        if not timer.sections:
+            return None
+        started = timer.session_started
+        if started is None:
+            started = min(section.created for section in timer.sections)
+        session_key = datetime.fromtimestamp(started).isoformat()
+        saved_at = datetime.now().isoformat(timespec='seconds')
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO programs (number, date, session_key, saved_at, target, total, section_count)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?) ON CONFLICT(number, session_key) DO UPDATE SET"
+                " saved_at = excluded.saved_at, target = excluded.target, total = excluded.total,"
+                " section_count = excluded.section_count",
+                (timer.program_number, session_key[:10], session_key, saved_at,
+                 timer.target_time, timer.total_time, len(timer.sections))
+            )
+            program_id = self._conn.execute(
+                "SELECT id FROM programs WHERE number = ? AND session_key = ?",
+                (timer.program_number, session_key)
+            ).fetchone()[0]
+            self._conn.execute("DELETE FROM sections WHERE program_id = ?", (program_id,))
+            self._conn.executemany(
+                "INSERT INTO sections (program_id, position, name, name_key, duration) VALUES (?, ?, ?, ?, ?)",
+                [(program_id, position, section.name, self.name_key(section.name), section.duration)
+                 for position, section in enumerate(timer.sections)]
+            )
+            self._conn.commit()
+        return program_id
+    
+    def query_programs(self, number: str = "", date_from: str = "", date_to: str = "",
+                       section: str = "", limit: int = 1000) -> List[Tuple]:
+        """Programes filtrats, més recents primer.
+        
+        Retorna files (id, número, data, seccions, total, objectiu).
+        """
+        where, params = self._filter(number, date_from, date_to, section)
+        with self._lock:
+            return self._conn.execute(
+                "SELECT id, number, date, section_count, total, target FROM programs "
+                f"{where} ORDER BY date DESC, id DESC LIMIT ?", (*params, limit)
+            ).fetchall()
+    
+    def _filter(self, number: str, date_from: str, date_to: str, section: str) -> Tuple[str, List[Any]]:
+        """Clàusula WHERE (sobre la taula programs) i paràmetres dels filtres."""
+        clauses, params = [], []
+        if number:
+            clauses.append("programs.number LIKE ?")
+            params.append(f"{number}%")
+        if date_from:
+            clauses.append("programs.date >= ?")
+            params.append(date_from)
+        if date_to:
+            clauses.append("programs.date <= ?")
+            params.append(date_to)
+        if section:
+            clauses.append("programs.id IN (SELECT program_id FROM sections WHERE name_key LIKE ?)")
+            params.append(f"%{self.name_key(section)}%")
+        return (f"WHERE {' AND '.join(clauses)}" if clauses else ""), params
+    
+    def iter_records(self, number: str = "", date_from: str = "", date_to: str = "",
+                     section: str = "") -> Iterator['ProgramRecord']:
+        """Recorre els programes filtrats, en ordre cronològic, d'un en un.
+        
+        Fa servir una connexió pròpia (WAL permet llegir mentre l'aplicació
+        escriu), de manera que es pot consumir des d'un fil de treball sense
+        bloquejar l'arxiu ni tenir tots els programes a memòria.
+        """
+        where, params = self._filter(number, date_from, date_to, section)
+        connection = sqlite3.connect(self.db_path)
+        try:
+            rows = connection.execute(
+                "SELECT programs.id, programs.number, programs.saved_at, programs.target,"
+                " sections.name, sections.duration FROM programs"
+                " JOIN sections ON sections.program_id = programs.id "
+                f"{where} ORDER BY programs.date, programs.id, sections.position", params
+            )
+            for _, program_rows in groupby(rows, key=lambda row: row[0]):
+                first = next(program_rows)
+                sections = [(first[4], first[5])]
+                sections.extend((row[4], row[5]) for row in program_rows)
+                yield ProgramRecord(first[1], datetime.fromisoformat(first[2]), first[3], sections)
+        finally:
+            connection.close()
+    
+    def get_sections(self, program_id: int) -> List[Tuple[str, int]]:
+        """Seccions (nom, durada) d'un programa, en ordre."""
+        with self._lock:
+            return self._conn.execute(
+                "SELECT name, duration FROM sections WHERE program_id = ? ORDER BY position",
+                (program_id,)
+            ).fetchall()
+    
+    def section_stats(self, name: str, last_programs: int = 50) -> Tuple[int, Optional[float], Optional[int], Optional[int]]:
+        """Agregats (n, mitjana, mínim, màxim) d'una secció als últims programes."""
+        with self._lock:
+            return self._conn.execute(
+                "SELECT COUNT(*), AVG(s.duration), MIN(s.duration), MAX(s.duration) FROM sections s"
+                " JOIN (SELECT id FROM programs ORDER BY date DESC, id DESC LIMIT ?) p"
+                " ON s.program_id = p.id WHERE s.name_key = ?",
+                (last_programs, self.name_key(name))
+            ).fetchone()
+    
+    def section_samples(self, last_programs: int = 50) -> Tuple[List[Tuple[str, int, int]], int]:
+        """Durades (clau de nom, durada, id de programa) dels últims programes i quants n'hi ha."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT s.name_key, s.duration, s.program_id FROM sections s"
+                " JOIN (SELECT id FROM programs ORDER BY date DESC, id DESC LIMIT ?) p"
+                " ON s.program_id = p.id", (last_programs,)
+            ).fetchall()
+            count = self._conn.execute(
+                "SELECT COUNT(*) FROM (SELECT id FROM programs LIMIT ?)", (last_programs,)
+            ).fetchone()[0]
+        return rows, count
+    
+    def delete(self, program_id: int) -> None:
+        """Elimina un programa de l'arxiu."""
+        with self._lock:
+            self._conn.execute("DELETE FROM programs WHERE id = ?", (program_id,))
+            self._conn.commit()
+    
+    def close(self) -> None:
+        """Tanca la base de dades."""
+        with self._lock:
+            self._conn.close()
+
+
+class ProgramRecord:
+    """Programa a exportar: dades estructurades, sense passar per text."""
+    
+    __slots__ = ('number', 'moment', 'target', 'sections', 'total')
+    
+    def __init__(self, number: str, moment: datetime, target: int, sections: List[Tuple[str, int]]):
+        self.number = number
+        self.moment = moment
+        self.target = target
+        self.sections = sections
+        self.total = sum(duration for _, duration in sections)
+    
+    @classmethod
+    def from_timer(cls, timer: PrecisionTimer) -> 'ProgramRecord':
+        """Programa en curs del timer."""
+        return cls(timer.program_number, datetime.now(), timer.target_time,
+                   [(section.name, section.duration) for section in timer.sections])
+
+
+class ExportFormatter:
+    """Base dels formatadors d'exportació.
+    
+    `render` produeix el text d'un programa a trossos; l'exportació per lots
+    escriu `begin`, els programes separats per `separator`, i `end`, sense
+    construir mai el fitxer sencer a memòria. Les plantilles de cada format es
+    compilen una vegada com a mètodes `str.format` lligats.
+    """
+    
+    name = ""
+    label = ""
+    extension = ".txt"
+    
+    def begin(self) -> str:
+        """Inici d'un fitxer amb diversos programes."""
+        return ""
+    
+    def separator(self) -> str:
+        """Separació entre programes."""
+        return "\n\n"
+    
+    def end(self) -> str:
+        """Final d'un fitxer amb diversos programes."""
+        return ""
+    
+    def render(self, record: ProgramRecord) -> Iterator[str]:
+        """Trossos de text d'un programa."""
+        raise NotImplementedError
+    
+    def format(self, record: ProgramRecord) -> str:
+        """Text complet d'un sol programa."""
+        return "".join(self.render(record))
+
+
+EXPORT_FORMATTERS: Dict[str, ExportFormatter] = {}
+
+
+def register_formatter(cls):
+    """Registra un formatador (decorador de classe)."""
+    EXPORT_FORMATTERS[cls.name] = cls()
+    return cls
+
+
+def get_formatter(name: str) -> ExportFormatter:
+    """Formatador registrat amb aquest nom."""
+    try:
+        return EXPORT_FORMATTERS[name]
+    except KeyError:
+        raise ValueError(f"Format d'exportació desconegut: {name}")
+
+
+def export_programs(records: Iterable[ProgramRecord], formatter: ExportFormatter, stream: TextIO) -> int:
+    """Escriu molts programes en un sol fitxer a mesura que arriben. Retorna quants."""
+    count = 0
+    stream.write(formatter.begin())
+    for record in records:
+        if count:
+            stream.write(formatter.separator())
+        stream.writelines(formatter.render(record))
+        count += 1
+    stream.write(formatter.end())
+    return count
+
+
+@register_formatter
+class TextFormatter(ExportFormatter):
+    """Registre de text amb columnes (el format clàssic)."""
+    
+    name = "text"
+    label = "Text"
+    _row = "{:>2}  | {:<35.35} | {}\n".format
+    _header = ("REGISTRE LA RENAIXENÇA PGM {}\n" + "=" * 50 + "\nData: {}\nHora: {}\n\n"
+               "Nº  | Secció                           | Durada\n" + "-" * 50 + "\n").format
+    _footer = ("-" * 50 + "\nTOTAL: {} seccions - {}").format
+    
+    def render(self, record: ProgramRecord) -> Iterator[str]:
+        format_time = PrecisionTimer.format_time
+        yield self._header(record.number, catalan_date(record.moment), record.moment.strftime('%H:%M:%S'))
+        for number, (name, duration) in enumerate(record.sections, 1):
+            yield self._row(number, name, format_time(duration))
+        yield self._footer(len(record.sections), format_time(record.total))
+
+
+@register_formatter
+class WhatsAppFormatter(ExportFormatter):
+    """Missatge per a WhatsApp (negretes i emojis)."""
+    
+    name = "whatsapp"
+    label = "WhatsApp"
+    _header = ("📺 *REGISTRE LA RENAIXENÇA PGM {}*\n📅 Data: {}\n🕐 Hora: {}\n\n"
+               "Nº  | Secció                           | Durada\n").format
+    _row = "▶️{} | {:<29.29} | *{}*\n".format
+    _footer = "\n⏱️ *TOTAL: {} seccions - {}*".format
+    
+    def render(self, record: ProgramRecord) -> Iterator[str]:
+        format_time = PrecisionTimer.format_time
+        yield self._header(record.number, catalan_date(record.moment), record.moment.strftime('%H:%M:%S'))
+        for number, (name, duration) in enumerate(record.sections, 1):
+            yield self._row(number, name.strip(), format_time(duration))
+        yield self._footer(len(record.sections), format_time(record.total))
+
+
+@register_formatter
+class CsvFormatter(ExportFormatter):
+    """Una fila per secció; la capçalera només surt una vegada per fitxer."""
+    
+    name = "csv"
+    label = "CSV"
+    extension = ".csv"
+    COLUMNS = ("programa", "data", "hora", "posicio", "seccio", "durada_s", "durada")
+    
+    def _line(self, values) -> str:
+        buffer = io.StringIO()
+        csv.writer(buffer, lineterminator="\n").writerow(values)
+        return buffer.getvalue()
+    
+    def begin(self) -> str:
+        return self._line(self.COLUMNS)
+    
+    def separator(self) -> str:
+        return ""
+    
+    def render(self, record: ProgramRecord) -> Iterator[str]:
+        format_time = PrecisionTimer.format_time
+        buffer = io.StringIO()
+        writer = csv.writer(buffer, lineterminator="\n")
+        date, hour = record.moment.strftime('%Y-%m-%d'), record.moment.strftime('%H:%M:%S')
+        for position, (name, duration) in enumerate(record.sections, 1):
+            writer.writerow((record.number, date, hour, position, name, duration, format_time(duration)))
+        yield buffer.getvalue()
+    
+    def format(self, record: ProgramRecord) -> str:
+        return self.begin() + "".join(self.render(record))
+
+
+@register_formatter
+class JsonFormatter(ExportFormatter):
+    """Un objecte per programa; diversos programes formen una llista."""
+    
+    name = "json"
+    label = "JSON"
+    extension = ".json"
+    
+    def begin(self) -> str:
+        return "[\n"
+    
+    def separator(self) -> str:
+        return ",\n"
+    
+    def end(self) -> str:
+        return "\n]\n"
+    
+    def render(self, record: ProgramRecord) -> Iterator[str]:
+        yield json.dumps({
+            'programa': record.number,
+            'data': record.moment.isoformat(timespec='seconds'),
+            'objectiu': record.target,
+            'total': record.total,
+            'seccions': [{'nom': name, 'durada': duration} for name, duration in record.sections],
+        }, ensure_ascii=False)
+
+
+@register_formatter
+class MarkdownFormatter(ExportFormatter):
+    """Taula Markdown per programa."""
+    
+    name = "markdown"
+    label = "Markdown"
+    extension = ".md"
+    _header = "## Programa {} · {}, {}\n\n| Nº | Secció | Durada |\n|---:|---|---:|\n".format
+    _row = "| {} | {} | {} |\n".format
+    _footer = "| | **Total ({} seccions)** | **{}** |\n".format
+    
+    def render(self, record: ProgramRecord) -> Iterator[str]:
+        format_time = PrecisionTimer.format_time
+        yield self._header(record.number, catalan_date(record.moment), record.moment.strftime('%H:%M'))
+        for number, (name, duration) in enumerate(record.sections, 1):
+            yield self._row(number, name.replace("|", "\\|"), format_time(duration))
+        yield self._footer(len(record.sections), format_time(record.total))
+    
+    def separator(self) -> str:
+        return "\n"
+
+
+class SectionForecaster:
+    """Previsió del total final a partir de les durades històriques de cada secció.
+    
+    A partir dels últims programes de l'arxiu es calculen amb NumPy els
+    percentils 10/50/90 de cada nom de secció i quina fracció de programes la
+    inclou. Les seccions habituals (presents en almenys `min_share` dels
+    programes) que encara no s'han fet són les que falten. Les sumes de les
+    que falten s'actualitzen de manera incremental amb cada TimerEvent, de
+    manera que cada tick només fa unes poques operacions.
+    """
+    
+    QUANTILES = (10, 50, 90)
+    
+    def __init__(self, timer: PrecisionTimer, last_programs: int = 50, min_share: float = 0.5):
+        self.timer = timer
+        self.last_programs = last_programs
+        self.min_share = min_share
+        self.percentiles: Dict[str, Tuple[float, float, float]] = {}
+        self.expected: set = set()
+        self._done: Dict[str, int] = {}
+        self._section_keys: Dict[int, str] = {}   # id de secció -> clau del nom
+        # Sumes de les seccions habituals que falten: mediana, desviacions² baixa i alta
+        self._median_sum = 0.0
+        self._low_sq = 0.0
+        self._high_sq = 0.0
+    
+    @property
+    def ready(self) -> bool:
+        """Indica si hi ha prou historial per fer previsions."""
+        return bool(self.expected)
+    
+    @classmethod
+    def compute(cls, samples: List[Tuple[str, int, int]], programs: int, 
+                min_share: float = 0.5) -> Tuple[Dict[str, Tuple[float, float, float]], set]:
+        """Percentils per nom de secció i noms habituals (vectoritzat, fil de treball)."""
+        if not samples or not programs or importlib.util.find_spec('numpy') is None:
+            return {}, set()
+        import numpy as np
+        
+        keys = np.array([row[0] for row in samples])
+        durations = np.array([row[1] for row in samples], dtype=np.float64)
+        program_ids = np.array([row[2] for row in samples], dtype=np.int64)
+        names, inverse = np.unique(keys, return_inverse=True)
+        
+        # Ordena per (nom, durada): cada nom ocupa un tram contigu
+        order = np.lexsort((durations, inverse))
+        ordered = durations[order]
+        counts = np.bincount(inverse, minlength=len(names))
+        starts = np.concatenate(([0], np.cumsum(counts)[:-1]))
+        columns = []
+        for quantile in cls.QUANTILES:
+            position = starts + (counts - 1) * (quantile / 100.0)
+            low = np.floor(position).astype(np.int64)
+            high = np.minimum(low + 1, starts + counts - 1)
+            fraction = position - low
+            columns.append(ordered[low] + (ordered[high] - ordered[low]) * fraction)
+        values = np.column_stack(columns)
+        
+        # Fracció de programes on apareix cada nom (una vegada per programa)
+        pairs = np.unique(inverse.astype(np.int64) * (int(program_ids.max()) + 1) + program_ids)
+        share = np.bincount(pairs // (int(program_ids.max()) + 1), minlength=len(names)) / programs
+        
+        percentiles = {str(name): tuple(float(v) for v in row) for name, row in zip(names, values)}
+        expected = {str(name) for name in names[share >= min_share]}
+        return percentiles, expected
+    
+    def apply(self, percentiles: Dict[str, Tuple[float, float, float]], expected: set) -> None:
+        """Carrega unes estadístiques noves i les sincronitza amb les seccions actuals."""
+        self.percentiles = percentiles
+        self.expected = expected
+        self._median_sum = self._low_sq = self._high_sq = 0.0
+        for key in expected:
+            self._adjust(key, 1)
+        self._done = {}
+        self._section_keys = {}
+        for section in self.timer.sections:
+            self._mark(section, 1)
+    
+    def _adjust(self, key: str, sign: int) -> None:
+        """Suma (+1) o resta (-1) una secció habitual de les que falten."""
+        low, median, high = self.percentiles[key]
+        self._median_sum += sign * median
+        self._low_sq += sign * (median - low) ** 2
+        self._high_sq += sign * (high - median) ** 2
+    
+    def _mark(self, section: Section, sign: int) -> None:
+        """Registra (+1) o desfà (-1) una secció feta."""
+        if sign > 0:
+            key = ProgramArchive.name_key(section.name)
+            self._section_keys[section.id] = key
+        else:
+            key = self._section_keys.pop(section.id, None)
+            if key is None:
+                return
+        before = self._done.get(key, 0)
+        after = before + sign
+        self._done[key] = after
+        if key in self.expected:
+            if before == 0 and after == 1:
+                self._adjust(key, -1)
+            elif before == 1 and after == 0:
+                self._adjust(key, 1)
+    
+    def on_timer_changed(self, event: TimerEvent) -> None:
+        """Actualitza les sumes amb un canvi del timer (O(1))."""
+        if not self.percentiles:
+            return
+        if event.kind == TimerEvent.ADDED:
+            self._mark(event.section, 1)
+        elif event.kind == TimerEvent.REMOVED:
+            self._mark(event.section, -1)
+        elif event.kind == TimerEvent.RENAMED:
+            self._mark(event.section, -1)
+            self._mark(event.section, 1)
+        elif event.kind == TimerEvent.RESET:
+            self.apply(self.percentiles, self.expected)
+    
+    def predict(self, total_time: int, current_name: str, 
+                current_elapsed: int) -> Optional[Tuple[float, float, float]]:
+        """Total final previst (baix, mitjà, alt) amb la secció en curs inclosa."""
+        if not self.expected:
+            return None
+        median_sum, low_sq, high_sq = self._median_sum, self._low_sq, self._high_sq
+        key = ProgramArchive.name_key(current_name) if current_name else ""
+        if key in self.expected and not self._done.get(key):
+            # La secció en curs dura almenys el que ja porta
+            low, median, high = self.percentiles[key]
+            median_sum += max(median, current_elapsed) - median
+            low_sq += (max(median, current_elapsed) - max(low, current_elapsed)) ** 2 - (median - low) ** 2
+            high_sq += (max(high, current_elapsed) - max(median, current_elapsed)) ** 2 - (high - median) ** 2
+        else:
+            median_sum += current_elapsed
+        middle = total_time + median_sum
+        return (middle - math.sqrt(max(low_sq, 0.0)), middle, middle + math.sqrt(max(high_sq, 0.0)))
+
+
+class FenwickTree:
+    """Arbre de Fenwick: sumes prefix i actualitzacions puntuals en O(log n)."""
+    
+    __slots__ = ('_tree', '_values')
+    
+    def __init__(self, values: Tuple = ()):
+        self._values: List[float] = list(values)
+        self._tree: List[float] = [0] + self._values
+        # Construcció en O(n): cada node passa la seva suma al pare
+        for i in range(1, len(self._tree)):
+            parent = i + (i & -i)
+            if parent < len(self._tree):
+                self._tree[parent] += self._tree[i]
+    
+    def __len__(self) -> int:
+        return len(self._values)
+    
+    def __getitem__(self, index: int) -> float:
+        return self._values[index]
+    
+    def set(self, index: int, value: float) -> None:
+        """Canvia el valor d'una posició."""
+        delta = value - self._values[index]
+        if not delta:
+            return
+        self._values[index] = value
+        i = index + 1
+        while i < len(self._tree):
+            self._tree[i] += delta
+            i += i & -i
+    
+    def prefix(self, count: int) -> float:
+        """Suma dels primers `count` valors."""
+        total = 0
+        i = min(count, len(self._values))
+        while i > 0:
+            total += self._tree[i]
+            i -= i & -i
+        return total
+    
+    def total(self) -> float:
+        """Suma de tots els valors."""
+        return self.prefix(len(self._values))
+    
+    def append(self, value: float) -> None:
+        """Afegeix un valor al final (O(log n))."""
+        self._values.append(value)
+        i = len(self._values)
+        self._tree.append(value + self.prefix(i - 1) - self.prefix(i - (i & -i)))
+    
+    def pop(self) -> float:
+        """Treu l'últim valor (O(1): cap node anterior el conté)."""
+        self._tree.pop()
+        return self._values.pop()
+    
+    def insert(self, index: int, value: float) -> None:
+        """Insereix desplaçant la cua (O((n - index) log n))."""
+        self.append(self._values[-1] if self._values else value)
+        for i in range(len(self._values) - 2, index, -1):
+            self.set(i, self._values[i - 1])
+        self.set(index, value)
+    
+    def remove(self, index: int) -> float:
+        """Elimina desplaçant la cua (O((n - index) log n))."""
+        removed = self._values[index]
+        for i in range(index, len(self._values) - 1):
+            self.set(i, self._values[i + 1])
+        self.pop()
+        return removed
+    
+    def move(self, index: int, new_index: int) -> None:
+        """Mou un valor (O(|new_index - index| log n))."""
+        value = self._values[index]
+        step = 1 if new_index > index else -1
+        for i in range(index, new_index, step):
+            self.set(i, self._values[i + step])
+        self.set(new_index, value)
+
+
+class Rundown:
+    """Escaleta planificada (noms i durades previstes) comparada amb les seccions reals.
+    
+    Cada secció real es compara amb l'element de l'escaleta de la mateixa
+    posició. Les durades reals i previstes es guarden en dos arbres de Fenwick
+    que segueixen els TimerEvent, de manera que la deriva acumulada i l'inici
+    previst de qualsevol element surten de sumes prefix en O(log n).
+    """
+    
+    def __init__(self, timer: PrecisionTimer, path: Optional[str] = None):
+        self.timer = timer
+        self.path = path or os.path.join(get_app_data_dir(), 'rundown.json')
+        self.names: List[str] = []
+        self.planned = FenwickTree()
+        self.actual = FenwickTree(tuple(section.duration for section in timer.sections))
+        self.version: int = 0
+        self._load()
+    
+    # ESCALETA
+    @staticmethod
+    def parse_duration(text: str) -> int:
+        """Interpreta 'MM:SS', 'H:MM:SS' o minuts sols."""
+        parts = [int(part) for part in text.strip().split(':')]
+        if len(parts) == 1:
+            return parts[0] * 60
+        seconds = 0
+        for part in parts:
+            seconds = seconds * 60 + part
+        return seconds
+    
+    @classmethod
+    def parse_text(cls, text: str) -> List[Tuple[str, int]]:
+        """Llegeix una escaleta: una línia per element, 'Nom;MM:SS' (també amb tabulador o coma)."""
+        items = []
+        for number, line in enumerate(text.splitlines(), 1):
+            line = line.strip()
+            if not line or line.startswith('#'):
+                continue
+            for separator in ('\t', ';', ','):
+                if separator in line:
+                    name, duration = line.rsplit(separator, 1)
+                    break
+            else:
+                raise ValueError(f"Línia {number}: falta la durada")
+            try:
+                items.append((name.strip(), cls.parse_duration(duration)))
+            except ValueError:
+                raise ValueError(f"Línia {number}: durada no vàlida «{duration.strip()}»")
+        return items
+    
+    def set_items(self, items: List[Tuple[str, int]]) -> None:
+        """Substitueix l'escaleta i la desa."""
+        self.names = [name for name, _ in items]
+        self.planned = FenwickTree(tuple(duration for _, duration in items))
+        self.version += 1
+        try:
+            with open(self.path, 'w', encoding='utf-8') as f:
+                json.dump(items, f, ensure_ascii=False)
+        except OSError as e:
+            print(f"No s'ha pogut desar l'escaleta: {e}")
+    
+    def _load(self) -> None:
+        """Recupera l'última escaleta carregada."""
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                items = json.load(f)
+        except (OSError, ValueError):
+            return
+        self.names = [name for name, _ in items]
+        self.planned = FenwickTree(tuple(duration for _, duration in items))
+    
+    # SEGUIMENT DEL TIMER
+    def on_timer_changed(self, event: TimerEvent) -> None:
+        """Manté les durades reals sincronitzades amb el timer."""
+        kind = event.kind
+        if kind == TimerEvent.ADDED:
+            if event.index == len(self.actual):
+                self.actual.append(event.section.duration)
+            else:
+                self.actual.insert(event.index, event.section.duration)
+        elif kind == TimerEvent.REMOVED:
+            self.actual.remove(event.index)
+        elif kind == TimerEvent.MOVED:
+            self.actual.move(event.index, event.new_index)
+        elif kind == TimerEvent.RETIMED:
+            self.actual.set(event.index, event.section.duration)
+        elif kind == TimerEvent.RESET:
+            self.actual = FenwickTree(tuple(section.duration for section in self.timer.sections))
+        elif kind != TimerEvent.RENAMED:
+            return
+        self.version += 1
+    
+    # CONSULTES
+    def __len__(self) -> int:
+        return max(len(self.names), len(self.actual))
+    
+    def delta(self, index: int) -> Optional[int]:
+        """Diferència real - prevista d'una secció feta."""
+        if index >= len(self.actual) or index >= len(self.names):
+            return None
+        return self.actual[index] - self.planned[index]
+    
+    def drift(self, count: Optional[int] = None) -> int:
+        """Deriva acumulada de les primeres `count` seccions fetes."""
+        if count is None:
+            count = len(self.actual)
+        return self.actual.prefix(count) - self.planned.prefix(count)
+    
+    def planned_start(self, index: int) -> int:
+        """Inici previst d'un element segons l'escaleta."""
+        return self.planned.prefix(index)
+    
+    def projected_start(self, index: int, current_elapsed: int = 0) -> int:
+        """Inici estimat d'un element pendent, amb la deriva real i la secció en curs."""
+        done = len(self.actual)
+        if index <= done:
+            return self.actual.prefix(index)
+        current_planned = self.planned[done] if done < len(self.planned) else 0
+        return (self.actual.total() + max(current_elapsed, current_planned)
+                + self.planned.prefix(index) - self.planned.prefix(done + 1))
+
+
+class Counter:
+    """Comptador auxiliar (compte enrere, cronòmetre o temps des de l'hora en punt).
+    
+    No llegeix mai el rellotge: tots els mètodes reben l'instant `perf_counter`
+    del frame, de manera que molts comptadors comparteixen una sola lectura.
+    """
+    
+    UP = 'up'
+    DOWN = 'down'
+    HOUR = 'hour'
+    
+    __slots__ = ('id', 'label', 'mode', 'duration', 'accumulated', 'running_since', 'shown')
+    
+    def __init__(self, counter_id: int, label: str, mode: str, duration: int = 0):
+        self.id = counter_id
+        self.label = label
+        self.mode = mode
+        self.duration = duration
+        self.accumulated: float = 0.0
+        self.running_since: Optional[float] = None  # Per HOUR: inici de l'hora en curs
+        self.shown: Optional[int] = None            # Últim valor mostrat
+    
+    @property
+    def is_running(self) -> bool:
+        return self.running_since is not None
+    
+    def start(self, now: float) -> None:
+        if self.mode == self.HOUR:
+            moment = datetime.now()
+            self.running_since = now - (moment.minute * 60 + moment.second + moment.microsecond / 1e6)
+        elif self.running_since is None:
+            self.running_since = now
+    
+    def stop(self, now: float) -> None:
+        if self.mode != self.HOUR and self.running_since is not None:
+            self.accumulated += now - self.running_since
+            self.running_since = None
+    
+    def reset(self, now: float) -> None:
+        self.accumulated = 0.0
+        if self.mode == self.HOUR or self.running_since is not None:
+            self.running_since = None
+            self.start(now)
+    
+    def elapsed(self, now: float) -> float:
+        """Temps comptat fins a `now`."""
+        if self.running_since is None:
+            return self.accumulated
+        if self.mode == self.HOUR and now - self.running_since >= 3600:
+            self.start(now)  # Nova hora: es torna a ancorar al rellotge de paret
+        return self.accumulated + (now - self.running_since)
+    
+    def value(self, now: float) -> int:
+        """Segons a mostrar (negatiu si el compte enrere s'ha passat)."""
+        whole = math.floor(self.elapsed(now))
+        return self.duration - whole if self.mode == self.DOWN else whole
+    
+    def next_change(self, now: float) -> Optional[float]:
+        """Instant en què canviarà el valor mostrat (None si està parat)."""
+        if self.running_since is None:
+            return None
+        return self.running_since + math.floor(self.elapsed(now)) + 1 - self.accumulated
+    
+    @staticmethod
+    def format_value(seconds: int) -> str:
+        """MM:SS amb signe quan és negatiu."""
+        sign = "-" if seconds < 0 else ""
+        return f"{sign}{PrecisionTimer.format_time(abs(seconds))}"
+
+
+class CounterBank:
+    """Tots els comptadors auxiliars, servits per una sola tasca del planificador.
+    
+    `next_deadline` dona al FrameScheduler el pròxim canvi de segon de qualsevol
+    comptador en marxa i `tick` retorna només els que han canviat, de manera que
+    deu comptadors oberts costen pràcticament el mateix que un.
+    """
+    
+    def __init__(self):
+        self.counters: Dict[int, Counter] = {}
+        self._next_id: int = 1
+        self.version: int = 0  # Canvia en afegir o treure comptadors
+    
+    def __len__(self) -> int:
+        return len(self.counters)
+    
+    def __iter__(self) -> Iterator[Counter]:
+        return iter(self.counters.values())
+    
+    def add(self, label: str, mode: str, duration: int, now: float) -> Counter:
+        """Afegeix un comptador (l'hora en punt arrenca sola)."""
+        counter = Counter(self._next_id, label, mode, duration)
+        self._next_id += 1
+        if mode == Counter.HOUR:
+            counter.start(now)
+        self.counters[counter.id] = counter
+        self.version += 1
+        return counter
+    
+    def remove(self, counter_id: int) -> None:
+        if self.counters.pop(counter_id, None) is not None:
+            self.version += 1
+    
+    def next_deadline(self, now: float) -> Optional[float]:
+        """Pròxim canvi de segon entre tots els comptadors en marxa."""
+        deadline = None
+        for counter in self.counters.values():
+            change = counter.next_change(now)
+            if change is not None and (deadline is None or change < deadline):
+                deadline = change
+        return deadline
+    
+    def tick(self, now: float) -> List[Counter]:
+        """Comptadors el valor mostrat dels quals ha canviat des de l'últim tick."""
+        changed = []
+        for counter in self.counters.values():
+            value = counter.value(now)
+            if value != counter.shown:
+                counter.shown = value
+                changed.append(counter)
+        return changed
+
+
+class Cue:
+    """Automatisme: una acció d'àudio lligada a un instant del programa."""
+    
+    REMAINING = 'remaining'  # Quan el temps restant arriba a `at`
+    TOTAL = 'total'          # Quan el total del programa arriba a `at`
+    PLAY = 'play'
+    FADE = 'fade'
+    STOP = 'stop'
+    
+    PENDING = 'pending'
+    FIRED = 'fired'
+    MISSED = 'missed'
+    
+    __slots__ = ('id', 'trigger', 'at', 'action', 'path', 'fade', 'state', 'error')
+    
+    def __init__(self, cue_id: int, trigger: str, at: int, action: str,
+                 path: Optional[str] = None, fade: float = 3.0):
+        self.id = cue_id
+        self.trigger = trigger
+        self.at = at
+        self.action = action
+        self.path = path
+        self.fade = fade
+        self.state = self.PENDING
+        self.error: Optional[float] = None  # Retard real en disparar (segons)
+    
+    def to_dict(self) -> Dict[str, Any]:
+        return {'trigger': self.trigger, 'at': self.at, 'action': self.action,
+                'path': self.path, 'fade': self.fade}
+
+
+class CueEngine:
+    """Automatismes ordenats en un heap pel temps de programa en què toquen.
+    
+    El temps de programa és el total de les seccions més el cronòmetre en curs.
+    La clau de cada automatisme només depèn de l'objectiu (per als de temps
+    restant), així que el heap es refà només quan canvia l'objectiu o la llista.
+    El venciment en `perf_counter` es calcula a partir de l'estat del timer cada
+    vegada que el planificador el demana, de manera que pauses, divisions i
+    edicions de seccions queden reprogramades sense cap feina extra.
+    """
+    
+    MISS_WINDOW = 2.0  # Més enllà d'aquest retard l'automatisme es dona per perdut
+    
+    def __init__(self, timer: PrecisionTimer, path: Optional[str] = None):
+        self.timer = timer
+        self.path = path or os.path.join(get_app_data_dir(), 'cues.json')
+        self.cues: Dict[int, Cue] = {}
+        self.version: int = 0
+        self._heap: List[Tuple[float, int]] = []
+        self._next_id: int = 1
+        self._load()
+    
+    def _load(self) -> None:
+        """Llegeix els automatismes desats."""
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                records = json.load(f)
+        except (OSError, ValueError):
+            return
+        for record in records:
+            try:
+                self._add(Cue(self._next_id, record['trigger'], int(record['at']), record['action'],
+                              record.get('path'), float(record.get('fade', 3.0))))
+            except (KeyError, TypeError, ValueError):
+                continue
+        self._rebuild()
+    
+    def _save(self) -> None:
+        """Desa els automatismes."""
+        try:
+            with open(self.path, 'w', encoding='utf-8') as f:
+                json.dump([cue.to_dict() for cue in self.cues.values()], f, ensure_ascii=False)
+        except OSError as e:
+            print(f"No s'han pogut desar els automatismes: {e}")
+    
+    def _add(self, cue: Cue) -> None:
+        self.cues[cue.id] = cue
+        self._next_id = max(self._next_id, cue.id + 1)
+    
+    def add(self, trigger: str, at: int, action: str, path: Optional[str] = None, fade: float = 3.0) -> Cue:
+        """Afegeix un automatisme. Si el seu instant ja ha passat, no es dispararà."""
+        cue = Cue(self._next_id, trigger, at, action, path, fade)
+        self._add(cue)
+        if self.key(cue) < self.program_time():
+            cue.state = Cue.MISSED
+        self._rebuild()
+        self._save()
+        return cue
+    
+    def remove(self, cue_id: int) -> None:
+        if self.cues.pop(cue_id, None) is not None:
+            self._rebuild()
+            self._save()
+    
+    def key(self, cue: Cue) -> float:
+        """Temps de programa en què toca l'automatisme."""
+        if cue.trigger == Cue.REMAINING:
+            return self.timer.target_time - cue.at
+        return cue.at
+    
+    def program_time(self, now: Optional[float] = None) -> float:
+        """Total de seccions més el cronòmetre en curs."""
+        return self.timer.total_time + self.timer.get_elapsed(now)
+    
+    def _rebuild(self) -> None:
+        """Refà el heap amb els automatismes pendents."""
+        self._heap = [(self.key(cue), cue.id) for cue in self.cues.values() if cue.state == Cue.PENDING]
+        heapq.heapify(self._heap)
+        self.version += 1
+    
+    def rearm(self) -> None:
+        """Torna a deixar tots els automatismes pendents (programa nou)."""
+        for cue in self.cues.values():
+            cue.state = Cue.PENDING
+            cue.error = None
+        self._rebuild()
+    
+    def on_timer_changed(self, event: TimerEvent) -> None:
+        """Programa nou: es rearmen. Objectiu nou: canvien les claus dels de temps restant."""
+        if event.kind == TimerEvent.RESET:
+            self.rearm()
+        elif event.kind == TimerEvent.TARGET:
+            self._rebuild()
+    
+    def next_deadline(self, now: float) -> Optional[float]:
+        """Instant perf_counter del pròxim automatisme (None si el cronòmetre està parat)."""
+        timer = self.timer
+        if not self._heap or not timer.is_running or timer.start_time is None:
+            return None
+        return timer.start_time + (self._heap[0][0] - timer.total_time - timer.accumulated_time)
+    
+    def due(self, now: float) -> List[Cue]:
+        """Treu del heap els automatismes vençuts i retorna els que s'han de disparar."""
+        if not self._heap or not self.timer.is_running:
+            return []
+        program_time = self.program_time(now)
+        pending = len(self._heap)
+        fired = []
+        while self._heap and self._heap[0][0] <= program_time:
+            key, cue_id = heapq.heappop(self._heap)
+            cue = self.cues.get(cue_id)
+            if cue is None or cue.state != Cue.PENDING:
+                continue
+            cue.error = program_time - key
+            if cue.error <= self.MISS_WINDOW:
+                cue.state = Cue.FIRED
+                fired.append(cue)
+            else:
+                cue.state = Cue.MISSED  # P. ex. s'ha allargat una secció per sobre del moment
+        if len(self._heap) != pending:
+            self.version += 1
+        return fired
+    
+    def upcoming(self, now: float, horizon: float) -> List[Cue]:
+        """Automatismes pendents que tocaran dins de `horizon` segons de programa."""
+        limit = self.program_time(now) + horizon
+        return [self.cues[cue_id] for key, cue_id in self._heap
+                if key <= limit and cue_id in self.cues]
+
+
+class TreeviewReconciler:
+    """Manté un Treeview sincronitzat amb una llista de files sense reconstruir-lo.
+    
+    Cada fila s'identifica per un iid estable; només s'insereixen, s'actualitzen,
+    es mouen o s'eliminen les files que han canviat, de manera que la selecció i
+    la posició de l'scroll es conserven.
+    """
+    
+    def __init__(self, tree: ttk.Treeview):
+        self.tree = tree
+        self._order: List[str] = []
+        self._rows: Dict[str, Tuple[tuple, tuple]] = {}
+    
+    def reconcile(self, rows: List[Tuple[str, tuple, tuple]]) -> int:
+        """Aplica les files desitjades (iid, valors, tags). Retorna les operacions fetes."""
+        operations = 0
+        wanted = {iid for iid, _, _ in rows}
+        
+        order = []
+        for iid in self._order:
+            if iid in wanted:
+                order.append(iid)
+            else:
+                self.tree.delete(iid)
+                del self._rows[iid]
+                operations += 1
+        
+        for index, (iid, values, tags) in enumerate(rows):
+            cached = self._rows.get(iid)
+            if cached is None:
+                self.tree.insert('', index, iid=iid, values=values, tags=tags)
+                order.insert(index, iid)
+                operations += 1
+            else:
+                if cached != (values, tags):
+                    self.tree.item(iid, values=values, tags=tags)
+                    operations += 1
+                if order[index] != iid:
+                    self.tree.move(iid, '', index)
+                    order.remove(iid)
+                    order.insert(index, iid)
+                    operations += 1
+            self._rows[iid] = (values, tags)
+        
+        self._order = order
+        return operations
+    
+    def update(self, iid: str, values: tuple, tags: tuple = ()) -> bool:
+        """Actualitza una sola fila existent si ha canviat."""
+        cached = self._rows.get(iid)
+        if cached is None or cached == (values, tags):
+            return False
+        self.tree.item(iid, values=values, tags=tags)
+        self._rows[iid] = (values, tags)
+        return True
+    
+    def clear(self) -> None:
+        """Elimina totes les files gestionades."""
+        for iid in self._order:
+            self.tree.delete(iid)
+        self._order = []
+        self._rows = {}
+
+
+class ScheduledTask:
+    """Tasca periòdica registrada al FrameScheduler."""
+    
+    __slots__ = ('name', 'callback', 'period', 'priority', 'deadline_fn', 'throttle',
+                 'next_run', 'woken', 'last_lateness')
+    
+    def __init__(self, name: str, callback: Callable[[float], None], period: Optional[float],
+                 priority: int, deadline_fn: Optional[Callable[[float], Optional[float]]],
+                 throttle: bool):
+        self.name = name
+        self.callback = callback
+        self.period = period
+        self.priority = priority
+        self.deadline_fn = deadline_fn
+        self.throttle = throttle
+        self.next_run: float = time.perf_counter()
+        self.woken: bool = True
+        self.last_lateness: float = 0.0
+
+
+class FrameScheduler:
+    """Planificador únic de tota la feina periòdica de la UI.
+    
+    Substitueix els bucles `root.after` independents: cada frame llegeix
+    `perf_counter` una sola vegada (`self.now`), executa les tasques vençudes per
+    ordre de prioritat (0 = màxima) dins d'un pressupost de temps, i programa el
+    següent frame per al venciment més proper. Les tasques poden donar un
+    venciment exacte (p. ex. el pròxim canvi de segon del rellotge). Quan la
+    finestra està minimitzada o sense focus, les tasques `throttle` baixen de ritme.
+    """
+    
+    SLACK = 0.002
+    
+    def __init__(self, root, budget_ms: float = 8.0, background_period: float = 1.0):
+        self.root = root
+        self.budget = budget_ms / 1000.0
+        self.background_period = background_period
+        self.tasks: Dict[str, ScheduledTask] = {}
+        self.now: float = time.perf_counter()
+        self.iconified: bool = False
+        self.focused: bool = True
+        self._job = None
+        self._next_deadline: Optional[float] = None
+        self._in_frame: bool = False
+        self._running: bool = False
+        
+        # Estadístiques de retard
+        self.frames: int = 0
+        self.deferred: int = 0
+        self.last_lateness: float = 0.0
+        self.max_lateness: float = 0.0
+        self._lateness_sum: float = 0.0
+        
+        self.root.bind('<Unmap>', self._on_visibility_changed, add='+')
+        self.root.bind('<Map>', self._on_visibility_changed, add='+')
+        self.root.bind('<FocusIn>', self._on_focus_changed, add='+')
+        self.root.bind('<FocusOut>', self._on_focus_changed, add='+')
+    
+    @property
+    def throttled(self) -> bool:
+        """Indica si la finestra està minimitzada o sense focus."""
+        return self.iconified or not self.focused
+    
+    def add_task(self, name: str, callback: Callable[[float], None], period: Optional[float] = None,
+                 priority: int = 5, deadline_fn: Optional[Callable[[float], Optional[float]]] = None,
+                 throttle: bool = True) -> ScheduledTask:
+        """Registra una tasca. `callback` rep l'instant `perf_counter` del frame."""
+        task = ScheduledTask(name, callback, period, priority, deadline_fn, throttle)
+        self.tasks[name] = task
+        self._reschedule()
+        return task
+    
+    def remove_task(self, name: str) -> None:
+        """Elimina una tasca."""
+        self.tasks.pop(name, None)
+    
+    def wake(self, name: str) -> None:
+        """Demana executar una tasca al pròxim frame."""
+        task = self.tasks.get(name)
+        if task and not task.woken:
+            task.woken = True
+            self._reschedule()
+    
+    def start(self) -> None:
+        """Inicia el planificador."""
+        self._running = True
+        self._reschedule()
+    
+    def stop(self) -> None:
+        """Atura el planificador."""
+        self._running = False
+        if self._job:
+            try:
+                self.root.after_cancel(self._job)
+            except tk.TclError:
+                pass
+            self._job = None
+    
+    def get_stats(self) -> Dict[str, float]:
+        """Retorna les estadístiques de retard dels ticks (en mil·lisegons)."""
+        return {
+            'frames': self.frames,
+            'deferred': self.deferred,
+            'last_ms': self.last_lateness * 1000,
+            'max_ms': self.max_lateness * 1000,
+            'mean_ms': (self._lateness_sum / self.frames * 1000) if self.frames else 0.0,
+        }
+    
+    def _effective_period(self, task: ScheduledTask) -> Optional[float]:
+        """Període de la tasca tenint en compte l'estat de la finestra."""
+        if task.period is None:
+            return None
+        if task.throttle and self.throttled:
+            return max(task.period, self.background_period)
+        return task.period
+    
+    def _task_deadline(self, task: ScheduledTask, now: float) -> float:
+        """Venciment de la tasca."""
+        if task.woken:
+            return now
+        deadline = task.next_run
+        if task.deadline_fn and not (task.throttle and self.iconified):
+            exact = task.deadline_fn(now)
+            if exact is not None and exact < deadline:
+                deadline = exact
+        return deadline
+    
+    def _reschedule(self) -> None:
+        """Programa el pròxim frame per al venciment més proper."""
+        if not self._running or self._in_frame:
+            return
+        now = time.perf_counter()
+        deadline = min((self._task_deadline(t, now) for t in self.tasks.values()), default=None)
+        if deadline is None:
+            return
+        if self._job:
+            if self._next_deadline is not None and self._next_deadline <= deadline:
+                return
+            self.root.after_cancel(self._job)
+        self._next_deadline = deadline
+        delay_ms = max(0, int(math.ceil((deadline - now) * 1000)))
+        self._job = self.root.after(delay_ms, self._run_frame)
+    
+    def _run_frame(self) -> None:
+        """Executa les tasques vençudes d'un frame."""
+        self._job = None
+        now = time.perf_counter()
+        self.now = now
+        
+        if self._next_deadline is not None:
+            lateness = max(0.0, now - self._next_deadline)
+            self.last_lateness = lateness
+            self.max_lateness = max(self.max_lateness, lateness)
+            self._lateness_sum += lateness
+            self.frames += 1
+        
+        due = []
+        for task in self.tasks.values():
+            deadline = self._task_deadline(task, now)
+            if deadline <= now + self.SLACK:
+                due.append((task.priority, deadline, task))
+        due.sort(key=lambda item: (item[0], item[1]))
+        
+        self._in_frame = True
+        try:
+            for priority, deadline, task in due:
+                if priority > 0 and time.perf_counter() - now > self.budget:
+                    # Fora de pressupost: la tasca queda vençuda per al pròxim frame
+                    self.deferred += 1
+                    continue
+                task.woken = False
+                task.last_lateness = max(0.0, now - deadline)
+                try:
+                    task.callback(now)
+                except Exception as e:
+                    print(f"Error a la tasca '{task.name}': {e}")
+                period = self._effective_period(task)
+                task.next_run = now + period if period is not None else math.inf
+        finally:
+            self._in_frame = False
+            self._next_deadline = None
+        self._reschedule()
+    
+    def _on_visibility_changed(self, event) -> None:
+        """Detecta si la finestra principal s'ha minimitzat."""
+        if event.widget is not self.root:
+            return
+        self.iconified = self.root.state() == 'iconic' or event.type == tk.EventType.Unmap
+        if not self.iconified:
+            self._wake_throttled()
+    
+    def _on_focus_changed(self, event) -> None:
+        """Detecta si l'aplicació té el focus."""
+        self.focused = self.root.focus_get() is not None if event.type == tk.EventType.FocusOut else True
+        if self.focused:
+            self._wake_throttled()
+    
+    def _wake_throttled(self) -> None:
+        """Refresca de seguida les tasques alentides en recuperar la finestra."""
+        for task in self.tasks.values():
+            if task.throttle:
+                task.woken = True
+        self._reschedule()
+
+
+class UiDispatcher:
+    """Cua thread-safe de callbacks per executar al fil de Tk.
+    
+    Els fils de treball hi publiquen amb `post()`; el planificador la buida una
+    vegada per frame amb `drain()`, que és l'únic punt on aquests callbacks
+    toquen la UI.
+    """
+    
+    def __init__(self, max_per_frame: int = 200):
+        self.max_per_frame = max_per_frame
+        self._queue: "queue.SimpleQueue" = queue.SimpleQueue()
+        # Avisa el fil de Tk perquè buidi la cua ja (sense esperar el període)
+        self.waker: Optional[Callable[[], None]] = None
+    
+    def post(self, callback: Callable, *args) -> None:
+        """Encua un callback (es pot cridar des de qualsevol fil)."""
+        self._queue.put((callback, args))
+    
+    def post_urgent(self, callback: Callable, *args) -> None:
+        """Encua un callback i demana buidar la cua al pròxim frame."""
+        self._queue.put((callback, args))
+        if self.waker is not None:
+            self.waker()
+    
+    def drain(self, now: Optional[float] = None) -> int:
+        """Executa els callbacks pendents. Retorna quants n'ha executat."""
+        count = 0
+        while count < self.max_per_frame:
+            try:
+                callback, args = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            try:
+                callback(*args)
+            except Exception as e:
+                print(f"Error executant callback de la UI: {e}")
+            count += 1
+        return count
+
+
+class RemoteControlServer:
+    """Servidor de control remot: TCP local, una ordre de text per línia.
+    
+    Corre un bucle asyncio en un fil propi. Cada ordre s'encua al fil de Tk a
+    través del UiDispatcher (l'únic punt de drenatge) i la resposta JSON
+    s'envia quan l'acció ja s'ha executat, amb la latència mesurada entre la
+    recepció de la línia i l'inici de l'acció.
+    """
+    
+    DEFAULT_PORT = 47800
+    TIMEOUT = 5.0
+    
+    def __init__(self, handler: Callable[[str, str], Dict[str, Any]], dispatcher: UiDispatcher,
+                 host: str = "127.0.0.1", port: int = DEFAULT_PORT):
+        self.handler = handler
+        self.dispatcher = dispatcher
+        self.host = host
+        self.port = port
+        self.clients: int = 0
+        self.commands: int = 0
+        self.last_latency: float = 0.0
+        self.max_latency: float = 0.0
+        self.error: Optional[str] = None
+        self._latency_sum: float = 0.0
+        self._loop = None
+        self._stop = None
+        self._thread: Optional[threading.Thread] = None
+    
+    def start(self) -> None:
+        """Arrenca el servidor en segon pla."""
+        self._thread = threading.Thread(target=self._run, name="remote-control", daemon=True)
+        self._thread.start()
+    
+    def _run(self) -> None:
+        """Fil del servidor (asyncio s'importa aquí, fora del camí d'arrencada)."""
+        import asyncio
+        
+        async def serve():
+            self._loop = asyncio.get_running_loop()
+            self._stop = asyncio.Event()
+            server = await asyncio.start_server(self._handle_client, self.host, self.port)
+            async with server:
+                await self._stop.wait()
+        
+        try:
+            asyncio.run(serve())
+        except OSError as e:
+            self.error = str(e)
+            print(f"Control remot no disponible a {self.host}:{self.port}: {e}")
+    
+    async def _handle_client(self, reader, writer) -> None:
+        """Atén una connexió: llegeix ordres i respon amb una línia JSON per ordre."""
+        import asyncio
+        self.clients += 1
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                received = time.perf_counter()
+                text = line.decode('utf-8', 'replace').strip()
+                if not text:
+                    continue
+                command, _, argument = text.partition(' ')
+                future = self._loop.create_future()
+                self.dispatcher.post_urgent(self._execute, command.lower(), argument.strip(), received, future)
+                try:
+                    reply = await asyncio.wait_for(future, self.TIMEOUT)
+                except asyncio.TimeoutError:
+                    reply = {'ok': False, 'error': "temps d'espera esgotat"}
+                writer.write((json.dumps(reply, ensure_ascii=False) + "\n").encode('utf-8'))
+                await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            self.clients -= 1
+            writer.close()
+    
+    def _execute(self, command: str, argument: str, received: float, future) -> None:
+        """Executa una ordre al fil de Tk i retorna la resposta al bucle asyncio."""
+        latency = time.perf_counter() - received
+        try:
+            reply = self.handler(command, argument)
+        except Exception as e:
+            reply = {'ok': False, 'error': str(e)}
+        self.commands += 1
+        self.last_latency = latency
+        self.max_latency = max(self.max_latency, latency)
+        self._latency_sum += latency
+        reply['latency_ms'] = round(latency * 1000, 3)
+        self._loop.call_soon_threadsafe(lambda: future.done() or future.set_result(reply))
+    
+    def get_stats(self) -> Dict[str, float]:
+        """Clients connectats i latència recepció-acció en mil·lisegons."""
+        mean = self._latency_sum / self.commands if self.commands else 0.0
+        return {
+            'clients': self.clients,
+            'commands': self.commands,
+            'last_ms': self.last_latency * 1000,
+            'mean_ms': mean * 1000,
+            'max_ms': self.max_latency * 1000,
+        }
+    
+    def stop(self) -> None:
+        """Atura el servidor."""
+        if self._loop is not None and self._stop is not None:
+            try:
+                self._loop.call_soon_threadsafe(self._stop.set)
+            except RuntimeError:
+                pass
+        if self._thread is not None:
+            self._thread.join(timeout=1.0)
+
+
+def send_remote_command(command: str, host: str = "127.0.0.1", port: int = RemoteControlServer.DEFAULT_PORT,
+                        repeat: int = 1, timeout: float = 5.0) -> List[Tuple[Dict[str, Any], float]]:
+    """Client de control remot: envia una ordre `repeat` vegades i retorna (resposta, anada i tornada)."""
+    results = []
+    with socket.create_connection((host, port), timeout=timeout) as connection:
+        connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        stream = connection.makefile('rwb')
+        for _ in range(repeat):
+            start = time.perf_counter()
+            stream.write((command + "\n").encode('utf-8'))
+            stream.flush()
+            line = stream.readline()
+            if not line:
+                raise ConnectionError("El servidor ha tancat la connexió")
+            results.append((json.loads(line), time.perf_counter() - start))
+    return results
+
+
+class StatePublisher:
+    """Difon l'estat del timer per UDP multicast a pantalles de rellotge d'estudi.
+    
+    Només s'envien els camps que han canviat, i cada `KEYFRAME_PERIOD` segons
+    un paquet complet per als clients que s'hi afegeixen tard. El rellotge en
+    marxa no s'envia a cada tick: el temps transcorregut (`e`) només viatja
+    quan canvia l'estat del cronòmetre i als paquets complets, i els clients
+    l'extrapolen amb el seu propi rellotge monòton.
+    """
+    
+    GROUP = "239.255.47.80"
+    PORT = 47801
+    KEYFRAME_PERIOD = 2.0
+    
+    def __init__(self, group: str = GROUP, port: int = PORT, ttl: int = 1):
+        self.address = (group, port)
+        self.packets: int = 0
+        self.bytes: int = 0
+        self._last: Dict[str, Any] = {}
+        self._sequence: int = 0
+        self._next_keyframe: float = 0.0
+        self._socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM, socket.IPPROTO_UDP)
+        self._socket.setsockopt(socket.IPPROTO_IP, socket.IP_MULTICAST_TTL, ttl)
+        self._socket.setsockopt(socket.IPPROTO_IP, socket.IP_MULTICAST_LOOP, 1)
+        self._socket.setblocking(False)
+    
+    def publish(self, state: Dict[str, Any], elapsed: float, clock_changed: bool, now: float) -> int:
+        """Envia els canvis (o un paquet complet si toca). Retorna els bytes enviats."""
+        keyframe = now >= self._next_keyframe
+        if keyframe:
+            payload = dict(state)
+            self._next_keyframe = now + self.KEYFRAME_PERIOD
+        else:
+            payload = {key: value for key, value in state.items() if self._last.get(key) != value}
+        if keyframe or clock_changed:
+            payload['e'] = round(elapsed, 3)
+        if not payload:
+            return 0
+        self._last = dict(state)
+        self._sequence += 1
+        payload['q'] = self._sequence
+        payload['k'] = int(keyframe)
+        data = json.dumps(payload, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+        try:
+            self._socket.sendto(data, self.address)
+        except OSError:
+            return 0  # Xarxa no disponible o buffer ple: el pròxim paquet complet ho arregla
+        self.packets += 1
+        self.bytes += len(data)
+        return len(data)
+    
+    def close(self) -> None:
+        """Tanca el socket."""
+        self._socket.close()
+
+
+class StateSubscriber:
+    """Client de StatePublisher: aplica els paquets i extrapola el rellotge localment."""
+    
+    def __init__(self, group: str = StatePublisher.GROUP, port: int = StatePublisher.PORT,
+                 interface: str = "0.0.0.0"):
+        self.state: Dict[str, Any] = {}
+        self.synced: bool = False
+        self.received: int = 0
+        self.lost: int = 0
+        self._last_sequence: Optional[int] = None
+        self._elapsed_ref: Tuple[float, float] = (0.0, time.perf_counter())
+        self._socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM, socket.IPPROTO_UDP)
+        self._socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        if hasattr(socket, 'SO_REUSEPORT'):
+            self._socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
+        self._socket.bind(('', port))
+        membership = struct.pack('4s4s', socket.inet_aton(group), socket.inet_aton(interface))
+        self._socket.setsockopt(socket.IPPROTO_IP, socket.IP_ADD_MEMBERSHIP, membership)
+        self._socket.setblocking(False)
+    
+    def fileno(self) -> int:
+        return self._socket.fileno()
+    
+    def poll(self, now: Optional[float] = None) -> int:
+        """Llegeix tots els paquets pendents sense bloquejar. Retorna quants n'ha aplicat."""
+        count = 0
+        while True:
+            try:
+                data = self._socket.recv(65536)
+            except (BlockingIOError, InterruptedError):
+                return count
+            except OSError:
+                return count
+            if self.handle(data, now):
+                count += 1
+    
+    def handle(self, data: bytes, now: Optional[float] = None) -> bool:
+        """Aplica un paquet. Fins al primer paquet complet, els canvis s'ignoren."""
+        try:
+            packet = json.loads(data)
+        except ValueError:
+            return False
+        if now is None:
+            now = time.perf_counter()
+        sequence = packet.pop('q', None)
+        keyframe = packet.pop('k', 0)
+        if sequence is not None and self._last_sequence is not None and sequence > self._last_sequence + 1:
+            self.lost += sequence - self._last_sequence - 1
+        if sequence is not None:
+            self._last_sequence = sequence
+        if not self.synced and not keyframe:
+            return False
+        self.synced = True
+        elapsed = packet.pop('e', None)
+        if elapsed is not None:
+            self._elapsed_ref = (elapsed, now)
+        self.state.update(packet)
+        self.received += 1
+        return True
+    
+    def elapsed(self, now: Optional[float] = None) -> float:
+        """Temps de la secció en curs, extrapolat si el cronòmetre corre."""
+        value, reference = self._elapsed_ref
+        if self.state.get('r'):
+            if now is None:
+                now = time.perf_counter()
+            value += now - reference
+        return value
+    
+    def view(self, now: Optional[float] = None) -> Dict[str, int]:
+        """Temps actual, total i restant (en segons) tal com els mostra update_display."""
+        current = int(self.elapsed(now))
+        total = self.state.get('t', 0) + current
+        return {'current': current, 'total': total, 'remaining': self.state.get('g', 0) - total}
+    
+    def close(self) -> None:
+        """Tanca el socket."""
+        self._socket.close()
+
+
+class MediaInfo:
+    """Metadades d'un fitxer d'àudio."""
+    
+    __slots__ = ('duration', 'sample_rate', 'channels', 'codec', 'peak')
+    
+    def __init__(self, duration: float = 0.0, sample_rate: Optional[int] = None,
+                 channels: Optional[int] = None, codec: Optional[str] = None,
+                 peak: Optional[float] = None):
+        self.duration = duration
+        self.sample_rate = sample_rate
+        self.channels = channels
+        self.codec = codec
+        self.peak = peak
+    
+    def __repr__(self) -> str:
+        return (f"MediaInfo(duration={self.duration:.3f}, sample_rate={self.sample_rate}, "
+                f"channels={self.channels}, codec={self.codec!r}, peak={self.peak})")
+
+
+class AudioHeaderProbe:
+    """Durada i format d'un fitxer llegint només capçaleres, sense descodificar.
+    
+    - WAV: chunks RIFF `fmt ` i `data`.
+    - OGG (Vorbis/Opus): capçalera d'identificació i granule position de
+      l'última pàgina.
+    - MP3: capçalera Xing/Info o VBRI; si no n'hi ha, recorre les capçaleres
+      de frame.
+    """
+    
+    MP3_BITRATES = {
+        # (versió MPEG 1?, capa): taula de kbps per índex
+        (True, 1): (0, 32, 64, 96, 128, 160, 192, 224, 256, 288, 320, 352, 384, 416, 448),
+        (True, 2): (0, 32, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320, 384),
+        (True, 3): (0, 32, 40, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320),
+        (False, 1): (0, 32, 48, 56, 64, 80, 96, 112, 128, 144, 160, 176, 192, 224, 256),
+        (False, 2): (0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160),
+        (False, 3): (0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160),
+    }
+    MP3_SAMPLE_RATES = {3: (44100, 48000, 32000), 2: (22050, 24000, 16000), 0: (11025, 12000, 8000)}
+    OGG_TAIL = 65536
+    SCAN_CHUNK = 262144
+    
+    @classmethod
+    def probe(cls, file_path: str) -> Optional[MediaInfo]:
+        """Retorna les metadades del fitxer o None si el format no és reconegut."""
+        extension = os.path.splitext(file_path)[1].lower()
+        try:
+            with open(file_path, 'rb') as f:
+                if extension == '.wav':
+                    return cls._probe_wav(f)
+                if extension == '.ogg':
+                    return cls._probe_ogg(f)
+                if extension == '.mp3':
+                    return cls._probe_mp3(f)
+        except (OSError, struct.error, ValueError) as e:
+            print(f"No s'ha pogut llegir la capçalera de {file_path}: {e}")
+        return None
+    
+    @staticmethod
+    def wav_layout(f) -> Optional[Dict[str, Any]]:
+        """Recorre els chunks RIFF fins a `data` i en retorna la disposició."""
+        header = f.read(12)
+        if len(header) < 12 or header[:4] != b'RIFF' or header[8:12] != b'WAVE':
+            return None
+        file_size = os.fstat(f.fileno()).st_size
+        layout: Dict[str, Any] = {}
+        while True:
+            chunk = f.read(8)
+            if len(chunk) < 8:
+                return None
+            chunk_id, chunk_size = chunk[:4], struct.unpack('<I', chunk[4:])[0]
+            if chunk_id == b'fmt ':
+                fmt = f.read(chunk_size + (chunk_size & 1))
+                audio_format, channels, sample_rate, byte_rate, block_align, bits = struct.unpack('<HHIIHH', fmt[:16])
+                if audio_format == 0xFFFE and len(fmt) >= 26:
+                    # WAVE_FORMAT_EXTENSIBLE: el format real és al subformat
+                    audio_format = struct.unpack('<H', fmt[24:26])[0]
+                layout = {
+                    'codec': {1: 'pcm', 3: 'float'}.get(audio_format, f"wav-{audio_format:#x}"),
+                    'channels': channels, 'sample_rate': sample_rate,
+                    'byte_rate': byte_rate, 'block_align': block_align, 'bits': bits,
+                }
+            elif chunk_id == b'data':
+                if not layout.get('byte_rate'):
+                    return None
+                data_size = chunk_size
+                remaining = file_size - f.tell()
+                if data_size in (0, 0xFFFFFFFF) or data_size > remaining:
+                    # Fitxer en streaming o truncat: s'usa la mida real
+                    data_size = remaining
+                layout['offset'] = f.tell()
+                layout['size'] = data_size
+                return layout
+            else:
+                f.seek(chunk_size + (chunk_size & 1), os.SEEK_CUR)
+    
+    @classmethod
+    def _probe_wav(cls, f) -> Optional[MediaInfo]:
+        """Durada i format d'un WAV a partir dels chunks RIFF."""
+        layout = cls.wav_layout(f)
+        if layout is None:
+            return None
+        return MediaInfo(layout['size'] / layout['byte_rate'], layout['sample_rate'],
+                         layout['channels'], layout['codec'])
+    
+    @classmethod
+    def _probe_ogg(cls, f) -> Optional[MediaInfo]:
+        """Capçalera d'identificació + granule position de l'última pàgina."""
+        page = f.read(27)
+        if len(page) < 27 or page[:4] != b'OggS':
+            return None
+        serial = page[14:18]
+        segments = f.read(page[26])
+        packet = f.read(sum(segments))
+        pre_skip = 0
+        if packet[:7] == b'\x01vorbis':
+            channels = packet[11]
+            sample_rate = struct.unpack('<I', packet[12:16])[0]
+            codec = 'vorbis'
+        elif packet[:8] == b'OpusHead':
+            channels = packet[9]
+            pre_skip = struct.unpack('<H', packet[10:12])[0]
+            sample_rate = 48000  # La granule position d'Opus sempre és a 48 kHz
+            codec = 'opus'
+        else:
+            return None
+        
+        file_size = os.fstat(f.fileno()).st_size
+        tail_size = cls.OGG_TAIL
+        while True:
+            start = max(0, file_size - tail_size)
+            f.seek(start)
+            tail = f.read(file_size - start)
+            position = tail.rfind(b'OggS')
+            while position >= 0:
+                if (position + 27 <= len(tail) and tail[position + 4] == 0 
+                        and tail[position + 14:position + 18] == serial):
+                    granule = struct.unpack('<q', tail[position + 6:position + 14])[0]
+                    if granule >= 0:
+                        duration = max(0, granule - pre_skip) / sample_rate if sample_rate else 0.0
+                        return MediaInfo(duration, sample_rate, channels, codec)
+                position = tail.rfind(b'OggS', 0, position)
+            if start == 0:
+                return MediaInfo(0.0, sample_rate, channels, codec)
+            tail_size *= 4
+    
+    @classmethod
+    def _parse_mp3_header(cls, header: bytes) -> Optional[Tuple[int, int, int, int, int]]:
+        """Retorna (mida del frame, mostres per frame, freqüència, canals, capa)."""
+        if len(header) < 4 or header[0] != 0xFF or (header[1] & 0xE0) != 0xE0:
+            return None
+        version = (header[1] >> 3) & 0x03   # 3 = MPEG1, 2 = MPEG2, 0 = MPEG2.5
+        layer = 4 - ((header[1] >> 1) & 0x03)
+        bitrate_index = header[2] >> 4
+        rate_index = (header[2] >> 2) & 0x03
+        if version == 1 or layer == 4 or bitrate_index in (0, 15) or rate_index == 3:
+            return None
+        mpeg1 = version == 3
+        bitrate = cls.MP3_BITRATES[(mpeg1, layer)][bitrate_index] * 1000
+        sample_rate = cls.MP3_SAMPLE_RATES[version][rate_index]
+        padding = (header[2] >> 1) & 0x01
+        channels = 1 if (header[3] >> 6) == 3 else 2
+        if layer == 1:
+            return (12 * bitrate // sample_rate + padding) * 4, 384, sample_rate, channels, layer
+        samples = 1152 if (layer == 2 or mpeg1) else 576
+        return samples // 8 * bitrate // sample_rate + padding, samples, sample_rate, channels, layer
+    
+    @classmethod
+    def _probe_mp3(cls, f) -> Optional[MediaInfo]:
+        """Xing/Info o VBRI al primer frame; si no, recompte de frames."""
+        header = f.read(10)
+        offset = 0
+        if header[:3] == b'ID3' and len(header) == 10:
+            size = (header[6] << 21) | (header[7] << 14) | (header[8] << 7) | header[9]
+            offset = 10 + size + (10 if header[5] & 0x10 else 0)
+        
+        # Cerca la primera capçalera de frame vàlida
+        f.seek(offset)
+        buffer = f.read(65536)
+        first = None
+        for position in range(len(buffer) - 4):
+            if buffer[position] == 0xFF:
+                first = cls._parse_mp3_header(buffer[position:position + 4])
+                if first:
+                    offset += position
+                    buffer = buffer[position:]
+                    break
+        if not first:
+            return None
+        frame_size, samples, sample_rate, channels, layer = first
+        codec = f"mp{layer}"
+        
+        # Capçalera Xing/Info (desplaçada per la side info) o VBRI (a 32 bytes)
+        mpeg1 = (buffer[1] >> 3) & 0x03 == 3
+        side_info = (32 if channels == 2 else 17) if mpeg1 else (17 if channels == 2 else 9)
+        xing = buffer[4 + side_info:4 + side_info + 12]
+        if xing[:4] in (b'Xing', b'Info') and struct.unpack('>I', xing[4:8])[0] & 0x01:
+            frames = struct.unpack('>I', xing[8:12])[0]
+            return MediaInfo(frames * samples / sample_rate, sample_rate, channels, codec)
+        vbri = buffer[36:54]
+        if vbri[:4] == b'VBRI':
+            frames = struct.unpack('>I', vbri[14:18])[0]
+            return MediaInfo(frames * samples / sample_rate, sample_rate, channels, codec)
+        
+        # Sense capçalera VBR: recorre les capçaleres de frame (sense descodificar)
+        frames = 0
+        position = offset
+        f.seek(position)
+        buffer = f.read(cls.SCAN_CHUNK)
+        buffer_start = position
+        while True:
+            relative = position - buffer_start
+            if relative + 4 > len(buffer):
+                f.seek(position)
+                buffer = f.read(cls.SCAN_CHUNK)
+                buffer_start = position
+                relative = 0
+                if len(buffer) < 4:
+                    break
+            parsed = cls._parse_mp3_header(buffer[relative:relative + 4])
+            if parsed:
+                frames += 1
+                position += parsed[0]
+            else:
+                # Dades no vàlides (p. ex. etiqueta ID3v1 final): busca la següent sincronia
+                next_sync = buffer.find(b'\xff', relative + 1)
+                if next_sync < 0:
+                    position = buffer_start + len(buffer)
+                    if len(buffer) < cls.SCAN_CHUNK:
+                        break
+                else:
+                    position = buffer_start + next_sync
+        return MediaInfo(frames * samples / sample_rate, sample_rate, channels, codec)
+
+
+class MediaMetadataCache:
+    """Memòria cau persistent (SQLite local) de metadades d'àudio.
+    
+    La clau és la ruta; la mida i el mtime guardats invaliden l'entrada si el
+    fitxer ha canviat. El nombre d'entrades està limitat i s'eliminen les
+    menys usades recentment. Es pot fer servir des de qualsevol fil.
+    """
+    
+    def __init__(self, db_path: Optional[str] = None, max_entries: int = 50000):
+        if db_path is None:
+            db_path = os.path.join(get_app_data_dir(), 'media_cache.sqlite')
+        self.db_path = db_path
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS media ("
+                " path TEXT PRIMARY KEY, size INTEGER NOT NULL, mtime REAL NOT NULL,"
+                " duration REAL, sample_rate INTEGER, channels INTEGER, codec TEXT,"
+                " peak REAL, last_used REAL NOT NULL)"
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS media_last_used ON media(last_used)")
+            self._conn.commit()
+            self._count = self._conn.execute("SELECT COUNT(*) FROM media").fetchone()[0]
+    
+    @staticmethod
+    def _row_to_info(row) -> MediaInfo:
+        """Converteix una fila (duration, sample_rate, channels, codec, peak)."""
+        return MediaInfo(row[0] or 0.0, row[1], row[2], row[3], row[4])
+    
+    def get(self, path: str, size: int, mtime: float) -> Optional[MediaInfo]:
+        """Retorna les metadades si l'entrada és vigent per aquesta mida i mtime."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT duration, sample_rate, channels, codec, peak, size, mtime FROM media WHERE path = ?",
+                (path,)
+            ).fetchone()
+            if row is None or row[5] != size or row[6] != mtime:
+                return None
+            self._conn.execute("UPDATE media SET last_used = ? WHERE path = ?", (time.time(), path))
+            self._conn.commit()
+        return self._row_to_info(row)
+    
+    def lookup(self, path: str) -> Optional[MediaInfo]:
+        """Comprova la vigència amb os.stat i retorna les metadades (fil de treball)."""
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return None
+        return self.get(path, stat.st_size, stat.st_mtime)
+    
+    def peek_many(self, paths: List[str]) -> Dict[str, MediaInfo]:
+        """Metadades guardades per a diverses rutes, sense comprovar el disc.
+        
+        Serveix per mostrar la llista a l'instant; la vigència es valida després
+        en segon pla.
+        """
+        found: Dict[str, MediaInfo] = {}
+        with self._lock:
+            for start in range(0, len(paths), 500):
+                chunk = paths[start:start + 500]
+                placeholders = ",".join("?" * len(chunk))
+                for row in self._conn.execute(
+                    "SELECT path, duration, sample_rate, channels, codec, peak FROM media "
+                    f"WHERE path IN ({placeholders})", chunk
+                ):
+                    found[row[0]] = self._row_to_info(row[1:])
+        return found
+    
+    def put(self, path: str, info: MediaInfo, size: Optional[int] = None,
+            mtime: Optional[float] = None) -> None:
+        """Desa o substitueix les metadades d'un fitxer."""
+        if size is None or mtime is None:
+            try:
+                stat = os.stat(path)
+            except OSError:
+                return
+            size, mtime = stat.st_size, stat.st_mtime
+        with self._lock:
+            existed = self._conn.execute("SELECT 1 FROM media WHERE path = ?", (path,)).fetchone()
+            self._conn.execute(
+                "INSERT OR REPLACE INTO media (path, size, mtime, duration, sample_rate, channels,"
+                " codec, peak, last_used) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (path, size, mtime, info.duration, info.sample_rate, info.channels,
+                 info.codec, info.peak, time.time())
+            )
+            if not existed:
+                self._count += 1
+            if self._count > self.max_entries:
+                self._evict()
+            self._conn.commit()
+    
+    def _evict(self) -> None:
+        """Elimina les entrades menys usades fins al 90% del límit (amb el lock agafat)."""
+        excess = self._count - int(self.max_entries * 0.9)
+        self._conn.execute(
+            "DELETE FROM media WHERE path IN "
+            "(SELECT path FROM media ORDER BY last_used ASC LIMIT ?)", (excess,)
+        )
+        self._count = self._conn.execute("SELECT COUNT(*) FROM media").fetchone()[0]
+    
+    def update_peak(self, path: str, peak: float) -> None:
+        """Desa el nivell de pic d'un fitxer ja present a la memòria cau."""
+        with self._lock:
+            self._conn.execute("UPDATE media SET peak = ? WHERE path = ?", (peak, path))
+            self._conn.commit()
+    
+    def close(self) -> None:
+        """Tanca la base de dades."""
+        with self._lock:
+            self._conn.close()
+
+
+_NETWORK_FILESYSTEMS = frozenset(('cifs', 'smb3', 'smbfs', 'nfs', 'nfs4', 'afpfs', 'fuse.sshfs', 'davfs'))
+_network_mounts: Optional[List[str]] = None
+_drive_types: Dict[str, bool] = {}
+
+
+def is_network_path(path: str) -> bool:
+    """Indica si un fitxer és en una unitat de xarxa (UNC, unitat mapejada o muntatge SMB/NFS)."""
+    global _network_mounts
+    if path.startswith(('\\\\', '//')):
+        return True
+    path = os.path.abspath(path)
+    if sys.platform == 'win32':
+        drive = os.path.splitdrive(path)[0].upper()
+        if drive not in _drive_types:
+            try:
+                import ctypes
+                _drive_types[drive] = ctypes.windll.kernel32.GetDriveTypeW(drive + '\\') == 4  # DRIVE_REMOTE
+            except (OSError, AttributeError):
+                _drive_types[drive] = False
+        return _drive_types[drive]
+    if _network_mounts is None:
+        _network_mounts = []
+        try:
+            with open('/proc/mounts', 'r') as f:
+                for line in f:
+                    fields = line.split()
+                    if len(fields) >= 3 and fields[2] in _NETWORK_FILESYSTEMS:
+                        _network_mounts.append(fields[1].replace('\\040', ' '))
+        except OSError:
+            pass
+    return any(path == mount or path.startswith(mount.rstrip('/') + '/') for mount in _network_mounts)
+
+
+class LocalMirrorCache:
+    """Còpia local (SSD) dels fitxers d'àudio de la unitat de xarxa.
+    
+    Els fitxers es copien en segon pla quan s'afegeixen a la llista. Abans de
+    reproduir, `resolve` retorna la còpia local si la mida i el mtime de
+    l'original coincideixen amb els de quan es va copiar; si no, l'original (i
+    es torna a copiar). Si la unitat no respon, es fa servir la còpia que hi
+    hagi. L'espai està limitat i s'eliminen les còpies menys usades.
+    """
+    
+    def __init__(self, cache_dir: Optional[str] = None, max_mb: int = 4096, mirror_all: bool = False):
+        self.cache_dir = cache_dir or os.path.join(get_app_data_dir(), 'mirror')
+        os.makedirs(self.cache_dir, exist_ok=True)
+        self.max_bytes = max_mb * 1024 * 1024
+        self.mirror_all = mirror_all
+        self.hits: int = 0
+        self.misses: int = 0
+        self.copies: int = 0
+        self.errors: int = 0
+        self.in_use: Optional[str] = None  # Còpia oberta pel reproductor (no s'esborra)
+        self._pending: set = set()
+        self._closed: bool = False
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="mirror-copy")
+        self._conn = sqlite3.connect(os.path.join(self.cache_dir, 'mirror.sqlite'), check_same_thread=False)
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS mirror ("
+                " path TEXT PRIMARY KEY, local TEXT NOT NULL, size INTEGER NOT NULL,"
+                " mtime REAL NOT NULL, last_used REAL NOT NULL)"
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS mirror_last_used ON mirror(last_used)")
+            self._conn.commit()
+            self.used, self.count = self._conn.execute("SELECT COALESCE(SUM(size), 0), COUNT(*) FROM mirror").fetchone()
+    
+    def should_mirror(self, path: str) -> bool:
+        """Només es copien els fitxers de xarxa (o tots, amb `mirror_all`)."""
+        return self.mirror_all or is_network_path(path)
+    
+    def _local_name(self, path: str) -> str:
+        """Nom estable de la còpia local."""
+        digest = hashlib.sha1(os.path.normcase(os.path.abspath(path)).encode('utf-8')).hexdigest()
+        return os.path.join(self.cache_dir, digest + os.path.splitext(path)[1].lower())
+    
+    def request(self, paths: Iterable[str]) -> int:
+        """Encua la còpia en segon pla dels fitxers que no en tenen. Retorna quants."""
+        queued = 0
+        with self._lock:
+            for path in paths:
+                if self._closed or path in self._pending or not self.should_mirror(path):
+                    continue
+                self._pending.add(path)
+                self._executor.submit(self._copy, path)
+                queued += 1
+        return queued
+    
+    def _copy(self, path: str) -> None:
+        """Copia un fitxer si no hi ha còpia vigent (fil de treball)."""
+        try:
+            stat = os.stat(path)
+            with self._lock:
+                if self._closed:
+                    return
+                row = self._conn.execute("SELECT size, mtime FROM mirror WHERE path = ?", (path,)).fetchone()
+            if row is not None and row[0] == stat.st_size and row[1] == stat.st_mtime:
+                return
+            local = self._local_name(path)
+            partial = local + '.part'
+            shutil.copyfile(path, partial)
+            after = os.stat(path)
+            if after.st_size != stat.st_size or after.st_mtime != stat.st_mtime:
+                os.remove(partial)  # L'original ha canviat durant la còpia
+                return
+            os.replace(partial, local)
+            with self._lock:
+                if self._closed:
+                    return
+                if row is not None:
+                    self.used -= row[0]
+                    self.count -= 1
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO mirror (path, local, size, mtime, last_used) VALUES (?, ?, ?, ?, ?)",
+                    (path, local, stat.st_size, stat.st_mtime, time.time())
+                )
+                self.used += stat.st_size
+                self.count += 1
+                self.copies += 1
+                self._evict(keep=local)
+                self._conn.commit()
+        except OSError as e:
+            self.errors += 1
+            print(f"No s'ha pogut copiar {path} al mirall local: {e}")
+        finally:
+            with self._lock:
+                self._pending.discard(path)
+    
+    def _evict(self, keep: str) -> None:
+        """Esborra les còpies menys usades fins a complir el límit (amb el lock agafat)."""
+        if self.used <= self.max_bytes:
+            return
+        for path, local, size in self._conn.execute(
+            "SELECT path, local, size FROM mirror ORDER BY last_used ASC"
+        ).fetchall():
+            if self.used <= self.max_bytes:
+                break
+            if local in (keep, self.in_use):
+                continue
+            try:
+                os.remove(local)
+            except FileNotFoundError:
+                pass
+            except OSError:
+                continue  # Encara obert (Windows): ja s'esborrarà més endavant
+            self._conn.execute("DELETE FROM mirror WHERE path = ?", (path,))
+            self.used -= size
+            self.count -= 1
+    
+    def resolve(self, path: str) -> str:
+        """Ruta des d'on reproduir: la còpia local si és vigent, si no l'original."""
+        if not self.should_mirror(path):
+            return path
+        with self._lock:
+            if self._closed:
+                return path
+            row = self._conn.execute("SELECT local, size, mtime FROM mirror WHERE path = ?", (path,)).fetchone()
+        if row is None:
+            self.misses += 1
+            self.request((path,))
+            return path
+        local, size, mtime = row
+        try:
+            stat = os.stat(path)
+            fresh = stat.st_size == size and stat.st_mtime == mtime
+        except OSError:
+            fresh = True  # Unitat no disponible: millor la còpia que res
+        if not fresh or not os.path.exists(local):
+            self.misses += 1
+            self.request((path,))
+            return path
+        self.hits += 1
+        with self._lock:
+            if not self._closed:
+                self._conn.execute("UPDATE mirror SET last_used = ? WHERE path = ?", (time.time(), path))
+                self._conn.commit()
+        return local
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Encerts, errors i ocupació del mirall."""
+        with self._lock:
+            pending = len(self._pending)
+        return {'hits': self.hits, 'misses': self.misses, 'copies': self.copies, 'errors': self.errors,
+                'pending': pending, 'files': self.count, 'used_mb': self.used / 1048576,
+                'max_mb': self.max_bytes / 1048576}
+    
+    def shutdown(self) -> None:
+        """Atura les còpies pendents i tanca l'índex."""
+        with self._lock:
+            self._closed = True
+            self._conn.close()
+        self._executor.shutdown(wait=False)
+
+
+def compute_waveform_peaks(file_path: str, out_path: str, levels: Tuple[int, ...]) -> Optional[float]:
+    """Descodifica un fitxer una vegada i desa els pics min/max (procés de treball).
+    
+    Els WAV es llegeixen amb un memmap de NumPy; la resta de formats es
+    descodifiquen amb pygame (sense dispositiu d'àudio). Retorna el pic absolut
+    (0..1) o None si el format no es pot descodificar.
+    """
+    import numpy as np
+    
+    samples = None
+    if file_path.lower().endswith('.wav'):
+        with open(file_path, 'rb') as f:
+            layout = AudioHeaderProbe.wav_layout(f)
+        if layout and layout['codec'] in ('pcm', 'float') and layout['channels']:
+            channels, bits = layout['channels'], layout['bits']
+            frames = layout['size'] // layout['block_align']
+            if frames <= 0:
+                return None
+            if bits == 24:
+                raw = np.memmap(file_path, dtype=np.uint8, mode='r', offset=layout['offset'],
+                                shape=(frames, layout['block_align']))
+                samples = (raw, 'int24', channels)
+            else:
+                dtype = {8: np.uint8, 16: '<i2', 32: '<f4' if layout['codec'] == 'float' else '<i4',
+                         64: '<f8'}.get(bits)
+                if dtype is None:
+                    return None
+                samples = (np.memmap(file_path, dtype=dtype, mode='r', offset=layout['offset'],
+                                     shape=(frames, channels)), bits, channels)
+    if samples is None:
+        if importlib.util.find_spec('pygame') is None:
+            return None
+        os.environ.setdefault('SDL_AUDIODRIVER', 'dummy')
+        import pygame as pygame_module
+        if not pygame_module.mixer.get_init():
+            pygame_module.mixer.init()
+        decoded = pygame_module.sndarray.array(pygame_module.mixer.Sound(file_path))
+        if decoded.ndim == 1:
+            decoded = decoded[:, None]
+        samples = (decoded, decoded.dtype.itemsize * 8, decoded.shape[1])
+    
+    data, kind, channels = samples
+    total = data.shape[0]
+    base_bins = max(levels)
+    # Límits de cada bin: es reparteixen totes les mostres, sense bins buits al final
+    edges = np.arange(base_bins + 1, dtype=np.int64) * total // base_bins
+    mins = np.zeros(base_bins, dtype=np.float32)
+    maxs = np.zeros(base_bins, dtype=np.float32)
+    
+    def normalise(block):
+        """Converteix un bloc de mostres a float32 en [-1, 1]."""
+        if kind == 'int24':
+            block = block[:, :channels * 3].reshape(-1, channels, 3).astype(np.int32)
+            block = (block[:, :, 0] | (block[:, :, 1] << 8) | (block[:, :, 2] << 16))
+            block = np.where(block >= 1 << 23, block - (1 << 24), block) / float(1 << 23)
+        elif block.dtype == np.uint8:
+            block = (block.astype(np.float32) - 128.0) / 128.0
+        elif block.dtype.kind == 'i':
+            block = block.astype(np.float32) / float(np.iinfo(block.dtype).max)
+        block = np.asarray(block, dtype=np.float32)
+        return block if block.ndim == 2 else block[:, None]
+    
+    # Es processa per blocs de molts bins alhora per limitar la memòria
+    bins_per_block = 256
+    for first_bin in range(0, base_bins, bins_per_block):
+        last_bin = min(first_bin + bins_per_block, base_bins)
+        start, end = edges[first_bin], edges[last_bin]
+        if end <= start:
+            continue
+        block = normalise(np.asarray(data[start:end]))
+        starts = edges[first_bin:last_bin] - start
+        # Bins sense mostres (fitxers molt curts) es queden a zero
+        valid = starts < np.append(starts[1:], end - start)
+        indices = starts[valid]
+        mins[first_bin:last_bin][valid] = np.minimum.reduceat(block.min(axis=1), indices)
+        maxs[first_bin:last_bin][valid] = np.maximum.reduceat(block.max(axis=1), indices)
+    
+    peak = float(max(abs(mins.min()), abs(maxs.max()))) if base_bins else 0.0
+    header = [b'RPK1', struct.pack('<H', len(levels))]
+    payload = []
+    for bins in sorted(levels, reverse=True):
+        factor = base_bins // bins
+        level_mins = mins[:bins * factor].reshape(bins, factor).min(axis=1)
+        level_maxs = maxs[:bins * factor].reshape(bins, factor).max(axis=1)
+        header.append(struct.pack('<I', bins))
+        payload.append(np.clip(np.round(level_mins * 127), -127, 127).astype(np.int8).tobytes())
+        payload.append(np.clip(np.round(level_maxs * 127), -127, 127).astype(np.int8).tobytes())
+    tmp_path = out_path + '.tmp'
+    with open(tmp_path, 'wb') as f:
+        f.write(b''.join(header + payload))
+    os.replace(tmp_path, out_path)
+    return peak
+
+
+class WaveformPeaks:
+    """Parells min/max (-127..127) d'un fitxer a diversos nivells de zoom."""
+    
+    __slots__ = ('levels',)
+    
+    def __init__(self, levels: Dict[int, Tuple[array, array]]):
+        self.levels = levels
+    
+    def for_width(self, width: int) -> Tuple[array, array]:
+        """Nivell amb el nombre de bins més petit que cobreix `width` píxels."""
+        candidates = sorted(self.levels)
+        for bins in candidates:
+            if bins >= width:
+                return self.levels[bins]
+        return self.levels[candidates[-1]]
+    
+    @classmethod
+    def read(cls, path: str) -> Optional['WaveformPeaks']:
+        """Llegeix un fitxer de pics generat per compute_waveform_peaks."""
+        with open(path, 'rb') as f:
+            data = f.read()
+        if data[:4] != b'RPK1':
+            return None
+        count = struct.unpack('<H', data[4:6])[0]
+        sizes = struct.unpack(f'<{count}I', data[6:6 + 4 * count])
+        offset = 6 + 4 * count
+        levels = {}
+        for bins in sizes:
+            mins = array('b', data[offset:offset + bins])
+            maxs = array('b', data[offset + bins:offset + 2 * bins])
+            offset += 2 * bins
+            levels[bins] = (mins, maxs)
+        return cls(levels)
+
+
+class WaveformStore:
+    """Memòria cau de pics de forma d'ona, calculats en un procés a part.
+    
+    Els fitxers de pics es desen al costat de la memòria cau de metadades,
+    amb nom derivat de la ruta, la mida i el mtime.
+    """
+    
+    LEVELS = (2048, 512, 128)
+    
+    def __init__(self, metadata_cache: Optional[MediaMetadataCache] = None,
+                 dispatcher: Optional[UiDispatcher] = None):
+        self.directory = os.path.join(get_app_data_dir(), 'peaks')
+        os.makedirs(self.directory, exist_ok=True)
+        self.metadata_cache = metadata_cache
+        self.dispatcher = dispatcher
+        self.available = importlib.util.find_spec('numpy') is not None
+        self._io_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="waveform")
+        self._process_pool: Optional[ProcessPoolExecutor] = None
+        self._generation = 0
+    
+    def _peaks_path(self, file_path: str, stat: os.stat_result) -> str:
+        """Ruta del fitxer de pics per a aquesta versió del fitxer d'àudio."""
+        key = f"{os.path.abspath(file_path)}|{stat.st_size}|{stat.st_mtime}".encode('utf-8')
+        return os.path.join(self.directory, hashlib.sha1(key).hexdigest() + '.peaks')
+    
+    def request(self, file_path: str, callback: Callable[[str, Optional[WaveformPeaks]], None]) -> None:
+        """Demana els pics d'un fitxer; `callback(path, peaks)` arriba al fil de Tk."""
+        self._generation += 1
+        self._io_executor.submit(self._load, self._generation, file_path, callback)
+    
+    def _load(self, generation: int, file_path: str, callback) -> None:
+        """Llegeix els pics de la memòria cau o els fa calcular (fil de treball)."""
+        if generation != self._generation:
+            return
+        peaks = None
+        try:
+            stat = os.stat(file_path)
+            peaks_path = self._peaks_path(file_path, stat)
+            if not os.path.exists(peaks_path) and self.available:
+                if self._process_pool is None:
+                    self._process_pool = ProcessPoolExecutor(max_workers=1)
+                peak = self._process_pool.submit(
+                    compute_waveform_peaks, file_path, peaks_path, self.LEVELS
+                ).result()
+                if peak is not None and self.metadata_cache:
+                    self.metadata_cache.update_peak(file_path, peak)
+            if os.path.exists(peaks_path):
+                peaks = WaveformPeaks.read(peaks_path)
+        except Exception as e:
+            print(f"No s'ha pogut obtenir la forma d'ona de {file_path}: {e}")
+        if generation != self._generation:
+            return
+        if self.dispatcher is not None:
+            self.dispatcher.post(callback, file_path, peaks)
+        else:
+            callback(file_path, peaks)
+    
+    def shutdown(self) -> None:
+        """Atura els fils i el procés de càlcul."""
+        self._generation += 1
+        self._io_executor.shutdown(wait=False)
+        if self._process_pool is not None:
+            self._process_pool.shutdown(wait=False)
+
+
+class WaveformView(tk.Canvas):
+    """Barra de progrés amb la forma d'ona del fitxer dibuixada a partir dels pics.
+    
+    Només dibuixa pics ja calculats: mai descodifica àudio. En canviar el
+    progrés només es recolorejen les barres que han canviat d'estat.
+    """
+    
+    PLAYED = '#2f6fd6'
+    UNPLAYED = '#b8c2cc'
+    
+    def __init__(self, parent, height: int = 40, **kwargs):
+        super().__init__(parent, height=height, bg='#eef1f4', highlightthickness=0, **kwargs)
+        self.peaks: Optional[WaveformPeaks] = None
+        self._bars: List[int] = []
+        self._played = 0
+        self._progress = 0.0
+        self._fill = self.create_rectangle(0, 0, 0, height, fill=self.PLAYED, width=0)
+        self._cursor = self.create_line(0, 0, 0, height, fill='#1b3f7a', width=2)
+        self.bind('<Configure>', lambda event: self.redraw())
+    
+    def set_peaks(self, peaks: Optional[WaveformPeaks]) -> None:
+        """Estableix (o treu) els pics i redibuixa."""
+        self.peaks = peaks
+        self.redraw()
+    
+    def redraw(self) -> None:
+        """Redibuixa totes les barres (només en canviar de fitxer o de mida)."""
+        for bar in self._bars:
+            self.delete(bar)
+        self._bars = []
+        self._played = 0
+        width, height = self.winfo_width(), self.winfo_height()
+        if self.peaks is not None and width > 1:
+            mins, maxs = self.peaks.for_width(width)
+            bins = len(mins)
+            middle = height / 2
+            scale = (height / 2 - 1) / 127.0
+            for x in range(width):
+                index = x * bins // width
+                top = middle - maxs[index] * scale
+                bottom = middle - mins[index] * scale
+                self._bars.append(self.create_line(x, top, x, bottom + 1, fill=self.UNPLAYED))
+            self.itemconfigure(self._fill, state='hidden')
+        else:
+            self.itemconfigure(self._fill, state='normal')
+        self.tag_raise(self._cursor)
+        self.set_progress(self._progress, force=True)
+    
+    def set_progress(self, percent: float, force: bool = False) -> None:
+        """Mostra el progrés (0-100)."""
+        if percent == self._progress and not force:
+            return
+        self._progress = percent
+        width, height = self.winfo_width(), self.winfo_height()
+        x = int(width * max(0.0, min(percent, 100.0)) / 100.0)
+        self.coords(self._fill, 0, 0, x, height)
+        self.coords(self._cursor, x, 0, x, height)
+        played = min(x, len(self._bars))
+        if played > self._played:
+            for bar in self._bars[self._played:played]:
+                self.itemconfigure(bar, fill=self.PLAYED)
+        elif played < self._played:
+            for bar in self._bars[played:self._played]:
+                self.itemconfigure(bar, fill=self.UNPLAYED)
+        self._played = played
+
+
+class VirtualListView(tk.Canvas):
+    """Llista virtualitzada: només dibuixa les files visibles d'un model.
+    
+    El model és qualsevol seqüència (p. ex. AudioLibrary) i `label_fn` en fa el
+    text de cada fila en el moment de dibuixar-la, així que no es guarda cap
+    text. Els canvis s'anuncien amb `rows_inserted`, `rows_removed` i
+    `row_changed`, i el redibuix (O(files visibles)) s'agrupa en un sol
+    after_idle. Ofereix el subconjunt de l'API de tk.Listbox que fa servir
+    l'aplicació: curselection, selection_set/clear, activate, nearest, size,
+    see, yview i l'opció yscrollcommand. Emet <<ListboxSelect>>.
+    """
+    
+    SELECTED_BG = '#2f6fd6'
+    
+    def __init__(self, parent, rows, label_fn: Callable[[Any], str], font=('Arial', 10), **kwargs):
+        super().__init__(parent, bg='white', highlightthickness=1, takefocus=1, **kwargs)
+        self.rows = rows
+        self.label_fn = label_fn
+        self.font = font
+        self.row_height = tkfont.Font(font=font).metrics('linespace') + 3
+        self._top: int = 0                   # Primera fila visible
+        self._selected: Optional[int] = None
+        self._yscrollcommand: Optional[Callable] = None
+        self._pool: List[Tuple[int, int]] = []  # (rectangle, text) reutilitzats
+        self._redraw_job = None
+        self.rendered_rows: int = 0          # Files dibuixades a l'últim redibuix
+        
+        self.bind('<Configure>', lambda event: self.redraw())
+        self.bind('<Button-1>', self._on_click)
+        self.bind('<MouseWheel>', lambda event: self.yview_scroll(-1 if event.delta > 0 else 1, 'units'))
+        self.bind('<Button-4>', lambda event: self.yview_scroll(-1, 'units'))
+        self.bind('<Button-5>', lambda event: self.yview_scroll(1, 'units'))
+        for key, step in (('<Up>', -1), ('<Down>', 1), ('<Prior>', -10), ('<Next>', 10)):
+            self.bind(key, lambda event, s=step: self._move_selection(s))
+        self.bind('<Home>', lambda event: self._select_and_see(0))
+        self.bind('<End>', lambda event: self._select_and_see(len(self.rows) - 1))
+    
+    # API compatible amb tk.Listbox
+    def configure(self, cnf=None, **kw):
+        if 'yscrollcommand' in kw:
+            self._yscrollcommand = kw.pop('yscrollcommand')
+            self.redraw()
+            if not kw and not cnf:
+                return None
+        return super().configure(cnf, **kw)
+    
+    config = configure
+    
+    def size(self) -> int:
+        return len(self.rows)
+    
+    def curselection(self) -> Tuple[int, ...]:
+        return () if self._selected is None else (self._selected,)
+    
+    def selection_set(self, index: int, last=None) -> None:
+        if 0 <= index < len(self.rows) and index != self._selected:
+            self._selected = index
+            self.redraw()
+    
+    def selection_clear(self, first=0, last=None) -> None:
+        if self._selected is not None:
+            self._selected = None
+            self.redraw()
+    
+    def activate(self, index: int) -> None:
+        """Sense cursor de teclat propi: l'element actiu és el seleccionat."""
+    
+    def nearest(self, y: int) -> int:
+        """Fila a la coordenada y (com Listbox.nearest)."""
+        if not len(self.rows):
+            return -1
+        return max(0, min(len(self.rows) - 1, self._top + int(y // self.row_height)))
+    
+    def see(self, index: int) -> None:
+        visible = self._visible_rows()
+        if index < self._top:
+            self._scroll_to(index)
+        elif index >= self._top + visible:
+            self._scroll_to(index - visible + 1)
+    
+    def yview(self, *args):
+        """Protocol de la barra de desplaçament."""
+        count = len(self.rows)
+        if not args:
+            if not count:
+                return (0.0, 1.0)
+            return (self._top / count, min(1.0, (self._top + self._visible_rows()) / count))
+        if args[0] == 'moveto':
+            self._scroll_to(int(float(args[1]) * len(self.rows)))
+        elif args[0] == 'scroll':
+            self.yview_scroll(int(args[1]), args[2])
+        return None
+    
+    def yview_scroll(self, number: int, what: str) -> None:
+        step = self._visible_rows() if what == 'pages' else 1
+        self._scroll_to(self._top + number * step)
+    
+    # Canvis del model
+    def rows_inserted(self, index: int, count: int = 1) -> None:
+        """S'han inserit `count` files a `index` (el final, en afegir)."""
+        if self._selected is not None and self._selected >= index:
+            self._selected += count
+        if index < self._top + self._visible_rows():
+            self.redraw()
+        else:
+            self._update_scrollbar()  # Fora de la vista: només canvia la barra
+    
+    def rows_removed(self, index: int, count: int = 1) -> None:
+        """S'han tret `count` files a partir de `index`."""
+        if self._selected is not None:
+            if index <= self._selected < index + count:
+                self._selected = None
+            elif self._selected >= index + count:
+                self._selected -= count
+        self._top = max(0, min(self._top, len(self.rows) - self._visible_rows()))
+        self.redraw()
+    
+    def row_changed(self, index: int) -> None:
+        """El text d'una fila ha canviat: només es redibuixa si és visible."""
+        if self._top <= index < self._top + self._visible_rows():
+            self.redraw()
+    
+    def reset(self) -> None:
+        """El model ha canviat del tot."""
+        self._selected = None
+        self._top = 0
+        self.redraw()
+    
+    def set_rows(self, rows) -> None:
+        """Canvia el model (p. ex. pels resultats d'una cerca) i torna a dalt."""
+        self.rows = rows
+        self.reset()
+    
+    # Dibuix
+    def _visible_rows(self) -> int:
+        return max(1, self.winfo_height() // self.row_height)
+    
+    def _scroll_to(self, top: int) -> None:
+        top = max(0, min(top, len(self.rows) - self._visible_rows()))
+        if top != self._top:
+            self._top = top
+            self.redraw()
+    
+    def redraw(self) -> None:
+        """Demana un redibuix (s'agrupen en un sol after_idle)."""
+        if self._redraw_job is None:
+            self._redraw_job = self.after_idle(self._render)
+    
+    def _render(self) -> None:
+        """Dibuixa només les files visibles reutilitzant els mateixos ítems del canvas."""
+        self._redraw_job = None
+        width = self.winfo_width()
+        slots = self.winfo_height() // self.row_height + 1
+        while len(self._pool) < slots:
+            self._pool.append((self.create_rectangle(0, 0, 0, 0, width=0, state='hidden'),
+                               self.create_text(0, 0, anchor=tk.NW, font=self.font, state='hidden')))
+        count = len(self.rows)
+        drawn = 0
+        for slot, (rectangle, text) in enumerate(self._pool):
+            row = self._top + slot
+            if slot >= slots or row >= count:
+                self.itemconfigure(rectangle, state='hidden')
+                self.itemconfigure(text, state='hidden')
+                continue
+            y = slot * self.row_height
+            selected = row == self._selected
+            self.coords(rectangle, 0, y, width, y + self.row_height)
+            self.itemconfigure(rectangle, state='normal' if selected else 'hidden', fill=self.SELECTED_BG)
+            self.coords(text, 3, y + 1)
+            self.itemconfigure(text, state='normal', text=self.label_fn(self.rows[row]),
+                               fill='white' if selected else 'black')
+            drawn += 1
+        self.rendered_rows = drawn
+        self._update_scrollbar()
+    
+    def _update_scrollbar(self) -> None:
+        if self._yscrollcommand is not None:
+            self._yscrollcommand(*self.yview())
+    
+    # Interacció
+    def _on_click(self, event) -> None:
+        self.focus_set()
+        index = self.nearest(event.y)
+        if index >= 0 and event.y < (len(self.rows) - self._top) * self.row_height:
+            self._select(index)
+    
+    def _select(self, index: int) -> None:
+        if index != self._selected:
+            self.selection_set(index)
+            self.event_generate('<<ListboxSelect>>')
+    
+    def _select_and_see(self, index: int) -> None:
+        if 0 <= index < len(self.rows):
+            self._select(index)
+            self.see(index)
+    
+    def _move_selection(self, step: int) -> None:
+        if len(self.rows):
+            current = self._selected if self._selected is not None else self._top - (1 if step > 0 else 0)
+            self._select_and_see(max(0, min(len(self.rows) - 1, current + step)))
+
+
+class SoundBank:
+    """Sons descodificats a memòria (pygame.mixer.Sound) per disparar-los sense latència.
+    
+    La descodificació es fa en un fil de treball. La memòria total està limitada
+    per un pressupost: quan se supera, s'alliberen els sons menys usats
+    recentment que no estiguin sonant.
+    """
+    
+    def __init__(self, budget_mb: int = 256, buffer: int = 256):
+        self.budget = budget_mb * 1024 * 1024
+        self.buffer = buffer
+        self.used: int = 0
+        self.buffer_latency: float = 0.0
+        self.dispatcher: Optional[UiDispatcher] = None
+        self.mirror: Optional[LocalMirrorCache] = None
+        self._sounds: "OrderedDict[str, Tuple[Any, int]]" = OrderedDict()
+        self._pending: Dict[str, Future] = {}
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="sound-bank")
+    
+    def ensure_mixer(self) -> bool:
+        """Inicialitza el mixer de pygame (buffer curt) si encara no ho està."""
+        if not PYGAME_AVAILABLE:
+            return False
+        try:
+            buffer = 512  # El que fa servir AudioPlayer quan pygame és el backend principal
+            if not pygame.mixer.get_init():
+                pygame.mixer.pre_init(frequency=44100, size=-16, channels=2, buffer=self.buffer)
+                pygame.mixer.init()
+                buffer = self.buffer
+            self.buffer_latency = buffer / pygame.mixer.get_init()[0]
+            return True
+        except Exception as e:
+            print(f"Error inicialitzant el mixer per als carts: {e}")
+            return False
+    
+    def preload(self, path: str, callback: Optional[Callable[[str, bool], None]] = None) -> None:
+        """Descodifica un fitxer en segon pla; `callback(path, ok)` arriba al fil de Tk."""
+        with self._lock:
+            if path in self._sounds:
+                self._sounds.move_to_end(path)
+                loaded = True
+            else:
+                loaded = False
+                future = self._pending.get(path)
+                if future is None:
+                    future = self._executor.submit(self._decode, path)
+                    self._pending[path] = future
+        if callback is None:
+            return
+        if loaded:
+            self._post(callback, path, True)
+        else:
+            future.add_done_callback(lambda done: self._post(callback, path, bool(done.result())))
+    
+    def _decode(self, path: str) -> bool:
+        """Descodifica un fitxer a memòria (fil de treball)."""
+        try:
+            if not self.ensure_mixer():
+                return False
+            sound = pygame.mixer.Sound(self.mirror.resolve(path) if self.mirror else path)
+            frequency, size, channels = pygame.mixer.get_init()
+            nbytes = int(sound.get_length() * frequency * channels * abs(size) // 8)
+        except Exception as e:
+            print(f"Error precarregant {path}: {e}")
+            return False
+        finally:
+            with self._lock:
+                self._pending.pop(path, None)
+        with self._lock:
+            self._sounds[path] = (sound, nbytes)
+            self.used += nbytes
+            self._evict(keep=path)
+        return True
+    
+    def _evict(self, keep: str) -> None:
+        """Allibera sons LRU fins a complir el pressupost (amb el lock agafat)."""
+        for path in list(self._sounds):
+            if self.used <= self.budget:
+                break
+            sound, nbytes = self._sounds[path]
+            if path == keep or sound.get_num_channels() > 0:
+                continue
+            del self._sounds[path]
+            self.used -= nbytes
+    
+    def get(self, path: str) -> Optional[Any]:
+        """Retorna el so precarregat (i el marca com a usat recentment)."""
+        with self._lock:
+            entry = self._sounds.get(path)
+            if entry is None:
+                return None
+            self._sounds.move_to_end(path)
+            return entry[0]
+    
+    def discard(self, path: str) -> None:
+        """Allibera un so precarregat."""
+        with self._lock:
+            entry = self._sounds.pop(path, None)
+            if entry is not None:
+                self.used -= entry[1]
+    
+    def _post(self, callback: Callable, *args) -> None:
+        """Envia un callback al fil de Tk (o l'executa directament sense UI)."""
+        if self.dispatcher is not None:
+            self.dispatcher.post(callback, *args)
+        else:
+            callback(*args)
+    
+    def shutdown(self) -> None:
+        """Atura el fil de descodificació."""
+        self._executor.shutdown(wait=False)
+
+
+class AudioLibrary:
+    """Llista ordenada de fitxers d'àudio amb cerca per ruta en O(1).
+    
+    Es comporta com una llista de rutes (len, iteració, índexs) sense
+    duplicats. Les posicions es guarden en un dict que s'invalida només a
+    partir de l'element tocat i es refà de manera mandrosa, com fa
+    PrecisionTimer amb les seccions.
+    """
+    
+    def __init__(self, paths: Iterable[str] = ()):
+        self._items: List[str] = []
+        self._positions: Dict[str, int] = {}
+        self._positions_valid: int = 0  # _positions és correcte per a _items[:_positions_valid]
+        self.version: int = 0
+        self.extend(paths)
+    
+    def __len__(self) -> int:
+        return len(self._items)
+    
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._items)
+    
+    def __getitem__(self, index):
+        return self._items[index]
+    
+    def __contains__(self, path: str) -> bool:
+        return path in self._positions
+    
+    def index(self, path: str) -> int:
+        """Posició d'una ruta (ValueError si no hi és), O(1) amortitzat."""
+        position = self._positions.get(path)
+        if position is None:
+            raise ValueError(f"{path} no és a la llista")
+        if position < self._positions_valid:
+            return position
+        for i in range(self._positions_valid, len(self._items)):
+            self._positions[self._items[i]] = i
+        self._positions_valid = len(self._items)
+        return self._positions[path]
+    
+    def append(self, path: str) -> bool:
+        """Afegeix una ruta al final. Retorna False si ja hi era."""
+        if path in self._positions:
+            return False
+        self._positions[path] = len(self._items)
+        if self._positions_valid == len(self._items):
+            self._positions_valid += 1
+        self._items.append(path)
+        self.version += 1
+        return True
+    
+    def extend(self, paths: Iterable[str]) -> List[str]:
+        """Afegeix diverses rutes. Retorna les que eren noves."""
+        return [path for path in paths if self.append(path)]
+    
+    def pop(self, index: int) -> str:
+        """Treu l'element d'una posició."""
+        if index < 0:
+            index += len(self._items)
+        path = self._items.pop(index)
+        del self._positions[path]
+        self._positions_valid = min(self._positions_valid, index)
+        self.version += 1
+        return path
+    
+    def remove(self, path: str) -> int:
+        """Treu una ruta. Retorna la posició que tenia."""
+        index = self.index(path)
+        self.pop(index)
+        return index
+    
+    def remove_many(self, paths: Iterable[str]) -> List[int]:
+        """Treu diverses rutes amb una sola passada. Retorna les posicions que tenien, de gran a petita."""
+        doomed = {path for path in paths if path in self._positions}
+        if not doomed:
+            return []
+        indices = sorted((self.index(path) for path in doomed), reverse=True)
+        self._items = [path for path in self._items if path not in doomed]
+        for path in doomed:
+            del self._positions[path]
+        self._positions_valid = min(self._positions_valid, indices[-1])
+        self.version += 1
+        return indices
+    
+    def clear(self) -> None:
+        self._items.clear()
+        self._positions.clear()
+        self._positions_valid = 0
+        self.version += 1
+
+
+class FolderImport:
+    """Importació recursiva d'una carpeta amb os.scandir en un fil de treball.
+    
+    El fil només llegeix directoris i deixa les rutes trobades en una cua per
+    lots; la UI les recull amb `take` a poc a poc, frame a frame, de manera que
+    importar milers de fitxers no atura el rellotge.
+    """
+    
+    BATCH = 500
+    
+    def __init__(self, folder: str, extensions: Tuple[str, ...]):
+        self.folder = folder
+        self.extensions = extensions
+        self.found: int = 0
+        self.errors: int = 0
+        self.done: bool = False
+        self._cancelled: bool = False
+        self._batches: "queue.SimpleQueue[List[str]]" = queue.SimpleQueue()
+        self._leftover: List[str] = []  # Resta d'un lot que no ha cabut a l'últim `take`
+        self._thread = threading.Thread(target=self._walk, name="folder-import", daemon=True)
+        self._thread.start()
+    
+    def _walk(self) -> None:
+        """Recorre la carpeta en profunditat, en ordre alfabètic (fil de treball)."""
+        stack = [self.folder]
+        batch: List[str] = []
+        try:
+            while stack and not self._cancelled:
+                directory = stack.pop()
+                try:
+                    with os.scandir(directory) as iterator:
+                        entries = sorted(iterator, key=lambda entry: entry.name.lower())
+                except OSError:
+                    self.errors += 1
+                    continue
+                subdirectories = []
+                for entry in entries:
+                    try:
+                        if entry.is_dir(follow_symlinks=False):
+                            subdirectories.append(entry.path)
+                        elif entry.name.lower().endswith(self.extensions) and entry.is_file():
+                            batch.append(entry.path)
+                    except OSError:
+                        self.errors += 1
+                    # Lots de mida fixa també dins d'un directori pla amb milers de fitxers
+                    if len(batch) >= self.BATCH:
+                        self.found += len(batch)
+                        self._batches.put(batch)
+                        batch = []
+                stack.extend(reversed(subdirectories))
+            if batch and not self._cancelled:
+                self.found += len(batch)
+                self._batches.put(batch)
+        finally:
+            self.done = True
+    
+    def take(self, limit: int) -> List[str]:
+        """Recull fins a `limit` rutes pendents, sense bloquejar (fil de Tk)."""
+        paths = self._leftover
+        while len(paths) < limit:
+            try:
+                paths.extend(self._batches.get_nowait())
+            except queue.Empty:
+                break
+        self._leftover = paths[limit:]
+        return paths[:limit]
+    
+    @property
+    def finished(self) -> bool:
+        """El recorregut ha acabat i ja s'han recollit tots els lots."""
+        return self.done and self._batches.empty() and not self._leftover
+    
+    def cancel(self) -> None:
+        self._cancelled = True
+
+
+class _WatchedDirectory:
+    """Instantània d'un directori vigilat."""
+    
+    __slots__ = ('root', 'mtime', 'files', 'subdirs', 'wd')
+    
+    def __init__(self, root: str):
+        self.root = root
+        self.mtime: Optional[int] = None   # st_mtime_ns de l'última lectura
+        self.files: set = set()            # Fitxers d'àudio vistos (rutes)
+        self.subdirs: set = set()          # Subdirectoris (rutes)
+        self.wd: Optional[int] = None      # Descriptor d'inotify, si n'hi ha
+
+
+class FolderWatcher:
+    """Vigila carpetes on es deixen fitxers d'àudio durant el programa.
+    
+    Un fil de treball guarda una instantània de cada directori (mtime i
+    contingut) i a cada passada només en fa un os.stat: un directori només es
+    torna a llegir amb os.scandir quan el seu mtime ha canviat, és a dir, quan
+    s'hi ha creat, esborrat o reanomenat alguna cosa. Amb el paquet opcional
+    `inotify_simple` (Linux, carpetes locals) ni tan sols cal l'stat: el nucli
+    avisa de quins directoris han canviat.
+    
+    Un fitxer nou es dona per acabat quan la mida i el mtime no canvien durant
+    STABLE_PASSES passades (o si ja és vell en trobar-lo). Els canvis es
+    recullen amb `take` des del fil de Tk. El cost es pot consultar a
+    `cpu_time` (CPU del fil), `io_calls` (stat + scandir) i `last_pass`.
+    """
+    
+    INTERVAL = 2.0      # Segons entre passades
+    STABLE_PASSES = 2   # Passades amb la mateixa mida abans d'afegir un fitxer nou
+    SETTLED_AGE = 30.0  # Un fitxer amb el mtime més vell que això ja està acabat
+    
+    def __init__(self, extensions: Tuple[str, ...], path: Optional[str] = None, interval: float = INTERVAL):
+        self.extensions = extensions
+        self.path = path or os.path.join(get_app_data_dir(), 'watch_folders.json')
+        self.interval = interval
+        self.folders: List[str] = []
+        self._lock = threading.Lock()
+        self._changes: "queue.SimpleQueue[Tuple[bool, str]]" = queue.SimpleQueue()  # (afegit?, ruta)
+        self._dirs: Dict[str, _WatchedDirectory] = {}
+        self._roots: set = set()
+        self._candidates: Dict[str, Tuple[int, int, int]] = {}  # ruta -> (mida, mtime, passades estables)
+        self._reported: set = set()
+        self._wake = threading.Event()
+        self._stopping = False
+        self._thread: Optional[threading.Thread] = None
+        self._inotify = None
+        self._inotify_mask: int = 0
+        self._inotify_dirs: Dict[int, str] = {}
+        self.passes: int = 0
+        self.cpu_time: float = 0.0
+        self.io_calls: int = 0
+        self.last_pass: float = 0.0
+        self.root_stats: Dict[str, Tuple[int, int, str]] = {}  # arrel -> (directoris, fitxers, mode)
+        self._load()
+    
+    def _load(self) -> None:
+        """Llegeix les carpetes vigilades desades."""
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                self.folders = [folder for folder in json.load(f) if isinstance(folder, str)]
+        except (OSError, ValueError, TypeError):
+            self.folders = []
+        if self.folders:
+            self.start()
+    
+    def _save(self) -> None:
+        """Desa les carpetes vigilades."""
+        try:
+            with open(self.path, 'w', encoding='utf-8') as f:
+                json.dump(self.folders, f, ensure_ascii=False)
+        except OSError as e:
+            print(f"No s'han pogut desar les carpetes vigilades: {e}")
+    
+    def add_folder(self, folder: str) -> bool:
+        """Comença a vigilar una carpeta (i les subcarpetes). Retorna False si ja s'hi vigilava."""
+        folder = os.path.normpath(folder)
+        with self._lock:
+            if folder in self.folders:
+                return False
+            self.folders.append(folder)
+        self._save()
+        self.start()
+        self._wake.set()
+        return True
+    
+    def remove_folder(self, folder: str) -> None:
+        """Deixa de vigilar una carpeta (els fitxers ja afegits es queden a la llista)."""
+        with self._lock:
+            if folder not in self.folders:
+                return
+            self.folders.remove(folder)
+        self._save()
+        self._wake.set()
+    
+    def start(self) -> None:
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="folder-watcher", daemon=True)
+            self._thread.start()
+    
+    def stop(self) -> None:
+        self._stopping = True
+        self._wake.set()
+    
+    def take(self) -> Tuple[List[str], List[str]]:
+        """Recull els fitxers afegits i esborrats des de l'última crida (fil de Tk)."""
+        added: List[str] = []
+        removed: List[str] = []
+        while True:
+            try:
+                is_added, path = self._changes.get_nowait()
+            except queue.Empty:
+                return added, removed
+            (added if is_added else removed).append(path)
+    
+    @property
+    def mode(self) -> str:
+        return "inotify" if self._inotify is not None else "mtime"
+    
+    # Fil de treball
+    def _open_inotify(self) -> None:
+        """Fa servir inotify si el paquet opcional inotify_simple hi és (Linux)."""
+        if not sys.platform.startswith('linux') or importlib.util.find_spec('inotify_simple') is None:
+            return
+        try:
+            import inotify_simple
+            self._inotify = inotify_simple.INotify()
+        except OSError as e:
+            print(f"inotify no disponible, es fa servir el mtime dels directoris: {e}")
+            return
+        flags = inotify_simple.flags
+        self._inotify_mask = (flags.CREATE | flags.DELETE | flags.MOVED_FROM | flags.MOVED_TO
+                              | flags.CLOSE_WRITE | flags.DELETE_SELF)
+    
+    def _run(self) -> None:
+        self._open_inotify()
+        try:
+            while not self._stopping:
+                self._pass()
+                self._wake.wait(self.interval)
+                self._wake.clear()
+        finally:
+            if self._inotify is not None:
+                self._inotify.close()
+    
+    def _pass(self) -> None:
+        """Una passada: arrels noves o tretes, directoris canviats i fitxers pendents."""
+        cpu_start = time.thread_time()
+        start = time.perf_counter()
+        with self._lock:
+            folders = list(self.folders)
+        for root in [root for root in self._roots if root not in folders]:
+            self._roots.discard(root)
+            self._drop(root, report=False)
+        for root in folders:
+            if root not in self._dirs:  # Arrel nova, o que no existia (o s'havia esborrat)
+                self._roots.add(root)
+                self._scan(root, root)
+        
+        dirty = set()
+        if self._inotify is not None and self._inotify_dirs:
+            for event in self._inotify.read(timeout=0):
+                if event.wd == -1:  # Cua desbordada: es tornen a llegir tots
+                    dirty.update(self._inotify_dirs.values())
+                elif event.wd in self._inotify_dirs:
+                    dirty.add(self._inotify_dirs[event.wd])
+        for directory, snapshot in list(self._dirs.items()):
+            if directory not in self._dirs:
+                continue  # Tret en aquesta mateixa passada
+            if snapshot.wd is not None and directory not in dirty:
+                continue
+            if snapshot.wd is None:
+                self.io_calls += 1
+                try:
+                    if os.stat(directory).st_mtime_ns == snapshot.mtime:
+                        continue
+                except OSError:
+                    self._drop(directory)
+                    continue
+            self._scan(directory, snapshot.root)
+        self._check_candidates()
+        
+        self.passes += 1
+        self.last_pass = time.perf_counter() - start
+        self.cpu_time += time.thread_time() - cpu_start
+        stats: Dict[str, List[int]] = {root: [0, 0, 0] for root in self._roots}
+        for snapshot in self._dirs.values():
+            counts = stats.get(snapshot.root)
+            if counts is not None:
+                counts[0] += 1
+                counts[1] += len(snapshot.files)
+                counts[2] += snapshot.wd is not None
+        self.root_stats = {root: (dirs, files, "inotify" if watched == dirs and dirs else "mtime")
+                           for root, (dirs, files, watched) in stats.items()}
+    
+    def _scan(self, directory: str, root: str) -> None:
+        """Llegeix un directori i compara amb la instantània (recursiu per als subdirectoris nous)."""
+        snapshot = self._dirs.get(directory)
+        if snapshot is None:
+            snapshot = self._dirs[directory] = _WatchedDirectory(root)
+            if self._inotify is not None and not is_network_path(root):
+                try:
+                    snapshot.wd = self._inotify.add_watch(directory, self._inotify_mask)
+                    self._inotify_dirs[snapshot.wd] = directory
+                except OSError:
+                    snapshot.wd = None  # Sense watch: es vigila pel mtime
+        self.io_calls += 2
+        try:
+            mtime = os.stat(directory).st_mtime_ns  # Abans de llegir: un canvi durant la lectura es veurà a la pròxima
+            with os.scandir(directory) as iterator:
+                entries = list(iterator)
+        except OSError:
+            self._drop(directory)
+            return
+        snapshot.mtime = mtime
+        files = set()
+        subdirs = set()
+        for entry in entries:
+            try:
+                if entry.is_dir(follow_symlinks=False):
+                    subdirs.add(entry.path)
+                elif entry.name.lower().endswith(self.extensions):
+                    files.add(entry.path)
+            except OSError:
+                continue
+        for path in snapshot.files - files:
+            self._forget(path)
+        for path in files - snapshot.files:
+            self._candidates[path] = (-1, 0, 0)
+        snapshot.files = files
+        for path in snapshot.subdirs - subdirs:
+            self._drop(path)
+        new_subdirs = subdirs - snapshot.subdirs
+        snapshot.subdirs = subdirs
+        for path in sorted(new_subdirs):
+            self._scan(path, root)
+    
+    def _check_candidates(self) -> None:
+        """Afegeix els fitxers nous que ja no creixen."""
+        now = time.time()
+        for path, (size, mtime, passes) in list(self._candidates.items()):
+            self.io_calls += 1
+            try:
+                stat = os.stat(path)
+            except OSError:
+                self._candidates.pop(path, None)
+                continue
+            if now - stat.st_mtime > self.SETTLED_AGE:
+                passes = self.STABLE_PASSES
+            elif stat.st_size == size and stat.st_mtime_ns == mtime and size > 0:
+                passes += 1
+            else:
+                passes = 0
+            if passes >= self.STABLE_PASSES:
+                del self._candidates[path]
+                self._reported.add(path)
+                self._changes.put((True, path))
+            else:
+                self._candidates[path] = (stat.st_size, stat.st_mtime_ns, passes)
+    
+    def _forget(self, path: str) -> None:
+        """Un fitxer ha desaparegut del directori."""
+        self._candidates.pop(path, None)
+        if path in self._reported:
+            self._reported.discard(path)
+            self._changes.put((False, path))
+    
+    def _drop(self, directory: str, report: bool = True) -> None:
+        """Deixa de seguir un directori i els subdirectoris (esborrat o arrel treta)."""
+        snapshot = self._dirs.pop(directory, None)
+        if snapshot is None:
+            return
+        if snapshot.wd is not None:
+            self._inotify_dirs.pop(snapshot.wd, None)
+            try:
+                self._inotify.rm_watch(snapshot.wd)
+            except OSError:
+                pass  # El nucli ja l'ha tret en esborrar-se el directori
+        for path in snapshot.files:
+            if report:
+                self._forget(path)
+            else:
+                self._candidates.pop(path, None)
+                self._reported.discard(path)
+        for path in snapshot.subdirs:
+            self._drop(path, report)
+
+
+_COMBINING_MARKS = re.compile('[\u0300-\u036f]')
+_NON_ALPHANUMERIC = re.compile(r'[\W_]+')
+
+
+def fold_text(text: str) -> str:
+    """Text per cercar: minúscules, sense accents ni signes ("Renaixença" -> "renaixenca").
+    
+    El punt volat de la ela geminada desapareix ("col·legi" -> "collegi") i la
+    resta de caràcters que no són lletres ni xifres passen a ser espais.
+    """
+    if not text.isascii():
+        text = _COMBINING_MARKS.sub('', unicodedata.normalize('NFKD', text)).replace('·', '')
+    return _NON_ALPHANUMERIC.sub(' ', text).strip().casefold()
+
+
+class AudioSearchIndex:
+    """Índex de trigrames dels noms i carpetes de la biblioteca d'àudio.
+    
+    Cada paraula s'indexa amb un espai a banda i banda, de manera que " ab" és
+    el primer trigrama de totes les paraules que comencen per "ab". Les llistes
+    de documents són arrays d'enters (4 bytes per entrada) ordenades per id; en
+    treure un fitxer només se'n buida la fitxa, i l'índex es compacta quan les
+    fitxes buides passen de la meitat. Una consulta intersecta les llistes
+    començant per la més curta i verifica els candidats amb el text plegat;
+    mentre l'usuari continua escrivint la mateixa consulta es parteix dels
+    resultats de la tecla anterior.
+    
+    Les rutes noves es poden encuar amb `queue` i indexar a trossos amb
+    `index_pending` (p. ex. durant la importació d'una carpeta); `search`
+    indexa abans el que quedi pendent.
+    """
+    
+    FOLDER_PARTS = 2  # Carpetes indexades per sobre del fitxer
+    MAX_INTERSECT = 3
+    
+    def __init__(self, paths: Iterable[str] = ()):
+        self._ids: Dict[str, int] = {}
+        self._docs: List[Optional[Tuple[str, str, str]]] = []  # (ruta, nom, " nom carpeta") plegats
+        self._postings: Dict[str, array] = {}
+        self._pending: deque = deque()
+        self._dropped: set = set()  # Rutes encuades que s'han tret abans d'indexar-les
+        self._last: Tuple[Optional[str], int, List[int]] = (None, 0, [])  # (consulta, versió, claus)
+        self.version: int = 0
+        self.add_many(paths)
+    
+    def __len__(self) -> int:
+        return len(self._ids)
+    
+    def __contains__(self, path: str) -> bool:
+        return path in self._ids
+    
+    def _fold_path(self, path: str) -> Tuple[str, str]:
+        """Nom del fitxer (sense extensió) i text cercable, ja plegats."""
+        directory, file_name = os.path.split(path)
+        name = fold_text(os.path.splitext(file_name)[0])
+        parts = []
+        for _ in range(self.FOLDER_PARTS):
+            directory, part = os.path.split(directory)
+            if not part:
+                break
+            parts.append(part)
+        return name, f" {name} {fold_text(' '.join(reversed(parts)))} "
+    
+    def add(self, path: str) -> bool:
+        """Indexa una ruta. Retorna False si ja hi era."""
+        if path in self._ids:
+            return False
+        name, haystack = self._fold_path(path)
+        doc_id = len(self._docs)
+        self._ids[path] = doc_id
+        self._docs.append((path, name, haystack))
+        postings = self._postings
+        grams = set()
+        for word in haystack.split():
+            padded = f" {word} "
+            grams.update(padded[i:i + 3] for i in range(len(padded) - 2))
+        for gram in grams:
+            posting = postings.get(gram)
+            if posting is None:
+                postings[gram] = array('I', (doc_id,))
+            else:
+                posting.append(doc_id)
+        self.version += 1
+        return True
+    
+    def add_many(self, paths: Iterable[str]) -> int:
+        return sum(1 for path in paths if self.add(path))
+    
+    def queue(self, paths: Iterable[str]) -> None:
+        """Encua rutes per indexar-les més tard amb `index_pending`."""
+        for path in paths:
+            self._dropped.discard(path)
+            self._pending.append(path)
+    
+    @property
+    def pending(self) -> int:
+        return len(self._pending)
+    
+    def index_pending(self, budget: float = math.inf) -> int:
+        """Indexa rutes encuades durant `budget` segons com a molt. Retorna les que queden."""
+        deadline = time.perf_counter() + budget
+        pending, dropped = self._pending, self._dropped
+        while pending:
+            for _ in range(min(16, len(pending))):
+                path = pending.popleft()
+                if path in dropped:
+                    dropped.discard(path)
+                else:
+                    self.add(path)
+            if time.perf_counter() >= deadline:
+                break
+        if not pending:
+            dropped.clear()
+        return len(pending)
+    
+    def remove(self, path: str) -> bool:
+        """Treu una ruta de l'índex (les llistes es netegen en compactar)."""
+        doc_id = self._ids.pop(path, None)
+        if doc_id is None:
+            if self._pending:
+                self._dropped.add(path)
+            return False
+        self._docs[doc_id] = None
+        self.version += 1
+        if len(self._docs) > 1024 and len(self._ids) < len(self._docs) // 2:
+            self._compact()
+        return True
+    
+    def clear(self) -> None:
+        self._ids.clear()
+        self._docs.clear()
+        self._postings.clear()
+        self._pending.clear()
+        self._dropped.clear()
+        self.version += 1
     
-    @lru_cache(maxsize=1)
-    def get_catalan_date(self) -> str:
-        """Obté la data en català (cached)."""
-        now = datetime.now()
-        dies_setmana = ["Dilluns", "Dimarts", "Dimecres", "Dijous", "Divendres", "Dissabte", "Diumenge"]
-        mesos = ["", "gener", "febrer", "març", "abril", "maig", "juny", "juliol", "agost", "setembre", "octubre", "novembre", "desembre"]
-        return f"{dies_setmana[now.weekday()]}, {now.day} de {mesos[now.month]} de {now.year}"
-    
-    def export_sections(self) -> str:
-        """Exporta les seccions a text."""
-        if not self.sections:
-            return ""
-        
-        now = datetime.now()
-        lines = [
-            f"REGISTRE LA RENAIXENÇA PGM {self.program_number}",
-            "=" * 50,
-            f"Data: {self.get_catalan_date()}",
-            f"Hora: {now.strftime('%H:%M:%S')}",
-            "",
-            "Nº  | Secció                           | Durada",
-            "-" * 50
-        ]
-        
-        for i, section in enumerate(self.sections):
-            num = str(i + 1).rjust(2)
-            name = section['name'][:35].ljust(35)
-            duration = self.format_time(section['duration'])
-            lines.append(f"{num}  | {name} | {duration}")
-        
-        lines.extend([
-            "-" * 50,
-            f"TOTAL: {len(self.sections)} seccions - {self.format_time(self.total_time)}"
-        ])
+    def _compact(self) -> None:
+        """Refà l'índex només amb les fitxes vives (ids consecutius de nou)."""
+        paths = [doc[0] for doc in self._docs if doc is not None]
+        self._ids, self._docs, self._postings = {}, [], {}
+        self.add_many(paths)
+    
+    def search(self, query: str, limit: int = 500) -> Optional[List[str]]:
+        """Rutes que contenen totes les paraules de la consulta, les millors primer.
         
-        return "\n".join(lines)
+        Les paraules de tres o més lletres es busquen a qualsevol lloc del nom
+        o de la carpeta; les més curtes, només a l'inici d'una paraula. Retorna
+        None si la consulta té menys de dues lletres: l'aplicació mostra
+        aleshores la llista sencera. Ordre: nom idèntic, nom que comença per la
+        consulta, paraula del nom que hi comença, dins del nom, carpeta; a
+        igualtat, noms més curts i després ordre d'arribada.
+        """
+        folded = fold_text(query)
+        if len(folded.replace(' ', '')) < 2:
+            return None
+        if self._pending:
+            self.index_pending()
+        tokens = sorted(set(folded.split()), key=len, reverse=True)
+        needles = [token if len(token) >= 3 else f" {token}" for token in tokens]
+        last_query, last_version, last_ranked = self._last
+        if last_query is not None and last_version == self.version and folded.startswith(last_query) \
+                and all(len(token) >= 3 for token in last_query.split()):
+            # L'usuari continua escrivint: els resultats nous són un subconjunt dels d'abans
+            candidates: Iterable[int] = [-key & 0xFFFFFF for key in last_ranked]
+            verify = needles
+        else:
+            candidates, exact = self._candidates(tokens)
+            verify = [] if exact else needles
+        docs = self._docs
+        ranked = []  # Claus enteres: (ordre << 40) - (llargada del nom << 24) - id
+        prefix = f" {folded}"
+        first = needles[0]  # La paraula més llarga decideix l'ordre
+        at_start = 0 if first[0] == ' ' else 1
+        for doc_id in candidates:
+            doc = docs[doc_id]
+            if doc is None:
+                continue
+            haystack = doc[2]
+            for needle in verify:
+                if needle not in haystack:
+                    break
+            else:
+                name_end = len(doc[1]) + 1  # haystack[1:name_end] és el nom
+                position = haystack.find(first)
+                if position >= name_end:
+                    rank = 0                # Només a la carpeta
+                elif haystack.startswith(prefix):
+                    rank = 5 if doc[1] == folded else 4
+                elif position == at_start:
+                    rank = 3                # El nom comença per la paraula
+                elif at_start == 0 or haystack[position - 1] == ' ':
+                    rank = 2                # Una paraula del nom hi comença
+                else:
+                    rank = 1
+                ranked.append((rank << 40) - (name_end << 24) - doc_id)
+        self._last = (folded, self.version, ranked)
+        return [docs[-key & 0xFFFFFF][0] for key in heapq.nlargest(limit, ranked)]
     
-    @staticmethod
-    def format_time(seconds: int) -> str:
-        """Formata segons a MM:SS."""
-        return f"{int(seconds) // 60:02d}:{int(seconds) % 60:02d}"
+    def _candidates(self, tokens: List[str]) -> Tuple[Iterable[int], bool]:
+        """Ids candidats i si ja són exactes (sense haver de verificar el text).
+        
+        S'intersecten com a molt MAX_INTERSECT llistes, de la més curta a la
+        més llarga: a partir d'aquí surt més a compte verificar el text.
+        """
+        grams = set()
+        exact = True
+        for token in tokens:
+            if len(token) == 2:
+                grams.add(f" {token}")  # Primer trigrama de les paraules que comencen així
+            elif len(token) == 3:
+                grams.add(token)
+            else:
+                grams.update(token[i:i + 3] for i in range(len(token) - 2))
+                exact = False
+        if len(grams) < len(tokens):
+            exact = False  # Paraules d'una lletra
+        if not grams:
+            return range(len(self._docs)), False
+        postings = []
+        for gram in grams:
+            posting = self._postings.get(gram)
+            if not posting:
+                return (), True
+            postings.append(posting)
+        postings.sort(key=len)
+        if len(postings) > self.MAX_INTERSECT:
+            postings = postings[:self.MAX_INTERSECT]
+            exact = False
+        if len(postings) == 1:
+            return postings[0], exact
+        result = set(postings[0])
+        for posting in postings[1:]:
+            result.intersection_update(posting)
+            if not result:
+                break
+        return result, exact
 
 
+class VlcEventQueue:
+    """Cua que fusiona els esdeveniments de VLC fins al pròxim frame de la UI.
+    
+    Els callbacks de libvlc arriben des d'un fil de VLC i només hi deixen l'últim
+    valor de cada tipus ('time', 'length', 'state'); el final del medi va a
+    part ('ended') perquè cap estat posterior el pugui esborrar abans que la
+    UI el tracti. `waker` es crida quan la cua
+    passa de buida a plena, de manera que la UI es desperta com a molt una
+    vegada per frame i no fa cap crida a libvlc quan no passa res.
+    """
+    
+    def __init__(self):
+        self.waker: Optional[Callable[[], None]] = None
+        self.received: int = 0
+        self._pending: Dict[str, Any] = {}
+        self._lock = threading.Lock()
+    
+    def push(self, kind: str, value: Any = None) -> None:
+        """Afegeix (o substitueix) un esdeveniment. Es pot cridar des de qualsevol fil."""
+        with self._lock:
+            first = not self._pending
+            self._pending[kind] = value
+            self.received += 1
+        if first and self.waker is not None:
+            self.waker()
+    
+    def drain(self) -> Dict[str, Any]:
+        """Retorna i buida els esdeveniments pendents (fil de Tk)."""
+        with self._lock:
+            pending, self._pending = self._pending, {}
+        return pending
 
 
 class AudioPlayer:
-    """Reproductor d'àudio amb suport per VLC i Pygame."""
+    """Reproductor d'àudio amb suport per VLC i Pygame.
+    
+    El backend no s'inicialitza al constructor: cal cridar `initialize_async()`
+    (fil en segon pla) o bé es fa de manera mandrosa al primer ús.
+    """
+    
+    INITIALISING = "initialising"
+    READY = "ready"
+    UNAVAILABLE = "unavailable"
+    
+    EXTENSIONS = ('.mp3', '.wav', '.ogg')
     
     def __init__(self):
         self.is_playing: bool = False
@@ -166,27 +4151,98 @@ class AudioPlayer:
         self.current_file: Optional[str] = None
         self.current_position: int = 0
         self.duration: int = 0
-        self.files: List[str] = []
+        self.files = AudioLibrary()
+        self.search_index = AudioSearchIndex()
         self.volume: float = 0.7
         self.start_time: Optional[float] = None
         self.pause_time: float = 0
         self.vlc_instance = None
         self.vlc_player = None
-        self.use_vlc: bool = VLC_AVAILABLE
+        self.use_vlc: bool = False
+        self.use_pygame: bool = False
         self.media_ended_callback = None # Callback per quan el medi acaba
+        self.vlc_events = VlcEventQueue()
+        self.vlc_status: str = "stopped"   # Estat segons els esdeveniments de VLC
+        self.vlc_time: float = 0.0         # Última posició notificada per VLC
+        self.vlc_time_at: float = 0.0      # Instant perf_counter d'aquesta notificació
+        self.duration_callback = None # Callback(path, durada) quan es coneix una durada
+        self.dispatcher: Optional[UiDispatcher] = None # Retorna els resultats al fil de Tk
+        self.durations: Dict[str, float] = {}
+        self.sound_bank = SoundBank()
+        self.state: str = self.INITIALISING
+        try:
+            self.metadata_cache: Optional[MediaMetadataCache] = MediaMetadataCache()
+        except (OSError, sqlite3.Error) as e:
+            print(f"Memòria cau de metadades no disponible: {e}")
+            self.metadata_cache = None
+        try:
+            self.mirror: Optional[LocalMirrorCache] = LocalMirrorCache()
+        except (OSError, sqlite3.Error) as e:
+            print(f"Mirall local no disponible: {e}")
+            self.mirror = None
+        self.sound_bank.mirror = self.mirror
+        self.ready = threading.Event()
+        self._init_thread: Optional[threading.Thread] = None
+        self._init_lock = threading.Lock()
         
-        self._initialize_audio_backend()
+        # Càrrega asíncrona: un sol fil per a la càrrega activa (s'executen en
+        # ordre) i un altre per a la precàrrega de durades de la llista.
+        self._load_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="audio-load")
+        self._prefetch_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="audio-prefetch")
+        self._load_generation: int = 0
+        self._prefetch_generation: int = 0
+        self._pending_load: Optional[Future] = None
+    
+    def initialize_async(self) -> None:
+        """Detecta i inicialitza el backend d'àudio en un fil en segon pla."""
+        with self._init_lock:
+            if self._init_thread is not None or self.ready.is_set():
+                return
+            self._init_thread = threading.Thread(
+                target=self._initialize_audio_backend, name="audio-init", daemon=True
+            )
+            self._init_thread.start()
+    
+    def ensure_ready(self, timeout: Optional[float] = None) -> bool:
+        """Garanteix que el backend està inicialitzat (inicialització mandrosa)."""
+        with self._init_lock:
+            start_here = self._init_thread is None and not self.ready.is_set()
+            if start_here:
+                self._init_thread = threading.current_thread()
+        if start_here:
+            self._initialize_audio_backend()
+        self.ready.wait(timeout)
+        return self.state == self.READY
+    
+    @property
+    def is_ready(self) -> bool:
+        """Indica si el backend està llest per reproduir."""
+        return self.state == self.READY
     
     def _initialize_audio_backend(self) -> None:
         """Inicialitza el backend d'àudio amb fallback robust."""
+        try:
+            self._initialize_backends()
+        finally:
+            self.state = self.READY if (self.use_vlc or self.use_pygame) else self.UNAVAILABLE
+            self.ready.set()
+    
+    def _initialize_backends(self) -> None:
+        """Crea la instància de VLC o, si falla, inicialitza Pygame."""
+        detect_audio_backends()
+        
         # Primer prova VLC si està disponible
-        if self.use_vlc and VLC_AVAILABLE:
+        if VLC_AVAILABLE:
             try:
-                # Usa les mateixes opcions silencioses que en la detecció inicial
-                self.vlc_instance = vlc.Instance('--intf', 'dummy', '--no-video', '--quiet', '--no-osd', '--no-stats')
+                # Una sola instància silenciosa: fa alhora de prova i de reproductor
+                vlc_instance = vlc.Instance('--intf', 'dummy', '--no-video', '--quiet', '--no-osd', '--no-stats')
+                if not vlc_instance:
+                    raise RuntimeError("VLC importat però no funcional")
+                self.vlc_instance = vlc_instance
                 self.vlc_player = self.vlc_instance.media_player_new()
-                self.vlc_player.audio_set_volume(70)
+                self.vlc_player.audio_set_volume(int(self.volume * 100))
                 self._setup_vlc_events() # Setup VLC event handling
+                self.use_vlc = True
                 print("VLC inicialitzat correctament")
             except Exception as e:
                 print(f"Error inicialitzant VLC: {e}")
@@ -199,70 +4255,243 @@ class AudioPlayer:
             try:
                 pygame.mixer.pre_init(frequency=22050, size=-16, channels=2, buffer=512)
                 pygame.mixer.init()
+                pygame.mixer.music.set_volume(self.volume)
+                self.use_pygame = True
                 print("Pygame inicialitzat correctament com a fallback")
             except Exception as e:
                 print(f"Error inicialitzant pygame: {e}")
         
         # Informa sobre l'estat final
-        if not self.use_vlc and not PYGAME_AVAILABLE:
+        if not self.use_vlc and not self.use_pygame:
             print("ADVERTÈNCIA: Cap reproductor d'àudio disponible!")
         elif not self.use_vlc:
             print("Usant Pygame per reproducció d'àudio (funcionalitat limitada)")
     
     def load_file(self, file_path: str) -> bool:
-        """Carrega un fitxer d'àudio."""
-        if not os.path.exists(file_path):
-            print(f"Fitxer no trobat: {file_path}")
+        """Carrega un fitxer d'àudio (bloquejant; vegeu load_file_async)."""
+        if not self.ensure_ready():
             return False
+        result = self._open_media(file_path)
+        if result is None:
+            return False
+        return self._apply_media(file_path, *result)
+    
+    def load_file_async(self, file_path: str, callback: Callable[[bool], None]) -> int:
+        """Carrega un fitxer en un fil de treball sense bloquejar la UI.
         
-        self.current_file = file_path
+        `callback(ok)` s'executa al fil de Tk a través del dispatcher. Una nova
+        càrrega cancel·la l'anterior. Retorna l'identificador de la càrrega.
+        """
+        self.cancel_load()
+        generation = self._load_generation
+        future = self._load_executor.submit(self._prepare_load, generation, file_path)
+        self._pending_load = future
+        future.add_done_callback(
+            lambda done: self._post(self._finish_load, generation, file_path, done, callback)
+        )
+        return generation
+    
+    def cancel_load(self) -> None:
+        """Cancel·la la càrrega asíncrona pendent, si n'hi ha."""
+        self._load_generation += 1
+        if self._pending_load is not None:
+            self._pending_load.cancel()
+            self._pending_load = None
+    
+    def _prepare_load(self, generation: int, file_path: str) -> Optional[Tuple[Any, float, str]]:
+        """Part bloquejant de la càrrega (fil de treball)."""
+        if generation != self._load_generation or not self.ensure_ready():
+            return None
+        return self._open_media(file_path)
+    
+    def _finish_load(self, generation: int, file_path: str, future: Future,
+                     callback: Callable[[bool], None]) -> None:
+        """Aplica el resultat de la càrrega (fil de Tk)."""
+        if future.cancelled() or generation != self._load_generation:
+            return
+        self._pending_load = None
+        try:
+            result = future.result()
+        except Exception as e:
+            print(f"Error carregant {file_path}: {e}")
+            result = None
+        callback(result is not None and self._apply_media(file_path, *result))
+    
+    def _post(self, callback: Callable, *args) -> None:
+        """Envia un callback al fil de Tk (o l'executa directament sense UI)."""
+        if self.dispatcher is not None:
+            self.dispatcher.post(callback, *args)
+        else:
+            callback(*args)
+    
+    def _open_media(self, file_path: str) -> Optional[Tuple[Any, float, str]]:
+        """Prepara el fitxer per al backend actiu. Retorna (media, durada, origen) o None.
         
+        Es pot cridar des del fil de treball: no toca l'estat del reproductor. Amb
+        pygame, `media` és només la ruta d'origen, perquè el flux de música és
+        global i el fil de Tk el fa servir; es carrega a `_apply_media`.
+        """
+        # Còpia local si n'hi ha una de vigent: la reproducció no depèn de la xarxa
+        source = self.mirror.resolve(file_path) if self.mirror else file_path
+        if not os.path.exists(source):
+            print(f"Fitxer no trobat: {file_path}")
+            return None
+        # Memòria cau o capçaleres: evita l'anàlisi completa de VLC
+        info = self.probe_metadata(file_path)
+        duration = info.duration if info is not None else 0.0
+        if duration > 0:
+            self.durations[file_path] = duration
         if self.use_vlc:
-            return self._load_with_vlc(file_path)
-        elif PYGAME_AVAILABLE:
-            return self._load_with_pygame(file_path)
-        
-        return False
+            try:
+                media = self.vlc_instance.media_new(source)
+                if duration <= 0:
+                    media.parse()
+                    info = self._vlc_media_info(media)
+                    duration = info.duration
+                    if duration > 0:
+                        self.durations[file_path] = duration
+                        if self.metadata_cache:
+                            self.metadata_cache.put(file_path, info)
+                return media, duration, source
+            except Exception as e:
+                print(f"Error carregant amb VLC: {e}")
+                return None
+        elif self.use_pygame:
+            return source, duration, source
+        return None
+    
+    def _apply_media(self, file_path: str, media: Any, duration: float, source: str) -> bool:
+        """Fa actiu el fitxer preparat per `_open_media` (fil de Tk). Retorna si s'ha pogut."""
+        if self.use_pygame and not self.use_vlc:
+            try:
+                pygame.mixer.music.load(media)
+            except Exception as e:
+                print(f"Error carregant amb pygame: {e}")
+                return False
+        if self.mirror:
+            self.mirror.in_use = source if source != file_path else None
+        self.current_file = file_path
+        self.duration = duration
+        if self.use_vlc:
+            self.vlc_player.set_media(media)
+            self.vlc_time = 0.0
+            self.vlc_time_at = time.perf_counter()
+        elif self.files.append(file_path):
+            self.search_index.queue((file_path,))
+        return True
+    
+    def prefetch_durations(self, file_paths: List[str]) -> None:
+        """Calcula en segon pla la durada dels fitxers de la llista."""
+        generation = self._prefetch_generation
+        for file_path in file_paths:
+            if file_path not in self.durations:
+                self._prefetch_executor.submit(self._prefetch_duration, generation, file_path)
+    
+    def _prefetch_duration(self, generation: int, file_path: str) -> None:
+        """Obté la durada d'un fitxer (fil de treball)."""
+        if generation != self._prefetch_generation:
+            return
+        try:
+            info = self.probe_metadata(file_path)
+        except Exception as e:
+            print(f"Error llegint la durada de {file_path}: {e}")
+            return
+        if info is not None and info.duration > 0:
+            known = self.durations.get(file_path)
+            self.durations[file_path] = info.duration
+            if self.duration_callback and known != info.duration:
+                self._post(self.duration_callback, file_path, info.duration)
+    
+    def probe_duration(self, file_path: str) -> Optional[float]:
+        """Llegeix la durada d'un fitxer sense carregar-lo al reproductor."""
+        info = self.probe_metadata(file_path)
+        return info.duration if info is not None and info.duration > 0 else None
     
-    def _load_with_vlc(self, file_path: str) -> bool:
-        """Carrega fitxer amb VLC."""
+    def probe_metadata(self, file_path: str) -> Optional[MediaInfo]:
+        """Metadades d'un fitxer: primer la memòria cau, si no, l'analitza i la desa."""
         try:
+            stat = os.stat(file_path)
+        except OSError:
+            return None
+        if self.metadata_cache:
+            info = self.metadata_cache.get(file_path, stat.st_size, stat.st_mtime)
+            if info is not None:
+                return info
+        
+        info = AudioHeaderProbe.probe(file_path)
+        if info is None and self.ensure_ready() and self.use_vlc:
             media = self.vlc_instance.media_new(file_path)
-            self.vlc_player.set_media(media)
             media.parse()
-            self.duration = media.get_duration() / 1000
-            return True
-        except Exception as e:
-            print(f"Error carregant amb VLC: {e}")
-            return False
+            info = self._vlc_media_info(media)
+            media.release()
+        if info is not None and info.duration > 0 and self.metadata_cache:
+            self.metadata_cache.put(file_path, info, stat.st_size, stat.st_mtime)
+        return info
     
-    def _load_with_pygame(self, file_path: str) -> bool:
-        """Carrega fitxer amb Pygame."""
+    @staticmethod
+    def _vlc_media_info(media) -> MediaInfo:
+        """Extreu durada i pista d'àudio d'un media de VLC ja analitzat."""
+        info = MediaInfo(duration=max(0, media.get_duration()) / 1000)
         try:
-            pygame.mixer.music.load(file_path)
-            if file_path not in self.files:
-                self.files.append(file_path)
-            return True
-        except Exception as e:
-            print(f"Error carregant amb pygame: {e}")
-            return False
+            for track in media.tracks_get() or []:
+                if track.type == vlc.TrackType.audio:
+                    info.sample_rate = track.audio.contents.rate
+                    info.channels = track.audio.contents.channels
+                    info.codec = track.codec.to_bytes(4, 'little').decode('ascii', 'replace').strip()
+                    break
+        except Exception:
+            pass
+        return info
+    
+    def shutdown(self) -> None:
+        """Cancel·la la feina pendent dels fils de treball."""
+        self.cancel_load()
+        self._prefetch_generation += 1
+        self._load_executor.shutdown(wait=False)
+        self._prefetch_executor.shutdown(wait=False)
+        self.sound_bank.shutdown()
+        if self.mirror:
+            self.mirror.shutdown()
 
     def _setup_vlc_events(self) -> None:
-        """Configura els esdeveniments de VLC."""
+        """Connecta els esdeveniments de VLC a la cua que es buida a cada frame."""
         if self.vlc_player:
             event_manager = self.vlc_player.event_manager()
-            event_manager.event_attach(vlc.EventType.MediaPlayerEndReached, self._handle_vlc_media_ended)
+            events = self.vlc_events
+            handlers = (
+                (vlc.EventType.MediaPlayerTimeChanged, lambda e: events.push('time', e.u.new_time)),
+                (vlc.EventType.MediaPlayerLengthChanged, lambda e: events.push('length', e.u.new_length)),
+                (vlc.EventType.MediaPlayerPlaying, lambda e: events.push('state', 'playing')),
+                (vlc.EventType.MediaPlayerPaused, lambda e: events.push('state', 'paused')),
+                (vlc.EventType.MediaPlayerStopped, lambda e: events.push('state', 'stopped')),
+                (vlc.EventType.MediaPlayerEndReached, self._handle_vlc_media_ended),
+            )
+            for event_type, handler in handlers:
+                event_manager.event_attach(event_type, handler)
 
     def _handle_vlc_media_ended(self, event) -> None:
-        """Gestiona l'esdeveniment de finalització de la reproducció de VLC."""
-        # Aquesta funció és cridada per un thread de VLC, per tant, les actualitzacions de la UI
-        # han de ser programades per executar-se al thread principal de Tkinter.
-        # S'afegeix una comprovació per a 'self.root' per assegurar que l'aplicació encara existeix.
-        if self.media_ended_callback and hasattr(self, 'root') and self.root:
-            self.root.after_idle(self.media_ended_callback)
-        # Aquestes variables d'estat es poden actualitzar aquí ja que no són widgets de Tkinter directament.
-        self.is_playing = False
-        self.is_paused = False
+        """Final del medi (fil de VLC): només s'encua; la UI el tracta al pròxim frame."""
+        self.vlc_events.push('state', 'stopped')
+        self.vlc_events.push('ended', True)
+    
+    def poll_vlc_events(self) -> Dict[str, Any]:
+        """Buida la cua d'esdeveniments de VLC i actualitza l'estat (fil de Tk).
+        
+        No fa cap crida a libvlc: si no hi ha res de nou retorna un dict buit.
+        """
+        events = self.vlc_events.drain()
+        if 'time' in events:
+            self.vlc_time = max(0, events['time']) / 1000.0
+            self.vlc_time_at = time.perf_counter()
+        if events.get('length', 0) > 0:
+            self.duration = events['length'] / 1000.0
+        state = events.get('state')
+        if state is not None:
+            self.vlc_status = state
+            self.is_playing = state in ('playing', 'paused')
+            self.is_paused = state == 'paused'
+        return events
+    
     def play(self) -> bool:
         """Reprodueix l'àudio."""
         if not self.current_file:
@@ -270,7 +4499,7 @@ class AudioPlayer:
         
         if self.use_vlc:
             return self._play_with_vlc()
-        elif PYGAME_AVAILABLE:
+        elif self.use_pygame:
             return self._play_with_pygame()
         
         return False
@@ -284,6 +4513,9 @@ class AudioPlayer:
             else:
                 self.vlc_player.play()
             self.is_playing = True
+            # Estat provisional fins que arribi MediaPlayerPlaying
+            self.vlc_status = "playing"
+            self.vlc_time_at = time.perf_counter()
             return True
         except Exception as e:
             print(f"Error reproduint amb VLC: {e}")
@@ -295,10 +4527,10 @@ class AudioPlayer:
             if self.is_paused:
                 pygame.mixer.music.unpause()
                 self.is_paused = False
-                self.start_time = time.time() - self.pause_time
+                self.start_time = time.perf_counter() - self.pause_time
             else:
                 pygame.mixer.music.play()
-                self.start_time = time.time()
+                self.start_time = time.perf_counter()
                 self.pause_time = 0
             self.is_playing = True
             return True
@@ -310,15 +4542,17 @@ class AudioPlayer:
         """Pausa la reproducció."""
         if self.use_vlc and self.vlc_player:
             if self.is_playing and not self.is_paused:
+                self.vlc_time = self.get_current_time()
                 self.vlc_player.pause()
                 self.is_paused = True
+                self.vlc_status = "paused"
                 return True
-        elif PYGAME_AVAILABLE:
+        elif self.use_pygame:
             if self.is_playing and not self.is_paused:
                 pygame.mixer.music.pause()
                 self.is_paused = True
                 if self.start_time:
-                    self.pause_time = time.time() - self.start_time
+                    self.pause_time = time.perf_counter() - self.start_time
                 return True
         return False
     
@@ -328,8 +4562,10 @@ class AudioPlayer:
             self.vlc_player.stop()
             self.is_playing = False
             self.is_paused = False
+            self.vlc_status = "stopped"
+            self.vlc_time = 0.0
             return True
-        elif PYGAME_AVAILABLE:
+        elif self.use_pygame:
             pygame.mixer.music.stop()
             self.is_playing = False
             self.is_paused = False
@@ -342,25 +4578,31 @@ class AudioPlayer:
     def get_current_time(self) -> float:
         """Obté el temps actual de reproducció amb precisió de mil·lisegons."""
         if self.use_vlc and self.vlc_player:
-            return self.vlc_player.get_time() / 1000.0
+            # Posició de l'últim MediaPlayerTimeChanged, interpolada mentre sona
+            if self.vlc_status == "playing":
+                return self.vlc_time + (time.perf_counter() - self.vlc_time_at)
+            return self.vlc_time
         
         if not self.is_playing and not self.is_paused:
             return 0.0
         if self.is_paused:
             return self.pause_time
         elif self.start_time:
-            return time.time() - self.start_time
+            return time.perf_counter() - self.start_time
         return 0.0
     
     def set_volume(self, volume: float) -> bool:
         """Estableix el volum."""
         self.volume = max(0.0, min(1.0, volume))
         
+        if not self.is_ready:
+            # S'aplicarà en acabar la inicialització
+            return False
         if self.use_vlc and self.vlc_player:
             vlc_volume = int(self.volume * 100)
             self.vlc_player.audio_set_volume(vlc_volume)
             return True
-        elif PYGAME_AVAILABLE:
+        elif self.use_pygame:
             pygame.mixer.music.set_volume(self.volume)
             return True
         
@@ -369,14 +4611,8 @@ class AudioPlayer:
     def get_status(self) -> str:
         """Obté l'estat actual."""
         if self.use_vlc and self.vlc_player:
-            state = self.vlc_player.get_state()
-            if state == vlc.State.Playing:
-                return "playing"
-            elif state == vlc.State.Paused:
-                return "paused"
-            else:
-                return "stopped"
-        elif PYGAME_AVAILABLE:
+            return self.vlc_status
+        elif self.use_pygame:
             if pygame.mixer.music.get_busy():
                 return "paused" if self.is_paused else "playing"
             elif self.is_paused:
@@ -385,20 +4621,28 @@ class AudioPlayer:
                 return "stopped"
         return "unavailable"
     
-    def add_files(self, file_paths: List[str]) -> List[str]:
-        """Afegeix fitxers a la llista."""
-        added = []
-        for file_path in file_paths:
-            if (file_path.lower().endswith(('.mp3', '.wav', '.ogg')) and 
-                file_path not in self.files):
-                self.files.append(file_path)
-                added.append(file_path)
+    def add_files(self, file_paths: Iterable[str], mirror: bool = True) -> List[str]:
+        """Afegeix fitxers a la llista. Retorna els que eren nous.
+        
+        Amb `mirror=False` (importació de carpetes senceres) no es copien tots al
+        mirall local: cada fitxer s'hi copia quan es reprodueix per primer cop.
+        """
+        added = self.files.extend(path for path in file_paths if path.lower().endswith(self.EXTENSIONS))
+        self.search_index.queue(added)
+        if added and mirror and self.mirror:
+            self.mirror.request(added)
+        if added and self.metadata_cache:
+            # Durades conegudes d'altres sessions: la llista es mostra a l'instant
+            for file_path, info in self.metadata_cache.peek_many(added).items():
+                if info.duration > 0:
+                    self.durations[file_path] = info.duration
         return added
 
     def remove_file(self, index: int) -> bool:
         """Elimina un fitxer de la llista per índex."""
         if 0 <= index < len(self.files):
             removed_file = self.files.pop(index)
+            self.search_index.remove(removed_file)
             # Si el fitxer eliminat és el que s'està reproduint, para la reproducció
             if self.current_file == removed_file:
                 self.stop()
@@ -406,25 +4650,848 @@ class AudioPlayer:
             return True
         return False
 
-    def remove_file_by_path(self, file_path: str) -> bool:
-        """Elimina un fitxer de la llista per ruta."""
-        if file_path in self.files:
-            index = self.files.index(file_path)
-            return self.remove_file(index)
-        return False
+    def remove_files(self, file_paths: Iterable[str]) -> List[int]:
+        """Elimina diversos fitxers per ruta. Retorna els índexs que tenien, de gran a petit."""
+        removed = [path for path in file_paths if path in self.files]
+        indices = self.files.remove_many(removed)
+        for path in removed:
+            self.search_index.remove(path)
+        if self.current_file in removed:
+            self.stop()
+            self.current_file = None
+        return indices
+    
+    def remove_file_by_path(self, file_path: str) -> bool:
+        """Elimina un fitxer de la llista per ruta."""
+        if file_path in self.files:
+            return self.remove_file(self.files.index(file_path))
+        return False
+    
+    def import_folder(self, folder: str) -> FolderImport:
+        """Comença a importar (en segon pla) tots els fitxers d'àudio d'una carpeta i subcarpetes."""
+        return FolderImport(folder, self.EXTENSIONS)
+
+    def set_position(self, position_percent: float) -> bool:
+        """Estableix la posició de reproducció (només VLC)."""
+        if self.use_vlc and self.vlc_player:
+            self.vlc_player.set_position(position_percent)
+            return True
+        return False
+
+    def play_preloaded(self, file_path: str, channel_index: Optional[int] = None) -> bool:
+        """Reprodueix un so ja precarregat per sobre de la pista principal."""
+        sound = self.sound_bank.get(file_path)
+        if sound is None:
+            return False
+        if channel_index is None:
+            sound.play()
+        else:
+            channel = pygame.mixer.Channel(channel_index)
+            channel.set_volume(1.0)
+            channel.play(sound)
+        return True
+
+
+class CartSlot:
+    """Una posició del panell de carts."""
+    
+    __slots__ = ('index', 'hotkey', 'path')
+    
+    def __init__(self, index: int, hotkey: str, path: Optional[str] = None):
+        self.index = index
+        self.hotkey = hotkey
+        self.path = path
+
+
+class CartWall:
+    """Panell de carts: sons precarregats disparats amb tecles F1-F12.
+    
+    Cada cart té el seu canal reservat del mixer, de manera que diversos carts
+    poden sonar alhora per sobre de la pista principal.
+    """
+    
+    SLOTS = 12
+    
+    def __init__(self, player: AudioPlayer, config_path: Optional[str] = None):
+        self.player = player
+        self.bank = player.sound_bank
+        self.config_path = config_path or os.path.join(get_app_data_dir(), 'carts.json')
+        self.slots = [CartSlot(i, f"F{i + 1}") for i in range(self.SLOTS)]
+        self.last_latency: Optional[float] = None
+        self._channels_reserved = False
+        self._load_config()
+    
+    def _load_config(self) -> None:
+        """Llegeix les assignacions desades."""
+        try:
+            with open(self.config_path, 'r', encoding='utf-8') as f:
+                paths = json.load(f)
+        except (OSError, ValueError):
+            return
+        for slot, path in zip(self.slots, paths):
+            slot.path = path or None
+    
+    def _save_config(self) -> None:
+        """Desa les assignacions."""
+        try:
+            with open(self.config_path, 'w', encoding='utf-8') as f:
+                json.dump([slot.path for slot in self.slots], f, ensure_ascii=False)
+        except OSError as e:
+            print(f"No s'han pogut desar els carts: {e}")
+    
+    def preload_all(self, callback: Optional[Callable[[str, bool], None]] = None) -> None:
+        """Precarrega tots els carts assignats."""
+        for slot in self.slots:
+            if slot.path:
+                self.bank.preload(slot.path, callback)
+    
+    def assign(self, index: int, path: Optional[str],
+               callback: Optional[Callable[[str, bool], None]] = None) -> None:
+        """Assigna (o buida, amb None) un fitxer a un cart i el precarrega."""
+        slot = self.slots[index]
+        old_path = slot.path
+        slot.path = path
+        if old_path and old_path != path and all(s.path != old_path for s in self.slots):
+            self.bank.discard(old_path)
+        if path:
+            self.bank.preload(path, callback)
+        self._save_config()
+    
+    def _reserve_channels(self) -> bool:
+        """Reserva un canal del mixer per a cada cart."""
+        if self._channels_reserved:
+            return True
+        if not self.bank.ensure_mixer():
+            return False
+        pygame.mixer.set_num_channels(max(pygame.mixer.get_num_channels(), self.SLOTS + 8))
+        pygame.mixer.set_reserved(self.SLOTS)
+        self._channels_reserved = True
+        return True
+    
+    def trigger(self, index: int, started: Optional[float] = None) -> bool:
+        """Dispara un cart. `started` és l'instant perf_counter de la pulsació."""
+        if started is None:
+            started = time.perf_counter()
+        slot = self.slots[index]
+        if not slot.path or not self._reserve_channels():
+            return False
+        if not self.player.play_preloaded(slot.path, slot.index):
+            # No precarregat (p. ex. expulsat pel pressupost): es carrega i sona tard
+            self.bank.preload(slot.path, lambda path, ok: ok and self._play_late(slot, started))
+            return True
+        self.last_latency = time.perf_counter() - started + self.bank.buffer_latency
+        return True
+    
+    def _play_late(self, slot: CartSlot, started: float) -> None:
+        """Reprodueix un cart que s'ha hagut de carregar en disparar-lo."""
+        if self.player.play_preloaded(slot.path, slot.index):
+            self.last_latency = time.perf_counter() - started + self.bank.buffer_latency
+    
+    def is_playing(self, index: int) -> bool:
+        """Indica si el cart està sonant."""
+        return self._channels_reserved and pygame.mixer.Channel(index).get_busy()
+    
+    def stop(self, index: int) -> None:
+        """Atura un cart."""
+        if self._channels_reserved:
+            pygame.mixer.Channel(index).stop()
+    
+    def stop_all(self) -> None:
+        """Atura tots els carts."""
+        for slot in self.slots:
+            self.stop(slot.index)
+
+
+class CartWallWindow(tk.Toplevel):
+    """Finestra amb la graella de carts."""
+    
+    COLUMNS = 4
+    
+    def __init__(self, app: 'TimerApp'):
+        super().__init__(app.root)
+        self.app = app
+        self.cart_wall = app.cart_wall
+        self.title("Carts")
+        self.resizable(True, False)
+        self.protocol("WM_DELETE_WINDOW", self.close)
+        
+        style = ttk.Style()
+        style.configure("Cart.TButton", font=('Arial', 10, 'bold'), padding=8)
+        style.configure("CartOn.TButton", font=('Arial', 10, 'bold'), padding=8, foreground='red')
+        
+        frame = ttk.Frame(self, padding="10")
+        frame.pack(fill=tk.BOTH, expand=True)
+        self.buttons: List[ttk.Button] = []
+        for slot in self.cart_wall.slots:
+            button = ttk.Button(frame, style="Cart.TButton", width=18,
+                                command=lambda i=slot.index: self.app.fire_cart(i))
+            button.grid(row=slot.index // self.COLUMNS, column=slot.index % self.COLUMNS,
+                        padx=3, pady=3, sticky=(tk.W, tk.E))
+            button.bind('<Button-3>', lambda event, i=slot.index: self._show_menu(event, i))
+            self.buttons.append(button)
+        for column in range(self.COLUMNS):
+            frame.columnconfigure(column, weight=1)
+        
+        bottom = ttk.Frame(frame)
+        bottom.grid(row=self.cart_wall.SLOTS // self.COLUMNS + 1, column=0, 
+                    columnspan=self.COLUMNS, sticky=(tk.W, tk.E), pady=(10, 0))
+        bottom.columnconfigure(0, weight=1)
+        self.status_var = tk.StringVar()
+        ttk.Label(bottom, textvariable=self.status_var, font=('Arial', 9)).grid(row=0, column=0, sticky=tk.W)
+        ttk.Button(bottom, text="Parar carts", command=self.cart_wall.stop_all).grid(row=0, column=1)
+        
+        self._playing = [False] * self.cart_wall.SLOTS
+        self.refresh_labels()
+        self.refresh()
+    
+    def _show_menu(self, event, index: int) -> None:
+        """Menú contextual d'un cart."""
+        menu = tk.Menu(self, tearoff=0)
+        menu.add_command(label="Assignar fitxer...", command=lambda: self._assign_file(index))
+        menu.add_command(label="Assignar el seleccionat de la llista",
+                         command=lambda: self._assign_selected(index))
+        menu.add_separator()
+        menu.add_command(label="Buidar", command=lambda: self._assign(index, None))
+        menu.post(event.x_root, event.y_root)
+    
+    def _assign_file(self, index: int) -> None:
+        """Tria un fitxer per al cart."""
+        path = filedialog.askopenfilename(
+            parent=self, title="Fitxer del cart",
+            filetypes=[("Fitxers d'àudio", "*.mp3 *.wav *.ogg"), ("Tots els fitxers", "*.*")]
+        )
+        if path:
+            self._assign(index, path)
+    
+    def _assign_selected(self, index: int) -> None:
+        """Assigna el fitxer seleccionat a la llista d'àudio."""
+        file_path = self.app.selected_audio_path()
+        if file_path is None:
+            messagebox.showwarning("Avís", "Selecciona un fitxer a la llista.", parent=self)
+            return
+        self._assign(index, file_path)
+    
+    def _assign(self, index: int, path: Optional[str]) -> None:
+        """Assigna un fitxer i refresca la graella."""
+        self.cart_wall.assign(index, path, lambda p, ok: self.refresh_labels())
+        self.refresh_labels()
+    
+    def refresh_labels(self) -> None:
+        """Actualitza el text dels botons."""
+        for slot, button in zip(self.cart_wall.slots, self.buttons):
+            name = os.path.splitext(os.path.basename(slot.path))[0] if slot.path else "—"
+            if len(name) > 18:
+                name = name[:16] + "…"
+            ready = "" if not slot.path or self.cart_wall.bank.get(slot.path) is not None else " ⏳"
+            button.configure(text=f"{slot.hotkey}{ready}\n{name}")
+    
+    def refresh(self, now: Optional[float] = None) -> None:
+        """Actualitza l'estat dels carts que sonen, la memòria i la latència."""
+        for index, button in enumerate(self.buttons):
+            playing = self.cart_wall.is_playing(index)
+            if playing != self._playing[index]:
+                self._playing[index] = playing
+                button.configure(style="CartOn.TButton" if playing else "Cart.TButton")
+        bank = self.cart_wall.bank
+        latency = self.cart_wall.last_latency
+        latency_text = f"{latency * 1000:.1f} ms" if latency is not None else "--"
+        self.status_var.set(
+            f"Memòria: {bank.used / 1048576:.0f}/{bank.budget / 1048576:.0f} MB · "
+            f"Latència últim cart: {latency_text}"
+        )
+    
+    def close(self) -> None:
+        """Tanca la finestra (els carts continuen disponibles amb les tecles)."""
+        self.app.cart_window = None
+        self.destroy()
+
+
+class ProgramHistoryWindow(tk.Toplevel):
+    """Finestra d'historial: llista filtrable de programes arxivats i agregats per secció."""
+    
+    def __init__(self, app: 'TimerApp'):
+        super().__init__(app.root)
+        self.app = app
+        self.archive = app.archive
+        self.title("Historial de programes")
+        self.geometry("900x600")
+        self.protocol("WM_DELETE_WINDOW", self.close)
+        self._refresh_job = None
+        
+        frame = ttk.Frame(self, padding="10")
+        frame.pack(fill=tk.BOTH, expand=True)
+        frame.columnconfigure(0, weight=3)
+        frame.columnconfigure(1, weight=2)
+        frame.rowconfigure(1, weight=1)
+        
+        # Filtres
+        filters = ttk.Frame(frame)
+        filters.grid(row=0, column=0, columnspan=2, sticky=(tk.W, tk.E), pady=(0, 10))
+        self.number_var = tk.StringVar()
+        self.date_from_var = tk.StringVar()
+        self.date_to_var = tk.StringVar()
+        self.section_var = tk.StringVar()
+        for column, (label, variable, width) in enumerate((
+            ("Programa:", self.number_var, 6), ("Des de (AAAA-MM-DD):", self.date_from_var, 11),
+            ("Fins a:", self.date_to_var, 11), ("Secció:", self.section_var, 18),
+        )):
+            ttk.Label(filters, text=label).grid(row=0, column=column * 2, padx=(10 if column else 0, 3))
+            ttk.Entry(filters, textvariable=variable, width=width).grid(row=0, column=column * 2 + 1)
+            variable.trace_add('write', lambda *args: self._schedule_refresh())
+        
+        # Programes
+        self.programs_tree = ttk.Treeview(frame, columns=('number', 'date', 'count', 'total', 'diff'),
+                                          show='headings', selectmode='browse')
+        for column, text, width in (('number', "Programa", 80), ('date', "Data", 100), ('count', "Seccions", 70),
+                                    ('total', "Total", 70), ('diff', "Vs objectiu", 80)):
+            self.programs_tree.heading(column, text=text)
+            self.programs_tree.column(column, width=width, anchor=tk.CENTER)
+        self.programs_tree.grid(row=1, column=0, sticky=(tk.W, tk.E, tk.N, tk.S), padx=(0, 10))
+        self.programs_tree.bind('<<TreeviewSelect>>', self._on_program_selected)
+        
+        # Seccions del programa seleccionat
+        self.sections_tree = ttk.Treeview(frame, columns=('name', 'duration'), show='headings')
+        self.sections_tree.heading('name', text="Secció")
+        self.sections_tree.heading('duration', text="Durada")
+        self.sections_tree.column('duration', width=70, anchor=tk.CENTER)
+        self.sections_tree.grid(row=1, column=1, sticky=(tk.W, tk.E, tk.N, tk.S))
+        
+        # Agregats
+        stats = ttk.Frame(frame)
+        stats.grid(row=2, column=0, columnspan=2, sticky=(tk.W, tk.E), pady=(10, 0))
+        self.last_n_var = tk.StringVar(value="50")
+        ttk.Label(stats, text="Últims").grid(row=0, column=0)
+        ttk.Spinbox(stats, from_=1, to=10000, textvariable=self.last_n_var, width=6,
+                    command=self._schedule_refresh).grid(row=0, column=1, padx=3)
+        ttk.Label(stats, text="programes:").grid(row=0, column=2)
+        self.stats_var = tk.StringVar()
+        ttk.Label(stats, textvariable=self.stats_var, font=('Arial', 10, 'bold')).grid(row=0, column=3, padx=(10, 0))
+        self.last_n_var.trace_add('write', lambda *args: self._schedule_refresh())
+        
+        # Exportació de tots els programes filtrats
+        stats.columnconfigure(4, weight=1)
+        self._export_labels = {formatter.label: formatter for formatter in EXPORT_FORMATTERS.values()}
+        self.export_format_var = tk.StringVar(value=get_formatter("csv").label)
+        ttk.Combobox(stats, textvariable=self.export_format_var, values=list(self._export_labels),
+                     state='readonly', width=10).grid(row=0, column=5, padx=(10, 3))
+        self.export_button = ttk.Button(stats, text="Exportar...", command=self.export_filtered)
+        self.export_button.grid(row=0, column=6)
+        
+        self.refresh()
+    
+    def _schedule_refresh(self) -> None:
+        """Agrupa les pulsacions de tecla dels filtres en una sola consulta."""
+        if self._refresh_job is not None:
+            self.after_cancel(self._refresh_job)
+        self._refresh_job = self.after(150, self.refresh)
+    
+    def refresh(self) -> None:
+        """Torna a consultar l'arxiu amb els filtres actuals."""
+        self._refresh_job = None
+        rows = self.archive.query_programs(
+            self.number_var.get().strip(), self.date_from_var.get().strip(),
+            self.date_to_var.get().strip(), self.section_var.get().strip()
+        )
+        self.programs_tree.delete(*self.programs_tree.get_children())
+        format_time = PrecisionTimer.format_time
+        for program_id, number, date, count, total, target in rows:
+            diff = total - target
+            sign = "+" if diff > 0 else "-" if diff < 0 else ""
+            self.programs_tree.insert('', 'end', iid=f"p{program_id}", values=(
+                number, date, count, format_time(total), f"{sign}{format_time(abs(diff))}"))
+        self.sections_tree.delete(*self.sections_tree.get_children())
+        self._update_stats(len(rows))
+    
+    def _update_stats(self, shown: int) -> None:
+        """Mostra els agregats de la secció filtrada."""
+        name = self.section_var.get().strip()
+        if not name:
+            self.stats_var.set(f"{shown} programes")
+            return
+        try:
+            last_n = max(1, int(self.last_n_var.get()))
+        except ValueError:
+            return
+        count, average, minimum, maximum = self.archive.section_stats(name, last_n)
+        if not count:
+            self.stats_var.set(f"«{name}»: cap coincidència exacta")
+            return
+        format_time = PrecisionTimer.format_time
+        self.stats_var.set(
+            f"«{name}»: {count} vegades · mitjana {format_time(round(average))} · "
+            f"mín {format_time(minimum)} · màx {format_time(maximum)}"
+        )
+    
+    def export_filtered(self) -> None:
+        """Exporta tots els programes que passen els filtres a un fitxer (en segon pla)."""
+        formatter = self._export_labels[self.export_format_var.get()]
+        path = filedialog.asksaveasfilename(
+            parent=self, title="Exportar historial", defaultextension=formatter.extension,
+            initialfile=f"historial{formatter.extension}",
+            filetypes=[(formatter.label, f"*{formatter.extension}"), ("Tots els arxius", "*.*")])
+        if not path:
+            return
+        filters = (self.number_var.get().strip(), self.date_from_var.get().strip(),
+                   self.date_to_var.get().strip(), self.section_var.get().strip())
+        archive, dispatcher = self.archive, self.app.dispatcher
+        self.export_button.configure(state='disabled')
+        
+        def work():
+            try:
+                with open(path, 'w', encoding='utf-8', newline='') as f:
+                    count = export_programs(archive.iter_records(*filters), formatter, f)
+                dispatcher.post(self._on_exported, path, count, None)
+            except (OSError, sqlite3.Error) as e:
+                dispatcher.post(self._on_exported, path, 0, e)
+        
+        threading.Thread(target=work, name="history-export", daemon=True).start()
+    
+    def _on_exported(self, path: str, count: int, error: Optional[Exception]) -> None:
+        """Resultat de l'exportació (fil de Tk)."""
+        if not self.winfo_exists():
+            return
+        self.export_button.configure(state='normal')
+        if error is not None:
+            messagebox.showerror("Error", f"No s'ha pogut exportar: {error}", parent=self)
+        else:
+            messagebox.showinfo("OK", f"{count} programes exportats a {os.path.basename(path)}", parent=self)
+    
+    def _on_program_selected(self, event) -> None:
+        """Mostra les seccions del programa seleccionat."""
+        selection = self.programs_tree.selection()
+        self.sections_tree.delete(*self.sections_tree.get_children())
+        if not selection:
+            return
+        for name, duration in self.archive.get_sections(int(selection[0][1:])):
+            self.sections_tree.insert('', 'end', values=(name, PrecisionTimer.format_time(duration)))
+    
+    def close(self) -> None:
+        """Tanca la finestra."""
+        self.app.history_window = None
+        self.destroy()
+
+
+class RundownWindow(tk.Toplevel):
+    """Finestra de l'escaleta: previst vs real, deriva acumulada i inicis previstos."""
+    
+    def __init__(self, app: 'TimerApp'):
+        super().__init__(app.root)
+        self.app = app
+        self.rundown = app.rundown
+        self.title("Escaleta")
+        self.geometry("820x520")
+        self.protocol("WM_DELETE_WINDOW", self.close)
+        self._rendered_version = -1
+        self._row_values: Dict[str, tuple] = {}
+        
+        frame = ttk.Frame(self, padding="10")
+        frame.pack(fill=tk.BOTH, expand=True)
+        frame.columnconfigure(0, weight=1)
+        frame.rowconfigure(1, weight=1)
+        
+        top = ttk.Frame(frame)
+        top.grid(row=0, column=0, sticky=(tk.W, tk.E), pady=(0, 10))
+        top.columnconfigure(2, weight=1)
+        ttk.Button(top, text="Carregar...", command=self.load_file).grid(row=0, column=0)
+        ttk.Button(top, text="Buidar", command=lambda: self._set_items([])).grid(row=0, column=1, padx=(5, 0))
+        self.status_var = tk.StringVar()
+        self.status_label = ttk.Label(top, textvariable=self.status_var, font=('Arial', 11, 'bold'))
+        self.status_label.grid(row=0, column=2, sticky=tk.E)
+        
+        columns = (('num', "Nº", 40), ('name', "Element", 220), ('planned', "Previst", 70),
+                   ('actual', "Real", 70), ('delta', "Diferència", 80), ('drift', "Deriva", 80),
+                   ('start', "Inici previst", 90), ('projected', "Inici estimat", 90))
+        self.tree = ttk.Treeview(frame, columns=[c[0] for c in columns], show='headings')
+        for column, text, width in columns:
+            self.tree.heading(column, text=text)
+            self.tree.column(column, width=width, anchor=tk.W if column == 'name' else tk.CENTER)
+        scrollbar = ttk.Scrollbar(frame, orient=tk.VERTICAL, command=self.tree.yview)
+        self.tree.configure(yscrollcommand=scrollbar.set)
+        self.tree.grid(row=1, column=0, sticky=(tk.W, tk.E, tk.N, tk.S))
+        scrollbar.grid(row=1, column=1, sticky=(tk.N, tk.S))
+        self.tree.tag_configure('over', foreground='red')
+        self.tree.tag_configure('under', foreground='green')
+        self.tree.tag_configure('current', background='#fff3c4')
+        self.reconciler = TreeviewReconciler(self.tree)
+    
+    def load_file(self) -> None:
+        """Carrega una escaleta des d'un fitxer de text."""
+        path = filedialog.askopenfilename(
+            parent=self, title="Carregar escaleta",
+            filetypes=[("Text", "*.txt *.csv"), ("Tots els fitxers", "*.*")]
+        )
+        if not path:
+            return
+        try:
+            with open(path, 'r', encoding='utf-8-sig') as f:
+                items = Rundown.parse_text(f.read())
+        except (OSError, UnicodeDecodeError, ValueError) as e:
+            messagebox.showerror("Error", f"No s'ha pogut llegir l'escaleta:\n{e}", parent=self)
+            return
+        self._set_items(items)
+    
+    def _set_items(self, items: List[Tuple[str, int]]) -> None:
+        """Substitueix l'escaleta."""
+        self.rundown.set_items(items)
+        self.app.scheduler.wake('rundown')
+    
+    @staticmethod
+    def _signed(seconds: Optional[int]) -> str:
+        """Formata una diferència amb signe."""
+        if seconds is None:
+            return ""
+        sign = "+" if seconds > 0 else "-" if seconds < 0 else ""
+        return f"{sign}{PrecisionTimer.format_time(abs(seconds))}"
+    
+    def refresh(self, now: Optional[float] = None) -> None:
+        """Actualitza la deriva en directe i, si el model ha canviat, les files."""
+        rundown = self.rundown
+        timer = self.app.timer
+        elapsed = timer.get_current_time(now)
+        done = len(rundown.actual)
+        format_time = timer.format_time
+        
+        if rundown.version != self._rendered_version:
+            self._rendered_version = rundown.version
+            rows = []
+            for index in range(len(rundown)):
+                planned = rundown.planned[index] if index < len(rundown.planned) else None
+                actual = rundown.actual[index] if index < done else None
+                delta = rundown.delta(index)
+                tags = ('over',) if delta and delta > 0 else ('under',) if delta and delta < 0 else ()
+                name = rundown.names[index] if index < len(rundown.names) else timer.sections[index].name
+                rows.append((f"r{index}", (
+                    index + 1, name,
+                    format_time(planned) if planned is not None else "",
+                    format_time(actual) if actual is not None else "",
+                    self._signed(delta),
+                    self._signed(rundown.drift(index + 1)) if index < done else "",
+                    format_time(rundown.planned_start(index)) if planned is not None else "",
+                    "",
+                ), tags))
+            self.reconciler.reconcile(rows)
+            self._row_values = {iid: values for iid, values, _ in rows}
+        
+        # Inicis estimats dels elements pendents (depenen del temps en curs)
+        for index in range(done, len(rundown.names)):
+            iid = f"r{index}"
+            values = self._row_values[iid][:7] + (format_time(rundown.projected_start(index, elapsed)),)
+            self.reconciler.update(iid, values, ('current',) if index == done else ())
+        
+        drift = rundown.drift()
+        if done < len(rundown.names):
+            drift += max(0, elapsed - rundown.planned[done])
+            next_text = f" · En curs: {rundown.names[done]}"
+        else:
+            next_text = ""
+        self.status_var.set(f"Deriva: {self._signed(drift) or '00:00'}{next_text}")
+        self.status_label.configure(foreground='red' if drift > 0 else 'green')
+    
+    def close(self) -> None:
+        """Tanca la finestra."""
+        self.app.rundown_window = None
+        self.destroy()
+
+
+class CountersWindow(tk.Toplevel):
+    """Tira compacta amb tots els comptadors auxiliars."""
+    
+    MODES = (("Compte enrere", Counter.DOWN), ("Cronòmetre", Counter.UP), ("Des de l'hora en punt", Counter.HOUR))
+    
+    def __init__(self, app: 'TimerApp'):
+        super().__init__(app.root)
+        self.app = app
+        self.counters = app.counters
+        self.title("Comptadors")
+        self.resizable(True, False)
+        self.protocol("WM_DELETE_WINDOW", self.close)
+        self._rendered_version = -1
+        self._rows: Dict[int, Tuple[tk.Label, ttk.Button]] = {}
+        
+        frame = ttk.Frame(self, padding="10")
+        frame.pack(fill=tk.BOTH, expand=True)
+        frame.columnconfigure(0, weight=1)
+        
+        top = ttk.Frame(frame)
+        top.grid(row=0, column=0, sticky=(tk.W, tk.E), pady=(0, 10))
+        self.name_var = tk.StringVar(value="Publicitat")
+        self.duration_var = tk.StringVar(value="02:00")
+        ttk.Label(top, text="Nom:").grid(row=0, column=0)
+        ttk.Entry(top, textvariable=self.name_var, width=14).grid(row=0, column=1, padx=(3, 10))
+        ttk.Label(top, text="Durada:").grid(row=0, column=2)
+        ttk.Entry(top, textvariable=self.duration_var, width=6).grid(row=0, column=3, padx=(3, 10))
+        for column, (text, mode) in enumerate(self.MODES, start=4):
+            ttk.Button(top, text=text, command=lambda m=mode: self.add(m)).grid(row=0, column=column, padx=2)
+        
+        self.rows_frame = ttk.Frame(frame)
+        self.rows_frame.grid(row=1, column=0, sticky=(tk.W, tk.E))
+        self.rows_frame.columnconfigure(1, weight=1)
+        self.rebuild()
+    
+    def add(self, mode: str) -> None:
+        """Afegeix un comptador amb el nom i la durada del formulari."""
+        duration = 0
+        if mode == Counter.DOWN:
+            try:
+                duration = Rundown.parse_duration(self.duration_var.get())
+            except ValueError:
+                messagebox.showerror("Error", "Durada no vàlida (MM:SS)", parent=self)
+                return
+        label = self.name_var.get().strip() or next(text for text, m in self.MODES if m == mode)
+        self.counters.add(label, mode, duration, time.perf_counter())
+        self.rebuild()
+        self.app.show_counters()
+    
+    def rebuild(self) -> None:
+        """Torna a crear les files si s'han afegit o tret comptadors."""
+        if self.counters.version == self._rendered_version:
+            return
+        self._rendered_version = self.counters.version
+        for child in self.rows_frame.winfo_children():
+            child.destroy()
+        self._rows.clear()
+        for row, counter in enumerate(self.counters):
+            ttk.Label(self.rows_frame, text=counter.label, width=18).grid(row=row, column=0, sticky=tk.W)
+            value = tk.Label(self.rows_frame, font=('Courier New', 18, 'bold'), anchor=tk.E)
+            value.grid(row=row, column=1, sticky=(tk.W, tk.E), padx=10)
+            toggle = ttk.Button(self.rows_frame, width=3, command=lambda c=counter: self.app.toggle_counter(c))
+            if counter.mode == Counter.HOUR:
+                toggle.state(['disabled'])
+            toggle.grid(row=row, column=2)
+            ttk.Button(self.rows_frame, text="↺", width=3,
+                       command=lambda c=counter: self.app.reset_counter(c)).grid(row=row, column=3)
+            ttk.Button(self.rows_frame, text="⤢", width=3,
+                       command=lambda c=counter: self.app.pop_out_counter(c)).grid(row=row, column=4)
+            ttk.Button(self.rows_frame, text="✕", width=3,
+                       command=lambda c=counter: self.app.remove_counter(c)).grid(row=row, column=5)
+            self._rows[counter.id] = (value, toggle)
+            counter.shown = None  # Les files noves es pinten al pròxim tick
+    
+    def show(self, counter: Counter, text: str, color: str) -> None:
+        """Pinta el valor d'un comptador."""
+        row = self._rows.get(counter.id)
+        if row is not None:
+            row[0].configure(text=text, foreground=color)
+            row[1].configure(text="⏸" if counter.is_running else "▶")
+    
+    def close(self) -> None:
+        """Tanca la finestra (els comptadors continuen comptant)."""
+        self.app.counters_window = None
+        self.destroy()
+
+
+class CounterWindow(tk.Toplevel):
+    """Finestra pròpia i gran d'un sol comptador."""
+    
+    def __init__(self, app: 'TimerApp', counter: Counter):
+        super().__init__(app.root)
+        self.app = app
+        self.counter = counter
+        self.title(counter.label)
+        self.protocol("WM_DELETE_WINDOW", self.close)
+        ttk.Label(self, text=counter.label, font=('Arial', 14, 'bold')).pack(pady=(10, 0))
+        self.value_label = tk.Label(self, font=('Courier New', 64, 'bold'))
+        self.value_label.pack(padx=20, pady=(0, 10))
+        counter.shown = None
+    
+    def show(self, counter: Counter, text: str, color: str) -> None:
+        """Pinta el valor."""
+        self.value_label.configure(text=text, foreground=color)
+    
+    def close(self) -> None:
+        """Tanca la finestra."""
+        self.app.counter_windows.pop(self.counter.id, None)
+        self.destroy()
+
+
+class CuesWindow(tk.Toplevel):
+    """Finestra dels automatismes d'àudio."""
+    
+    TRIGGERS = (("Temps restant", Cue.REMAINING), ("Total del programa", Cue.TOTAL))
+    ACTIONS = (("Reproduir fitxer", Cue.PLAY), ("Fosa de la llista", Cue.FADE), ("Parar àudio", Cue.STOP))
+    
+    def __init__(self, app: 'TimerApp'):
+        super().__init__(app.root)
+        self.app = app
+        self.engine = app.cues
+        self.title("Automatismes")
+        self.geometry("760x400")
+        self.protocol("WM_DELETE_WINDOW", self.close)
+        self._path: Optional[str] = None
+        
+        frame = ttk.Frame(self, padding="10")
+        frame.pack(fill=tk.BOTH, expand=True)
+        frame.columnconfigure(0, weight=1)
+        frame.rowconfigure(1, weight=1)
+        
+        form = ttk.Frame(frame)
+        form.grid(row=0, column=0, sticky=(tk.W, tk.E), pady=(0, 10))
+        self.trigger_var = tk.StringVar(value=self.TRIGGERS[0][0])
+        self.at_var = tk.StringVar(value="00:30")
+        self.action_var = tk.StringVar(value=self.ACTIONS[0][0])
+        self.fade_var = tk.StringVar(value="3")
+        self.file_var = tk.StringVar(value="(cap fitxer)")
+        ttk.Combobox(form, textvariable=self.trigger_var, values=[t for t, _ in self.TRIGGERS],
+                     state='readonly', width=17).grid(row=0, column=0)
+        ttk.Label(form, text="=").grid(row=0, column=1, padx=3)
+        ttk.Entry(form, textvariable=self.at_var, width=7).grid(row=0, column=2)
+        ttk.Label(form, text="→").grid(row=0, column=3, padx=3)
+        ttk.Combobox(form, textvariable=self.action_var, values=[a for a, _ in self.ACTIONS],
+                     state='readonly', width=16).grid(row=0, column=4)
+        ttk.Button(form, text="Fitxer...", command=self._choose_file).grid(row=0, column=5, padx=(5, 0))
+        ttk.Label(form, text="Fosa (s):").grid(row=0, column=6, padx=(10, 3))
+        ttk.Entry(form, textvariable=self.fade_var, width=4).grid(row=0, column=7)
+        ttk.Button(form, text="Afegir", command=self.add).grid(row=0, column=8, padx=(10, 0))
+        ttk.Label(form, textvariable=self.file_var, font=('Arial', 8), foreground='gray').grid(
+            row=1, column=0, columnspan=9, sticky=tk.W)
+        
+        columns = (('trigger', "Disparador", 170), ('action', "Acció", 130),
+                   ('file', "Fitxer", 220), ('state', "Estat", 150))
+        self.tree = ttk.Treeview(frame, columns=[c[0] for c in columns], show='headings')
+        for column, text, width in columns:
+            self.tree.heading(column, text=text)
+            self.tree.column(column, width=width, anchor=tk.W if column == 'file' else tk.CENTER)
+        self.tree.tag_configure('fired', foreground='green')
+        self.tree.tag_configure('missed', foreground='red')
+        self.tree.grid(row=1, column=0, sticky=(tk.W, tk.E, tk.N, tk.S))
+        self.reconciler = TreeviewReconciler(self.tree)
+        
+        bottom = ttk.Frame(frame)
+        bottom.grid(row=2, column=0, sticky=(tk.W, tk.E), pady=(10, 0))
+        ttk.Button(bottom, text="Eliminar", command=self.remove_selected).pack(side=tk.LEFT)
+        ttk.Button(bottom, text="Rearmar tots", command=self.rearm).pack(side=tk.LEFT, padx=5)
+        self.refresh()
+    
+    def _choose_file(self) -> None:
+        """Tria el fitxer a reproduir."""
+        path = filedialog.askopenfilename(
+            parent=self, title="Fitxer de l'automatisme",
+            filetypes=[("Fitxers d'àudio", "*.mp3 *.wav *.ogg"), ("Tots els fitxers", "*.*")]
+        )
+        if path:
+            self._path = path
+            self.file_var.set(path)
+    
+    def add(self) -> None:
+        """Afegeix l'automatisme del formulari."""
+        trigger = dict(self.TRIGGERS)[self.trigger_var.get()]
+        action = dict(self.ACTIONS)[self.action_var.get()]
+        try:
+            at = Rundown.parse_duration(self.at_var.get())
+            fade = max(0.0, float(self.fade_var.get().replace(',', '.')))
+        except ValueError:
+            messagebox.showerror("Error", "Temps no vàlid (MM:SS) o fosa no vàlida", parent=self)
+            return
+        if action == Cue.PLAY and not self._path:
+            messagebox.showwarning("Avís", "Tria el fitxer a reproduir", parent=self)
+            return
+        cue = self.engine.add(trigger, at, action, self._path if action == Cue.PLAY else None, fade)
+        self.app.cue_added(cue)
+    
+    def remove_selected(self) -> None:
+        """Elimina els automatismes seleccionats."""
+        for iid in self.tree.selection():
+            self.engine.remove(int(iid[1:]))
+        self.app.scheduler.wake('cues')
+    
+    def rearm(self) -> None:
+        """Torna a deixar pendents tots els automatismes."""
+        self.engine.rearm()
+        self.app.scheduler.wake('cues')
+    
+    def refresh(self, now: Optional[float] = None) -> None:
+        """Actualitza la llista (el compte enrere dels pendents canvia cada segon)."""
+        engine = self.engine
+        program_time = engine.program_time(now)
+        format_time = PrecisionTimer.format_time
+        triggers = {value: text for text, value in self.TRIGGERS}
+        actions = {value: text for text, value in self.ACTIONS}
+        rows = []
+        for cue in sorted(engine.cues.values(), key=engine.key):
+            if cue.state == Cue.FIRED:
+                state, tags = f"Disparat ({cue.error * 1000:+.0f} ms)", ('fired',)
+            elif cue.state == Cue.MISSED:
+                state, tags = "Perdut", ('missed',)
+            else:
+                state, tags = f"Pendent · en {format_time(max(0, engine.key(cue) - program_time))}", ()
+            action = actions[cue.action]
+            if cue.action == Cue.FADE:
+                action = f"{action} ({cue.fade:g} s)"
+            rows.append((f"c{cue.id}", (f"{triggers[cue.trigger]} = {format_time(cue.at)}", action,
+                                        os.path.basename(cue.path) if cue.path else "", state), tags))
+        self.reconciler.reconcile(rows)
+    
+    def close(self) -> None:
+        """Tanca la finestra."""
+        self.app.cues_window = None
+        self.destroy()
+
 
-    def set_position(self, position_percent: float) -> bool:
-        """Estableix la posició de reproducció (només VLC)."""
-        if self.use_vlc and self.vlc_player:
-            self.vlc_player.set_position(position_percent)
-            return True
-        return False
+class WatchFoldersWindow(tk.Toplevel):
+    """Finestra de les carpetes vigilades i del cost de vigilar-les."""
+    
+    def __init__(self, app: 'TimerApp'):
+        super().__init__(app.root)
+        self.app = app
+        self.watcher = app.folder_watcher
+        self.title("Carpetes vigilades")
+        self.geometry("640x300")
+        self.protocol("WM_DELETE_WINDOW", self.close)
+        
+        frame = ttk.Frame(self, padding="10")
+        frame.pack(fill=tk.BOTH, expand=True)
+        frame.columnconfigure(0, weight=1)
+        frame.rowconfigure(0, weight=1)
+        
+        columns = (('folder', "Carpeta", 360), ('dirs', "Directoris", 80),
+                   ('files', "Fitxers", 80), ('mode', "Mode", 80))
+        self.tree = ttk.Treeview(frame, columns=[c[0] for c in columns], show='headings')
+        for column, text, width in columns:
+            self.tree.heading(column, text=text)
+            self.tree.column(column, width=width, anchor=tk.W if column == 'folder' else tk.CENTER)
+        self.tree.grid(row=0, column=0, sticky=(tk.W, tk.E, tk.N, tk.S))
+        self.reconciler = TreeviewReconciler(self.tree)
+        
+        bottom = ttk.Frame(frame)
+        bottom.grid(row=1, column=0, sticky=(tk.W, tk.E), pady=(10, 0))
+        ttk.Button(bottom, text="Afegir carpeta...", command=self.add).pack(side=tk.LEFT)
+        ttk.Button(bottom, text="Deixar de vigilar", command=self.remove_selected).pack(side=tk.LEFT, padx=5)
+        ttk.Label(bottom, textvariable=app.watch_status_var, font=('Arial', 8),
+                  foreground='gray').pack(side=tk.RIGHT)
+        self.refresh()
+    
+    def add(self) -> None:
+        """Tria una carpeta i la comença a vigilar."""
+        folder = filedialog.askdirectory(parent=self, title="Carpeta a vigilar")
+        if folder:
+            self.app.watch_folder(folder)
+    
+    def remove_selected(self) -> None:
+        """Deixa de vigilar les carpetes seleccionades."""
+        # Primer les rutes: en treure'n una, les posicions de les altres canvien
+        for folder in [self.tree.set(iid, 'folder') for iid in self.tree.selection()]:
+            self.watcher.remove_folder(folder)
+        self.refresh()
+    
+    def refresh(self) -> None:
+        """Actualitza la llista amb les xifres de l'última passada del fil."""
+        rows = []
+        for index, folder in enumerate(list(self.watcher.folders)):
+            dirs, files, mode = self.watcher.root_stats.get(folder, (0, 0, "..."))
+            rows.append((f"w{index}", (folder, dirs, files, mode), ()))
+        self.reconciler.reconcile(rows)
+    
+    def close(self) -> None:
+        """Tanca la finestra."""
+        self.app.watch_folders_window = None
+        self.destroy()
 
 
 class TimerApp:
     """Aplicació principal del timer."""
     
-    def __init__(self, root):
+    def __init__(self, root, remote_address: Optional[Tuple[str, int]] = ("127.0.0.1", RemoteControlServer.DEFAULT_PORT),
+                 broadcast_address: Optional[Tuple[str, int]] = None):
         self.root = root
         self.root.title("Aplicatiu LA RENAIXENÇA")
         self.root.geometry("1200x900")
@@ -433,18 +5500,74 @@ class TimerApp:
         # Variables d'estat
         self.drag_data = {"item": "", "y": 0}
         self.guest_name_var = tk.StringVar()
-        self._update_job = None
-        self._audio_update_job = None
+        self._sections_dirty = True
+        self._dirty_section_rows: set = set()
+        self._broadcast_clock_changed = True
         
         # Components principals
+        self.scheduler = FrameScheduler(self.root)
+        self.dispatcher = UiDispatcher()
+        self.dispatcher.waker = self._wake_dispatch_from_thread
+        self.root.bind('<<DispatchNow>>', lambda event: self.scheduler.wake('dispatch'))
         self.timer = PrecisionTimer()
+        self.timer.subscribe(self._on_timer_changed)
+        self.journal = SessionJournal(self.timer)
+        try:
+            self.archive: Optional[ProgramArchive] = ProgramArchive()
+        except (OSError, sqlite3.Error) as e:
+            print(f"Historial de programes no disponible: {e}")
+            self.archive = None
+        self.forecaster = SectionForecaster(self.timer)
+        self.timer.subscribe(self.forecaster.on_timer_changed)
+        self.rundown = Rundown(self.timer)
+        self.timer.subscribe(self.rundown.on_timer_changed)
+        self.rundown_window: Optional[RundownWindow] = None
+        self.counters = CounterBank()
+        self.counters_window: Optional[CountersWindow] = None
+        self.counter_windows: Dict[int, CounterWindow] = {}
+        self.cues = CueEngine(self.timer)
+        self.timer.subscribe(self.cues.on_timer_changed)
+        self.cues_window: Optional[CuesWindow] = None
+        self._folder_import: Optional[FolderImport] = None
+        self._folder_import_added: int = 0
+        self._audio_search_query: Optional[str] = None  # None: es mostra la llista sencera
+        self.folder_watcher = FolderWatcher(AudioPlayer.EXTENSIONS)
+        self.watch_folders_window: Optional[WatchFoldersWindow] = None
+        self._watch_cost: Tuple[float, float, int] = (time.perf_counter(), 0.0, 0)  # (instant, CPU, E/S)
+        self._watch_backlog: List[str] = []  # Fitxers trobats en començar a vigilar, pendents d'afegir
+        self._fade: Optional[Tuple[float, float, float]] = None  # (inici, durada, volum inicial)
+        self.history_window: Optional[ProgramHistoryWindow] = None
         self.audio_player = AudioPlayer()
         self.audio_player.media_ended_callback = self._on_audio_playback_ended
+        self.audio_player.duration_callback = self._on_audio_duration
+        self.audio_player.dispatcher = self.dispatcher
+        self.audio_player.initialize_async()
+        self.audio_player.sound_bank.dispatcher = self.dispatcher
+        self.waveform_store = WaveformStore(self.audio_player.metadata_cache, self.dispatcher)
+        self.cart_wall = CartWall(self.audio_player)
+        self.cart_window: Optional[CartWallWindow] = None
+        self._audio_state_shown: Optional[str] = None
         
         # Inicialització
-        self.ask_program_number()
+        recovered = self.offer_session_recovery()
+        self.journal.start()
+        if not recovered:
+            self.ask_program_number()
         self.setup_ui()
         self._start_update_loops()
+        self.refresh_forecast()
+        self.remote_server: Optional[RemoteControlServer] = None
+        if remote_address is not None:
+            self.remote_server = RemoteControlServer(self.handle_remote_command, self.dispatcher, *remote_address)
+            self.remote_server.start()
+        self.publisher: Optional[StatePublisher] = None
+        if broadcast_address is not None:
+            try:
+                self.publisher = StatePublisher(*broadcast_address)
+            except OSError as e:
+                print(f"No s'ha pogut obrir la difusió de l'estat: {e}")
+            else:
+                self.scheduler.add_task('broadcast', self.broadcast_state, period=0.1, priority=4, throttle=False)
         self.root.focus_set()
     
     def ask_program_number(self) -> None:
@@ -457,12 +5580,12 @@ class TimerApp:
             )
             if number is None:
                 if not hasattr(self.timer, 'program_number') or not self.timer.program_number:
-                    self.timer.program_number = "000"
+                    self.timer.set_program_number("000")
                 return
                 
             number = number.strip()
             if len(number) == 3 and number.isdigit():
-                self.timer.program_number = number
+                self.timer.set_program_number(number)
                 break
             else:
                 messagebox.showerror(
@@ -471,6 +5594,22 @@ class TimerApp:
                     parent=self.root
                 )
 
+    def offer_session_recovery(self) -> bool:
+        """Ofereix recuperar la sessió del diari (tancament inesperat). Retorna si s'ha recuperat."""
+        state = self.journal.load()
+        if state is None:
+            return False
+        running = " (cronòmetre en marxa)" if state['running_since'] is not None else ""
+        if not messagebox.askyesno(
+            "Recuperar sessió",
+            f"S'ha trobat una sessió del programa #{state['program'] or '---'} amb "
+            f"{len(state['sections'])} seccions{running}.\n\nVols recuperar-la?",
+            parent=self.root
+        ):
+            return False
+        self.journal.restore(state)
+        return bool(self.timer.program_number)
+
     def setup_ui(self) -> None:
         """Configura la interfície d'usuari."""
         style = ttk.Style()
@@ -513,6 +5652,16 @@ class TimerApp:
         
         ttk.Button(header_frame, text="Canviar Programa", 
                   command=self.restart_program).grid(row=0, column=2, padx=(20, 0))
+        ttk.Button(header_frame, text="Historial", 
+                  command=self.open_history).grid(row=0, column=3, padx=(10, 0))
+        ttk.Button(header_frame, text="Escaleta", 
+                  command=self.open_rundown).grid(row=0, column=4, padx=(10, 0))
+        ttk.Button(header_frame, text="Automatismes", 
+                  command=self.open_cues).grid(row=0, column=5, padx=(10, 0))
+        
+        self.scheduler_status_var = tk.StringVar(value="")
+        ttk.Label(header_frame, textvariable=self.scheduler_status_var, 
+                 font=('Arial', 8), foreground='gray').grid(row=0, column=6, padx=(20, 0), sticky=tk.E)
     
     def _setup_current_section(self, parent) -> None:
         """Configura la secció actual."""
@@ -530,7 +5679,7 @@ class TimerApp:
         left_frame.grid(row=0, column=0, sticky=(tk.W, tk.E))
         left_frame.columnconfigure(0, weight=1)
 
-        self.section_name_var = tk.StringVar(value="Secció 1")
+        self.section_name_var = tk.StringVar(value=f"Secció {len(self.timer.sections) + 1}")
         ttk.Label(left_frame, text="Nom de la secció:").grid(row=0, column=0, pady=(0, 5), sticky=tk.W)
         section_entry = ttk.Entry(left_frame, textvariable=self.section_name_var)
         section_entry.grid(row=1, column=0, pady=(0, 15), sticky=(tk.W, tk.E))
@@ -586,10 +5735,13 @@ class TimerApp:
         self.remaining_time_var = tk.StringVar(value="46:00")
         self.remaining_label = ttk.Label(total_right, textvariable=self.remaining_time_var, font=('Arial', 24, 'bold'))
         self.remaining_label.grid(row=1, column=0)
+        self.forecast_var = tk.StringVar(value="")
+        self.forecast_label = ttk.Label(total_right, textvariable=self.forecast_var, font=('Arial', 9))
+        self.forecast_label.grid(row=2, column=0)
 
         target_frame = ttk.Frame(total_frame)
         target_frame.grid(row=1, column=0, sticky=tk.W, pady=(15, 0))
-        self.target_var = tk.StringVar(value="46")
+        self.target_var = tk.StringVar(value=str(self.timer.target_time // 60))
 
         ttk.Label(target_frame, text="Objectiu:").grid(row=0, column=0)
         ttk.Entry(target_frame, textvariable=self.target_var, width=6).grid(row=0, column=1, padx=(5, 2))
@@ -678,6 +5830,8 @@ class TimerApp:
         self.tree.column('name', width=200, anchor='w')
         self.tree.column('duration', width=80, anchor='center')
         self.tree.column('actions', width=40, anchor='center')
+        self.tree.tag_configure('total', background='lightgray', font=('Arial', 9, 'bold'))
+        self.tree_reconciler = TreeviewReconciler(self.tree)
 
         # Context menu
         self.context_menu = tk.Menu(self.root, tearoff=0)
@@ -738,6 +5892,9 @@ class TimerApp:
         buttons_frame.columnconfigure(0, weight=1)
         buttons_frame.columnconfigure(1, weight=1)
         buttons_frame.columnconfigure(2, weight=1)
+        buttons_frame.columnconfigure(3, weight=1)
+        buttons_frame.columnconfigure(4, weight=1)
+        buttons_frame.columnconfigure(5, weight=1)
 
         # Define a style for the larger buttons
         style = ttk.Style()
@@ -752,30 +5909,72 @@ class TimerApp:
         stop_btn = ttk.Button(buttons_frame, text="⏹️", command=self.stop_audio, style="Big.TButton")
         stop_btn.grid(row=0, column=2, padx=5, pady=5, sticky=(tk.W, tk.E))
 
+        carts_btn = ttk.Button(buttons_frame, text="🎛️", command=self.open_cart_wall, style="Big.TButton")
+        carts_btn.grid(row=0, column=3, padx=5, pady=5, sticky=(tk.W, tk.E))
+
+        folder_btn = ttk.Button(buttons_frame, text="🗂️", command=self.import_audio_folder, style="Big.TButton")
+        folder_btn.grid(row=0, column=4, padx=5, pady=5, sticky=(tk.W, tk.E))
+
+        watch_btn = ttk.Button(buttons_frame, text="👁️", command=self.open_watch_folders, style="Big.TButton")
+        watch_btn.grid(row=0, column=5, padx=5, pady=5, sticky=(tk.W, tk.E))
+
+        # Tecles F1-F12: disparen els carts encara que la finestra estigui tancada
+        for slot in self.cart_wall.slots:
+            self.root.bind_all(f'<{slot.hotkey}>', lambda event, i=slot.index: self.fire_cart(i))
+
         # Counter (much bigger)
-        self.audio_time_var = tk.StringVar(value="00:00 / --:--")
+        self.audio_time_var = tk.StringVar(value="Inicialitzant...")
         ttk.Label(left_audio_controls_frame, textvariable=self.audio_time_var, 
                  font=('Courier New', 30, 'bold'), anchor='center').grid(row=1, column=0, sticky=(tk.W, tk.E), pady=(10, 10)) # Increased from 26 to 30, pady from (5, 5) to (10, 10)
 
-        # Progress bar (full width of left part)
+        # Progress bar with waveform overview (full width of left part)
         self.audio_progress_var = tk.DoubleVar()
-        self.audio_progress_bar = ttk.Progressbar(left_audio_controls_frame, variable=self.audio_progress_var, maximum=100)
-        self.audio_progress_bar.grid(row=2, column=0, sticky=(tk.W, tk.E), pady=(0, 0)) # No change, already (0, 0)
-        self.audio_progress_bar.bind("<Button-1>", self.on_progress_click)
+        self.audio_waveform = WaveformView(left_audio_controls_frame)
+        self.audio_waveform.grid(row=2, column=0, sticky=(tk.W, tk.E), pady=(0, 0))
+        self.audio_waveform.bind("<Button-1>", self.on_progress_click)
+        self.audio_progress_var.trace_add(
+            'write', lambda *args: self.audio_waveform.set_progress(self.audio_progress_var.get())
+        )
         
         # Right part: Audio Files List
         right_audio_files_frame = ttk.Frame(audio_frame, padding="5")
         right_audio_files_frame.grid(row=1, column=1, sticky=(tk.W, tk.E, tk.N, tk.S), padx=(5, 0))
         right_audio_files_frame.columnconfigure(0, weight=1)
-        right_audio_files_frame.rowconfigure(0, weight=1)
+        right_audio_files_frame.rowconfigure(1, weight=1)
 
-        self.audio_listbox = tk.Listbox(right_audio_files_frame, font=('Arial', 10))
-        self.audio_listbox.grid(row=0, column=0, sticky=(tk.W, tk.E, tk.N, tk.S))
+        search_frame = ttk.Frame(right_audio_files_frame)
+        search_frame.grid(row=0, column=0, columnspan=2, sticky=(tk.W, tk.E), pady=(0, 3))
+        search_frame.columnconfigure(1, weight=1)
+        ttk.Label(search_frame, text="🔍").grid(row=0, column=0, padx=(0, 3))
+        self.audio_search_var = tk.StringVar(value="")
+        self.audio_search_entry = ttk.Entry(search_frame, textvariable=self.audio_search_var)
+        self.audio_search_entry.grid(row=0, column=1, sticky=(tk.W, tk.E))
+        self.audio_search_count_var = tk.StringVar(value="")
+        ttk.Label(search_frame, textvariable=self.audio_search_count_var,
+                  font=('Arial', 8), foreground='gray').grid(row=0, column=2, padx=(3, 0))
+        self.audio_search_var.trace_add('write', lambda *args: self.scheduler.wake('audio_search'))
+        self.audio_search_entry.bind('<Return>', lambda event: self.play_first_search_result())
+        self.audio_search_entry.bind('<Escape>', lambda event: self.audio_search_var.set(""))
+        self.audio_search_entry.bind('<Down>', lambda event: self.audio_listbox.focus_set())
+
+        self.audio_listbox = VirtualListView(right_audio_files_frame, self.audio_player.files,
+                                             self._audio_list_label, font=('Arial', 10))
+        self.audio_listbox.grid(row=1, column=0, sticky=(tk.W, tk.E, tk.N, tk.S))
 
         audio_list_scrollbar = ttk.Scrollbar(right_audio_files_frame, orient=tk.VERTICAL, command=self.audio_listbox.yview)
-        audio_list_scrollbar.grid(row=0, column=1, sticky=(tk.N, tk.S))
+        audio_list_scrollbar.grid(row=1, column=1, sticky=(tk.N, tk.S))
         self.audio_listbox.configure(yscrollcommand=audio_list_scrollbar.set)
 
+        self.mirror_status_var = tk.StringVar(value="")
+        ttk.Label(right_audio_files_frame, textvariable=self.mirror_status_var,
+                  font=('Arial', 8), foreground='gray').grid(row=2, column=0, columnspan=2, sticky=tk.W)
+        self.library_status_var = tk.StringVar(value="")
+        ttk.Label(right_audio_files_frame, textvariable=self.library_status_var,
+                  font=('Arial', 8), foreground='gray').grid(row=3, column=0, columnspan=2, sticky=tk.W)
+        self.watch_status_var = tk.StringVar(value="")
+        ttk.Label(right_audio_files_frame, textvariable=self.watch_status_var,
+                  font=('Arial', 8), foreground='gray').grid(row=4, column=0, columnspan=2, sticky=tk.W)
+
         self.audio_listbox.bind('<Double-1>', self.on_audio_double_click)
         self.audio_listbox.bind('<Button-3>', self.show_audio_context_menu)
         
@@ -784,6 +5983,9 @@ class TimerApp:
         self.audio_context_menu.add_command(label="Eliminar", command=self.delete_selected_audio_file)
         self.audio_context_menu.add_separator()
         self.audio_context_menu.add_command(label="Reproduir", command=self.play_selected_audio_file)
+        self.audio_context_menu.add_separator()
+        self.audio_context_menu.add_command(label="Importar carpeta...", command=self.import_audio_folder)
+        self.audio_context_menu.add_command(label="Carpetes vigilades...", command=self.open_watch_folders)
         
         # Variable per mantenir el nom del fitxer actual (sense mostrar-lo)
         self.current_audio_var = tk.StringVar(value="Cap fitxer seleccionat")
@@ -796,9 +5998,40 @@ class TimerApp:
             self.audio_listbox.dnd_bind('<<Drop>>', self.on_audio_drop)
     
     def _start_update_loops(self) -> None:
-        """Inicia els bucles d'actualització."""
-        self.update_display()
-        self.update_audio_display()
+        """Registra les tasques periòdiques al planificador i l'inicia."""
+        self.scheduler.add_task('dispatch', self.dispatcher.drain, period=0.05, priority=0,
+                                throttle=False)
+        self.scheduler.add_task('display', self.update_display, period=1.0, priority=0,
+                                deadline_fn=self.timer.next_second_boundary)
+        self.scheduler.add_task('sections', lambda now: self.update_sections_table(), 
+                                period=None, priority=2)
+        self.scheduler.add_task('audio', self.update_audio_display, period=0.25, priority=1)
+        self.scheduler.add_task('scheduler_stats', self.update_scheduler_status, period=1.0, priority=9)
+        self.scheduler.add_task('mirror_stats', self.update_mirror_status, period=2.0, priority=8)
+        self.scheduler.add_task('cues', self.run_cues, period=1.0, priority=0,
+                                deadline_fn=self.cues.next_deadline, throttle=False)
+        self.scheduler.add_task('audio_search', self._run_audio_search, period=None, priority=1,
+                                throttle=False)
+        self.scheduler.add_task('watch_folders', self._apply_watched_changes, period=1.0, priority=6)
+        self.scheduler.start()
+    
+    def shutdown(self) -> None:
+        """Atura el planificador i la feina en segon pla."""
+        self.scheduler.stop()
+        if self.remote_server is not None:
+            self.remote_server.stop()
+        if self.publisher is not None:
+            self.publisher.close()
+        self.history_window = None
+        if self._folder_import is not None:
+            self._folder_import.cancel()
+        self.folder_watcher.stop()
+        self.archive_program(refresh=False)
+        if self.archive is not None:
+            self.archive.close()
+        self.journal.close()
+        self.audio_player.shutdown()
+        self.waveform_store.shutdown()
     
     # MÈTODES PRINCIPALS DEL TIMER
     def start_timer(self) -> None:
@@ -817,7 +6050,7 @@ class TimerApp:
             return
         
         section_name = self.section_name_var.get() or f"Secció {len(self.timer.sections) + 1}"
-        self.timer.add_section(section_name, current_seconds)
+        self.timer.add_section(section_name, current_seconds, *self.timer.segment_bounds())
         self.timer.reset()
         self.section_name_var.set(f"Secció {len(self.timer.sections) + 1}")
     
@@ -829,11 +6062,7 @@ class TimerApp:
             return
         
         section_name = self.section_name_var.get() or f"Secció {len(self.timer.sections) + 1}"
-        self.timer.add_section(section_name, current_seconds)
-        
-        if self.timer.is_running:
-            self.timer.accumulated_time = 0.0
-            self.timer.start_time = time.perf_counter()
+        self.timer.split_section(section_name)
         
         self.section_name_var.set(f"Secció {len(self.timer.sections) + 1}")
     
@@ -870,10 +6099,10 @@ class TimerApp:
     def reset_all(self) -> None:
         """Reinicia tot."""
         if messagebox.askyesno("Reset", "Reiniciar tot?"):
+            self.archive_program()
             self.timer.reset()
-            self.timer.sections = []
-            self.timer.total_time = 0
-            self.timer.target_time = 46 * 60
+            self.timer.clear_sections()
+            self.timer.set_target(46 * 60)
             self.target_var.set("46")
             self.section_name_var.set("Secció 1")
             self.manual_name_var.set("")
@@ -887,18 +6116,18 @@ class TimerApp:
             new_target = int(self.target_var.get())
             if new_target < 1 or new_target > 180:
                 raise ValueError
-            self.timer.target_time = new_target * 60
+            self.timer.set_target(new_target * 60)
         except ValueError:
             messagebox.showerror("Error", "1-180 minuts!")
             self.target_var.set(str(self.timer.target_time // 60))
     
     def restart_program(self) -> None:
         """Reinicia el programa."""
-        if messagebox.askyesno("Confirmar", "Canviar programa? Es perdran les seccions."):
+        if messagebox.askyesno("Confirmar", "Canviar programa? Les seccions es desaran a l'historial."):
+            self.archive_program()
             self.timer.reset()
-            self.timer.sections = []
-            self.timer.total_time = 0
-            self.timer.target_time = 46 * 60
+            self.timer.clear_sections()
+            self.timer.set_target(46 * 60)
             self.ask_program_number()
             self.program_label.configure(text=f"PROGRAMA #{self.timer.program_number}")
             self.section_name_var.set("Secció 1")
@@ -908,14 +6137,297 @@ class TimerApp:
             self.manual_sec_var.set("")
             self.guest_name_var.set("")
     
+    def archive_program(self, refresh: bool = True) -> None:
+        """Desa el programa actual a l'historial."""
+        if self.archive is None:
+            return
+        try:
+            program_id = self.archive.store(self.timer)
+        except sqlite3.Error as e:
+            print(f"Error desant el programa a l'historial: {e}")
+            return
+        if not refresh or program_id is None:
+            return
+        if self.history_window is not None:
+            self.history_window.refresh()
+        self.refresh_forecast()
+    
+    def refresh_forecast(self) -> None:
+        """Recalcula les estadístiques de previsió a partir de l'arxiu (en segon pla)."""
+        forecaster = self.forecaster
+        if self.archive is None:
+            return
+        
+        def work():
+            try:
+                samples, programs = self.archive.section_samples(forecaster.last_programs)
+            except sqlite3.Error as e:
+                print(f"Error llegint l'historial per a la previsió: {e}")
+                return
+            stats = SectionForecaster.compute(samples, programs, forecaster.min_share)
+            self.dispatcher.post(self._on_forecast_stats, *stats)
+        
+        threading.Thread(target=work, name="forecast", daemon=True).start()
+    
+    def _on_forecast_stats(self, percentiles: Dict[str, Tuple[float, float, float]], expected: set) -> None:
+        """Aplica les estadístiques noves de previsió (fil de Tk)."""
+        self.forecaster.apply(percentiles, expected)
+        self.scheduler.wake('display')
+    
+    def open_history(self) -> None:
+        """Obre (o porta al davant) l'historial de programes."""
+        if self.archive is None:
+            messagebox.showwarning("Avís", "L'historial de programes no està disponible.")
+            return
+        if self.history_window is not None:
+            self.history_window.refresh()
+            self.history_window.lift()
+            return
+        self.history_window = ProgramHistoryWindow(self)
+    
+    def open_rundown(self) -> None:
+        """Obre (o porta al davant) l'escaleta."""
+        if self.rundown_window is not None:
+            self.rundown_window.lift()
+            return
+        self.rundown_window = RundownWindow(self)
+        self.scheduler.add_task('rundown', self._refresh_rundown_window, period=1.0, priority=3,
+                                deadline_fn=self.timer.next_second_boundary)
+    
+    def _refresh_rundown_window(self, now: float) -> None:
+        """Tasca del planificador: refresca l'escaleta si és oberta."""
+        if self.rundown_window is None:
+            self.scheduler.remove_task('rundown')
+            return
+        self.rundown_window.refresh(now)
+    
     def open_counter_window(self) -> None:
-        """Obre finestra de comptador extra."""
-        messagebox.showinfo("Funcionalitat", "Comptador extra no implementat en aquesta versió.")
+        """Obre (o porta al davant) la tira de comptadors auxiliars."""
+        if self.counters_window is not None:
+            self.counters_window.lift()
+            return
+        self.counters_window = CountersWindow(self)
+        self.show_counters()
+    
+    def show_counters(self) -> None:
+        """Assegura la tasca 'counters' i demana pintar-los al pròxim frame."""
+        if 'counters' not in self.scheduler.tasks:
+            # Sense throttle: els rellotges d'estudi segueixen encara que la finestra principal no tingui focus
+            self.scheduler.add_task('counters', self._refresh_counters, period=1.0, priority=2,
+                                    deadline_fn=self.counters.next_deadline, throttle=False)
+        self.scheduler.wake('counters')
+    
+    def _refresh_counters(self, now: float) -> None:
+        """Tasca del planificador: una sola passada per a tots els comptadors."""
+        if self.counters_window is None and not self.counter_windows:
+            self.scheduler.remove_task('counters')
+            return
+        for counter in self.counters.tick(now):
+            text = Counter.format_value(counter.shown)
+            if counter.mode == Counter.HOUR:
+                color = 'blue'
+            elif counter.mode == Counter.DOWN and counter.shown <= 0:
+                color = 'red'
+            elif counter.mode == Counter.DOWN and counter.shown <= 10:
+                color = 'orange'
+            else:
+                color = 'black'
+            if self.counters_window is not None:
+                self.counters_window.show(counter, text, color)
+            window = self.counter_windows.get(counter.id)
+            if window is not None:
+                window.show(counter, text, color)
+    
+    def _counter_changed(self, counter: Counter) -> None:
+        """Força tornar a pintar un comptador després d'una acció de l'usuari."""
+        counter.shown = None
+        self.show_counters()
+    
+    def toggle_counter(self, counter: Counter) -> None:
+        """Engega o atura un comptador."""
+        now = time.perf_counter()
+        if counter.is_running:
+            counter.stop(now)
+        else:
+            counter.start(now)
+        self._counter_changed(counter)
+    
+    def reset_counter(self, counter: Counter) -> None:
+        """Torna un comptador a zero (o a la seva durada)."""
+        counter.reset(time.perf_counter())
+        self._counter_changed(counter)
+    
+    def pop_out_counter(self, counter: Counter) -> None:
+        """Mostra un comptador en una finestra pròpia."""
+        window = self.counter_windows.get(counter.id)
+        if window is not None:
+            window.lift()
+            return
+        self.counter_windows[counter.id] = CounterWindow(self, counter)
+        self.show_counters()
+    
+    def remove_counter(self, counter: Counter) -> None:
+        """Elimina un comptador i la seva finestra pròpia."""
+        window = self.counter_windows.get(counter.id)
+        if window is not None:
+            window.close()
+        self.counters.remove(counter.id)
+        if self.counters_window is not None:
+            self.counters_window.rebuild()
+    
+    # AUTOMATISMES
+    CUE_PRELOAD_AHEAD = 300.0  # Segons de programa
+    
+    def open_cues(self) -> None:
+        """Obre (o porta al davant) la finestra d'automatismes."""
+        if self.cues_window is not None:
+            self.cues_window.lift()
+            return
+        self.cues_window = CuesWindow(self)
+    
+    def cue_added(self, cue: Cue) -> None:
+        """Precarrega el so d'un automatisme nou i el programa."""
+        if cue.action == Cue.PLAY and cue.path:
+            self.audio_player.sound_bank.preload(cue.path)
+        self.scheduler.wake('cues')
+    
+    def run_cues(self, now: float) -> None:
+        """Tasca del planificador: dispara els automatismes vençuts i precarrega els propers."""
+        for cue in self.cues.due(now):
+            self.run_cue(cue)
+        if PYGAME_AVAILABLE:
+            bank = self.audio_player.sound_bank
+            for cue in self.cues.upcoming(now, self.CUE_PRELOAD_AHEAD):
+                if cue.action == Cue.PLAY and cue.path and bank.get(cue.path) is None:
+                    bank.preload(cue.path)
+        if self.cues_window is not None:
+            self.cues_window.refresh(now)
+    
+    def run_cue(self, cue: Cue) -> None:
+        """Executa l'acció d'un automatisme."""
+        if cue.action == Cue.PLAY and cue.path:
+            if not self.audio_player.play_preloaded(cue.path) and self.audio_player.is_ready:
+                self._load_and_play(cue.path)  # Sense precàrrega: via el reproductor principal
+        elif cue.action == Cue.FADE:
+            self.start_fade(cue.fade)
+        elif cue.action == Cue.STOP:
+            self.stop_audio()
+    
+    def start_fade(self, duration: float) -> None:
+        """Abaixa el volum de la llista fins a zero i l'atura."""
+        if not self.audio_player.is_ready or duration <= 0:
+            self.stop_audio()
+            return
+        self._fade = (time.perf_counter(), duration, self.audio_player.volume)
+        self.scheduler.add_task('cue_fade', self._step_fade, period=0.05, priority=1, throttle=False)
+    
+    def _step_fade(self, now: float) -> None:
+        """Tasca del planificador: un pas de la fosa."""
+        started, duration, volume = self._fade
+        progress = (now - started) / duration
+        if progress < 1.0:
+            self.audio_player.set_volume(volume * (1.0 - progress))
+            return
+        self.stop_audio()  # També tanca la fosa i recupera el volum del control
+    
+    def _cancel_fade(self) -> None:
+        """Interromp la fosa en curs, si n'hi ha, i torna al volum del control."""
+        if self._fade is None:
+            return
+        self._fade = None
+        self.scheduler.remove_task('cue_fade')
+        self.audio_player.set_volume(self.volume_var.get() / 100.0)
+    
+    # CONTROL REMOT
+    def _wake_dispatch_from_thread(self) -> None:
+        """Desperta la tasca 'dispatch' des d'un altre fil (Tk ho passa al fil principal)."""
+        try:
+            self.root.event_generate('<<DispatchNow>>', when='tail')
+        except (RuntimeError, tk.TclError):
+            pass  # Sense mainloop: la cua es buidarà al pròxim període
+    
+    def handle_remote_command(self, command: str, argument: str) -> Dict[str, Any]:
+        """Executa una ordre de control remot (fil de Tk). Retorna la resposta."""
+        timer = self.timer
+        if command == 'ping':
+            pass
+        elif command == 'start':
+            timer.start()
+        elif command == 'stop':
+            timer.stop()
+        elif command in ('split', 'save'):
+            if timer.get_current_time() <= 0:
+                return {'ok': False, 'error': "No hi ha temps!"}
+            if argument:
+                self.section_name_var.set(argument)
+            if command == 'split':
+                self.split_section()
+            else:
+                self.save_section()
+        elif command == 'play':
+            if not self.audio_player.is_ready:
+                return {'ok': False, 'error': "àudio no disponible"}
+            if self.audio_player.get_status() != 'playing':
+                # Continua la pista carregada; la selecció de la llista només si no n'hi ha cap
+                if self.audio_player.current_file:
+                    if not self.audio_player.play():
+                        return {'ok': False, 'error': "no s'ha pogut reproduir"}
+                    self.play_pause_btn.configure(text="⏸️")
+                else:
+                    file_path = self.selected_audio_path()
+                    if file_path is None:
+                        return {'ok': False, 'error': "cap fitxer seleccionat"}
+                    self._load_and_play(file_path)
+        elif command == 'pause':
+            if self.audio_player.is_ready and self.audio_player.get_status() == 'playing':
+                if self.audio_player.pause():
+                    self.play_pause_btn.configure(text="▶️")
+        elif command == 'audio-stop':
+            self.stop_audio()
+        elif command == 'cart':
+            try:
+                index = int(argument) - 1
+            except ValueError:
+                return {'ok': False, 'error': "número de cart no vàlid"}
+            if not 0 <= index < CartWall.SLOTS:
+                return {'ok': False, 'error': "número de cart no vàlid"}
+            self.fire_cart(index)
+        elif command != 'status':
+            return {'ok': False, 'error': f"ordre desconeguda: {command}",
+                    'commands': ['ping', 'status', 'start', 'stop', 'split [nom]', 'save [nom]',
+                                 'play', 'pause', 'audio-stop', 'cart N']}
+        current = timer.get_current_time()
+        return {
+            'ok': True,
+            'running': timer.is_running,
+            'current': current,
+            'total': timer.total_time + current,
+            'remaining': timer.target_time - timer.total_time - current,
+            'sections': len(timer.sections),
+            'program': timer.program_number,
+            'audio': self.audio_player.get_status() if self.audio_player.is_ready else 'unavailable',
+        }
+    
+    # DIFUSIÓ A PANTALLES D'ESTUDI
+    def broadcast_state(self, now: float) -> None:
+        """Tasca del planificador (10 Hz): envia els canvis d'estat a les pantalles."""
+        timer = self.timer
+        state = {
+            'r': timer.is_running,
+            't': timer.total_time,
+            'g': timer.target_time,
+            'n': self.section_name_var.get(),
+            'p': timer.program_number,
+            'c': len(timer.sections),
+        }
+        # El temps es llegeix just abans d'enviar: els clients el prenen com a referència en rebre'l
+        self.publisher.publish(state, timer.get_elapsed(), self._broadcast_clock_changed, now)
+        self._broadcast_clock_changed = False
     
     # MÈTODES D'ACTUALITZACIÓ DE DISPLAY
-    def update_display(self) -> None:
+    def update_display(self, now: Optional[float] = None) -> None:
         """Actualitza el display principal."""
-        current_seconds = self.timer.get_current_time()
+        current_seconds = self.timer.get_current_time(now)
         self.current_time_var.set(self.timer.format_time(current_seconds))
         
         total_real_time = self.timer.total_time + current_seconds
@@ -935,73 +6447,114 @@ class TimerApp:
             self.remaining_time_var.set(f"+{self.timer.format_time(abs(remaining))}")
             self.remaining_label.configure(foreground='red')
         
-        self.update_sections_table()
-        self.root.after(100, self.update_display)
+        forecast = self.forecaster.predict(self.timer.total_time, self.section_name_var.get(), current_seconds)
+        if forecast is None:
+            self.forecast_var.set("")
+        else:
+            low, middle, high = (self.timer.format_time(round(value)) for value in forecast)
+            self.forecast_var.set(f"Previsió final: {middle} ({low}–{high})")
+            self.forecast_label.configure(
+                foreground='red' if forecast[1] > self.timer.target_time else 'gray')
+    
+    def update_scheduler_status(self, now: Optional[float] = None) -> None:
+        """Mostra el retard dels ticks respecte del seu venciment."""
+        stats = self.scheduler.get_stats()
+        mode = " ·lent" if self.scheduler.throttled else ""
+        remote = ""
+        if self.remote_server is not None and self.remote_server.commands:
+            remote_stats = self.remote_server.get_stats()
+            remote = (f" · Remot: {remote_stats['clients']} con., "
+                      f"{remote_stats['last_ms']:.1f} ms (màx {remote_stats['max_ms']:.1f})")
+        self.scheduler_status_var.set(
+            f"Retard tick: {stats['last_ms']:.1f} ms (mitjana {stats['mean_ms']:.1f}, màx {stats['max_ms']:.1f}){mode}{remote}"
+        )
+    
+    def _on_timer_changed(self, event: TimerEvent) -> None:
+        """Marca per redibuixar només el que ha canviat al model."""
+        if event.kind in (TimerEvent.RENAMED, TimerEvent.RETIMED):
+            if not self._sections_dirty:
+                self._dirty_section_rows.add(event.index)
+        elif event.kind in TimerEvent.SECTION_KINDS:
+            self._sections_dirty = True
+        if event.kind in TimerEvent.SECTION_KINDS:
+            self.scheduler.wake('sections')
+            self.scheduler.wake('rundown')
+        if event.kind != TimerEvent.RENAMED:
+            self.scheduler.wake('display')
+        if event.kind in TimerEvent.CLOCK_KINDS or event.kind == TimerEvent.RESET:
+            self._broadcast_clock_changed = True
+        # Qualsevol canvi pot avançar o endarrerir el pròxim automatisme
+        self.scheduler.wake('cues')
     
     def update_sections_table(self) -> None:
-        """Actualitza la taula de seccions."""
+        """Actualitza la taula de seccions de manera incremental."""
         if self.drag_data.get("item"):
             return
-        
-        current_selection = self.tree.selection()
-        selected_values = None
-        if current_selection:
-            try:
-                selected_values = self.tree.item(current_selection[0], 'values')
-            except tk.TclError:
-                pass
-        
-        for item in self.tree.get_children():
-            self.tree.delete(item)
-        
-        for i, section in enumerate(self.timer.sections):
-            item_id = self.tree.insert('', 'end', values=(
-                i + 1, 
-                section['name'], 
-                self.timer.format_time(section['duration']), 
-                'X'
-            ))
-            if (selected_values and len(selected_values) > 1 and 
-                selected_values[1] == section['name']):
-                self.tree.selection_set(item_id)
-        
-        if self.timer.sections:
-            self.tree.insert('', 'end', values=(
-                'TOT', 
-                f"{len(self.timer.sections)}", 
-                self.timer.format_time(self.timer.total_time), 
-                ''
-            ), tags=('total',))
-            self.tree.tag_configure('total', background='lightgray', font=('Arial', 9, 'bold'))
+        if self._sections_dirty:
+            self.tree_reconciler.reconcile(self.build_section_rows(self.timer))
+        elif self._dirty_section_rows:
+            sections = self.timer.sections
+            for index in self._dirty_section_rows:
+                if 0 <= index < len(sections):
+                    self.tree_reconciler.update(*self.build_section_row(self.timer, index))
+            self.tree_reconciler.update(*self.build_total_row(self.timer))
+        self._sections_dirty = False
+        self._dirty_section_rows.clear()
+    
+    @staticmethod
+    def build_section_row(timer: PrecisionTimer, index: int) -> Tuple[str, tuple, tuple]:
+        """Construeix la fila (iid, valors, tags) d'una secció."""
+        section = timer.sections[index]
+        return (f"s{section.id}", (
+            str(index + 1), 
+            section.name, 
+            section.formatted, 
+            'X'
+        ), ())
+    
+    @staticmethod
+    def build_total_row(timer: PrecisionTimer) -> Tuple[str, tuple, tuple]:
+        """Construeix la fila TOT de la taula de seccions."""
+        return ('total', (
+            'TOT', 
+            f"{len(timer.sections)}", 
+            timer.format_time(timer.total_time), 
+            ''
+        ), ('total',))
+    
+    @classmethod
+    def build_section_rows(cls, timer: PrecisionTimer) -> List[Tuple[str, tuple, tuple]]:
+        """Construeix les files (iid, valors, tags) de la taula de seccions."""
+        rows = [cls.build_section_row(timer, i) for i in range(len(timer.sections))]
+        if timer.sections:
+            rows.append(cls.build_total_row(timer))
+        return rows
     
     # MÈTODES GESTIÓ SECCIONS (TREE)
+    def _section_index(self, item: str) -> Optional[int]:
+        """Posició de la secció d'una fila del tree (iid 's<id>'), o None."""
+        if not item.startswith('s'):
+            return None
+        try:
+            return self.timer.index_of(int(item[1:]))
+        except ValueError:
+            return None
+    
     def on_tree_select(self, event) -> None:
         """Gestiona la selecció d'elements del tree."""
         item = self.tree.identify_row(event.y)
         column = self.tree.identify_column(event.x)
         
-        if column == '#4' and item:
-            try:
-                values = self.tree.item(item, 'values')
-                if values and values[0] != 'TOT' and len(values) > 3 and values[3] == 'X':
-                    index = int(values[0]) - 1
-                    section_name = values[1]
-                    if messagebox.askyesno("Eliminar", f'Eliminar "{section_name}"?'):
-                        if self.timer.remove_section(index):
-                            self.section_name_var.set(f"Secció {len(self.timer.sections) + 1}")
-                    return
-            except (tk.TclError, ValueError, IndexError):
-                pass
+        section_id = item[1:] if item.startswith('s') else None
+        if column == '#4' and section_id is not None:
+            self._confirm_remove_section(int(section_id))
+            return
         
         # Gestió del drag and drop
-        if item:
+        if section_id is not None:
             try:
-                values = self.tree.item(item, 'values')
-                if values and values[0] != 'TOT' and values[0].isdigit():
-                    self.drag_data = {"item": item, "y": event.y, "dragging": False}
-                    self.tree.selection_set(item)
-                else:
-                    self.drag_data = {"item": "", "y": 0, "dragging": False}
+                self.drag_data = {"item": item, "y": event.y, "dragging": False}
+                self.tree.selection_set(item)
             except tk.TclError:
                 self.drag_data = {"item": "", "y": 0, "dragging": False}
         else:
@@ -1026,6 +6579,8 @@ class TimerApp:
         was_dragging = self.drag_data.get("dragging", False)
         source_item = self.drag_data.get("item", "")
         self.drag_data = {"item": "", "y": 0, "dragging": False}
+        # Aplica els canvis que hagin arribat durant l'arrossegament
+        self.scheduler.wake('sections')
         
         if not was_dragging or not source_item:
             return
@@ -1043,23 +6598,10 @@ class TimerApp:
         if not target_item or target_item == source_item:
             return
             
-        try:
-            source_values = self.tree.item(source_item, 'values')
-            target_values = self.tree.item(target_item, 'values')
-            
-            if (source_values and target_values and 
-                source_values[0] != 'TOT' and target_values[0] != 'TOT' and
-                source_values[0].isdigit() and target_values[0].isdigit()):
-                
-                source_index = int(source_values[0]) - 1
-                target_index = int(target_values[0]) - 1
-                
-                if 0 <= source_index < len(self.timer.sections) and 0 <= target_index < len(self.timer.sections):
-                    section = self.timer.sections.pop(source_index)
-                    self.timer.sections.insert(target_index, section)
-                    
-        except (tk.TclError, ValueError, IndexError):
-            pass
+        source_index = self._section_index(source_item)
+        target_index = self._section_index(target_item)
+        if source_index is not None and target_index is not None:
+            self.timer.move_section(source_index, target_index)
 
     def on_double_click(self, event) -> None:
         """Gestiona el doble clic."""
@@ -1070,11 +6612,9 @@ class TimerApp:
         region = self.tree.identify_region(event.x, event.y)
         if region == "cell":
             item = self.tree.identify_row(event.y)
-            if item:
-                values = self.tree.item(item, 'values')
-                if values and values[0] != 'TOT':
-                    self.tree.selection_set(item)
-                    self.context_menu.post(event.x_root, event.y_root)
+            if item and self._section_index(item) is not None:
+                self.tree.selection_set(item)
+                self.context_menu.post(event.x_root, event.y_root)
 
     def delete_selected_section(self) -> None:
         """Elimina la secció seleccionada."""
@@ -1082,16 +6622,18 @@ class TimerApp:
         if not selection:
             return
         
-        item = selection[0]
-        values = self.tree.item(item, 'values')
-        if not values or values[0] == 'TOT':
+        if self._section_index(selection[0]) is not None:
+            self._confirm_remove_section(int(selection[0][1:]))
+    
+    def _confirm_remove_section(self, section_id: int) -> None:
+        """Demana confirmació i elimina una secció pel seu id."""
+        section = self.timer.get_section(section_id)
+        if section is None:
             return
-            
-        index = int(values[0]) - 1
-        section_name = values[1]
-        
-        if messagebox.askyesno("Eliminar", f'Eliminar "{section_name}"?'):
-            if self.timer.remove_section(index):
+        if messagebox.askyesno("Eliminar", f'Eliminar "{section.name}"?'):
+            # La posició es torna a buscar: pot haver canviat mentre el diàleg era obert
+            index = self.timer.index_of(section_id)
+            if index is not None and self.timer.remove_section(index):
                 self.section_name_var.set(f"Secció {len(self.timer.sections) + 1}")
 
     def edit_section_name(self) -> None:
@@ -1100,21 +6642,20 @@ class TimerApp:
         if not selection:
             return
             
-        item = selection[0]
-        values = self.tree.item(item, 'values')
-        if not values or values[0] == 'TOT':
+        index = self._section_index(selection[0])
+        if index is None:
             return
             
-        index = int(values[0]) - 1
-        current_name = values[1]
+        section = self.timer.sections[index]
         new_name = simpledialog.askstring(
             "Editar", 
             f"Nou nom secció {index + 1}:", 
-            initialvalue=current_name, 
+            initialvalue=section.name, 
             parent=self.root
         )
-        if new_name and new_name.strip():
-            self.timer.sections[index]['name'] = new_name.strip()
+        index = self.timer.index_of(section.id)
+        if new_name and new_name.strip() and index is not None:
+            self.timer.rename_section(index, new_name.strip())
 
     def edit_section_time(self) -> None:
         """Edita el temps d'una secció."""
@@ -1122,13 +6663,12 @@ class TimerApp:
         if not selection:
             return
             
-        item = selection[0]
-        values = self.tree.item(item, 'values')
-        if not values or values[0] == 'TOT':
+        index = self._section_index(selection[0])
+        if index is None:
             return
             
-        index = int(values[0]) - 1
-        current_duration = self.timer.sections[index]['duration']
+        section = self.timer.sections[index]
+        current_duration = section.duration
         current_mins = current_duration // 60
         current_secs = current_duration % 60
         
@@ -1142,7 +6682,7 @@ class TimerApp:
         frame = ttk.Frame(edit_window, padding="15")
         frame.pack(fill=tk.BOTH, expand=True)
         
-        ttk.Label(frame, text=f"{self.timer.sections[index]['name']}", 
+        ttk.Label(frame, text=f"{section.name}", 
                  font=('Arial', 10, 'bold')).pack(pady=(0, 5))
         ttk.Label(frame, text=f"Actual: {self.timer.format_time(current_duration)}").pack(pady=(0, 10))
         
@@ -1168,10 +6708,9 @@ class TimerApp:
                 if new_mins == 0 and new_secs == 0:
                     raise ValueError
                     
-                old_duration = self.timer.sections[index]['duration']
-                new_duration = new_mins * 60 + new_secs
-                self.timer.sections[index]['duration'] = new_duration
-                self.timer.total_time = self.timer.total_time - old_duration + new_duration
+                current_index = self.timer.index_of(section.id)
+                if current_index is not None:
+                    self.timer.retime_section(current_index, new_mins * 60 + new_secs)
                 edit_window.destroy()
                 messagebox.showinfo("OK", "Actualitzat!")
             except ValueError:
@@ -1185,9 +6724,19 @@ class TimerApp:
         min_entry.select_range(0, tk.END)
     
     # MÈTODES REPRODUCTOR D'ÀUDIO
+    def _check_audio_ready(self) -> bool:
+        """Comprova que el reproductor està llest i avisa l'usuari si no."""
+        if self.audio_player.state == AudioPlayer.INITIALISING:
+            messagebox.showinfo("Àudio", "El reproductor d'àudio encara s'està inicialitzant...")
+            return False
+        if self.audio_player.state == AudioPlayer.UNAVAILABLE:
+            messagebox.showerror("Error", "Cap reproductor d'àudio disponible.")
+            return False
+        return True
+    
     def load_audio_files(self) -> None:
         """Carrega fitxers d'àudio."""
-        if not PYGAME_AVAILABLE and not VLC_AVAILABLE:
+        if self.audio_player.state == AudioPlayer.UNAVAILABLE:
             messagebox.showerror("Error", "Cap reproductor d'àudio disponible.")
             return
             
@@ -1205,37 +6754,22 @@ class TimerApp:
         )
         
         if files:
-            added_files = self.audio_player.add_files(files)
-            if added_files:
-                self.update_audio_list()
+            self._add_audio_files(files)
 
     def toggle_play_pause(self) -> None:
         """Alterna entre play i pausa, amb lògica millorada per selecció de fitxers."""
-        if not PYGAME_AVAILABLE and not VLC_AVAILABLE:
-            messagebox.showerror("Error", "Cap reproductor d'àudio disponible.")
+        if not self._check_audio_ready():
             return
             
-        selection = self.audio_listbox.curselection()
-        selected_file_path = None
-        if selection:
-            selected_file_path = self.audio_player.files[selection[0]]
+        selected_file_path = self.selected_audio_path()
 
         current_button_text = self.play_pause_btn.cget("text")
         
         if current_button_text == "▶️": # Button is currently showing PLAY, so user wants to PLAY
             if selected_file_path: # A file is selected
                 if selected_file_path != self.audio_player.current_file:
-                    # New file selected, load and play it
-                    self.audio_player.stop() # Stop current if any
-                    if not self.audio_player.load_file(selected_file_path):
-                        messagebox.showerror("Error", "No s'ha pogut carregar el fitxer seleccionat.")
-                        return
-                    file_name = os.path.basename(selected_file_path)
-                    if len(file_name) > 25:
-                        file_name = file_name[:22] + "..."
-                    self.current_audio_var.set(file_name)
-                    if self.audio_player.play():
-                        self.play_pause_btn.configure(text="⏸️")
+                    # New file selected, load it in the background and play it when ready
+                    self._load_and_play(selected_file_path)
                 else: # Same file selected or no new selection, but button is PLAY (so it's paused or stopped)
                     if self.audio_player.play(): # Resume or play current
                         self.play_pause_btn.configure(text="⏸️")
@@ -1253,12 +6787,13 @@ class TimerApp:
 
     def stop_audio(self) -> None:
         """Para la reproducció d'àudio."""
-        if PYGAME_AVAILABLE or VLC_AVAILABLE:
+        if self.audio_player.is_ready:
             self.audio_player.stop()
             self.current_audio_var.set("Cap fitxer seleccionat")
             self.audio_time_var.set("00:00 / --:--")
             self.audio_progress_var.set(0)
             self.play_pause_btn.configure(text="▶️")
+        self._cancel_fade()  # Després d'aturar: el volum no torna a pujar sobre la pista
 
     def _on_audio_playback_ended(self) -> None:
         """Callback quan la reproducció d'àudio ha finalitzat."""
@@ -1266,86 +6801,156 @@ class TimerApp:
 
     def change_volume(self, value) -> None:
         """Canvia el volum."""
+        self._cancel_fade()
         volume = float(value) / 100.0
         self.audio_player.set_volume(volume)
 
     def on_audio_double_click(self, event) -> None:
         """Gestiona el doble clic a la llista d'àudio."""
-        selection = self.audio_listbox.curselection()
-        if not selection:
+        file_path = self.selected_audio_path()
+        if file_path is None or not self._check_audio_ready():
             return
             
-        file_path = self.audio_player.files[selection[0]]
-        
+        self._load_and_play(file_path)
+
+    def _load_and_play(self, file_path: str) -> None:
+        """Carrega un fitxer en segon pla i el reprodueix quan està llest."""
         # Stop current playback before loading a new file
         self.audio_player.stop()
+        self._cancel_fade()
+        self.play_pause_btn.configure(text="▶️")
+        self.audio_time_var.set("Carregant...")
+        self.audio_progress_var.set(0)
+        self.audio_player.load_file_async(
+            file_path, lambda ok: self._on_audio_loaded(file_path, ok)
+        )
+
+    def _on_audio_loaded(self, file_path: str, ok: bool) -> None:
+        """Callback (fil de Tk) quan un fitxer acaba de carregar-se."""
+        if not ok:
+            self.audio_time_var.set("00:00 / --:--")
+            messagebox.showerror("Error", "No s'ha pogut carregar el fitxer seleccionat.")
+            return
+        self.audio_waveform.set_peaks(None)
+        self.waveform_store.request(file_path, self._on_waveform_ready)
+        if self.audio_player.play():
+            file_name = os.path.basename(file_path)
+            if len(file_name) > 25:
+                file_name = file_name[:22] + "..."
+            self.current_audio_var.set(file_name)
+            self.play_pause_btn.configure(text="⏸️")
 
-        if self.audio_player.load_file(file_path):
-            if self.audio_player.play():
-                file_name = os.path.basename(file_path)
-                if len(file_name) > 25:
-                    file_name = file_name[:22] + "..."
-                self.current_audio_var.set(file_name)
-                self.play_pause_btn.configure(text="⏸️")
+    def open_cart_wall(self) -> None:
+        """Obre (o porta al davant) la finestra de carts."""
+        if self.cart_window is not None:
+            self.cart_window.lift()
+            return
+        self.cart_window = CartWallWindow(self)
+        self.scheduler.add_task('carts', self._refresh_cart_window, period=0.1, priority=3)
+
+    def _refresh_cart_window(self, now: float) -> None:
+        """Tasca del planificador: refresca la finestra de carts si és oberta."""
+        if self.cart_window is None:
+            self.scheduler.remove_task('carts')
+            return
+        self.cart_window.refresh(now)
+
+    def _on_cart_preloaded(self, path: str, ok: bool) -> None:
+        """Callback quan un cart acaba de precarregar-se."""
+        if self.cart_window is not None:
+            self.cart_window.refresh_labels()
+
+    def fire_cart(self, index: int) -> None:
+        """Dispara un cart (botó o tecla F)."""
+        started = time.perf_counter()
+        if not self.audio_player.is_ready:
+            return
+        if not PYGAME_AVAILABLE:
+            messagebox.showerror("Error", "Els carts necessiten pygame.")
+            return
+        self.cart_wall.trigger(index, started)
+
+    def _on_waveform_ready(self, file_path: str, peaks: Optional[WaveformPeaks]) -> None:
+        """Dibuixa la forma d'ona quan els pics estan disponibles (fil de Tk)."""
+        if file_path == self.audio_player.current_file:
+            self.audio_waveform.set_peaks(peaks)
 
+    IMPORT_ROWS_PER_FRAME = 1000
+    
     def update_audio_list(self) -> None:
-        """Actualitza la llista d'àudio."""
-        self.audio_listbox.delete(0, tk.END)
-        for file_path in self.audio_player.files:
-            file_name = os.path.basename(file_path)
-            self.audio_listbox.insert(tk.END, file_name)
+        """Torna a mostrar la llista d'àudio sencera (només si el model s'ha substituït)."""
+        self.audio_listbox.reset()
+
+    def _audio_list_label(self, file_path: str) -> str:
+        """Text d'un element de la llista d'àudio (nom i durada si es coneix)."""
+        file_name = os.path.basename(file_path)
+        duration = self.audio_player.durations.get(file_path)
+        if duration:
+            return f"{file_name}  [{self.timer.format_time(duration)}]"
+        return file_name
+
+    def _on_audio_duration(self, file_path: str, duration: float) -> None:
+        """Actualitza només la fila del fitxer quan se'n coneix la durada."""
+        if file_path not in self.audio_player.files:
+            return
+        if self._audio_search_query is not None:
+            self.audio_listbox.redraw()  # O(files visibles); els resultats no tenen índex per ruta
+        else:
+            self.audio_listbox.row_changed(self.audio_player.files.index(file_path))
 
-    def update_audio_display(self) -> None:
+    def update_mirror_status(self, now: float) -> None:
+        """Mostra l'estat del mirall local dels fitxers de xarxa."""
+        mirror = self.audio_player.mirror
+        if mirror is None:
+            return
+        stats = mirror.get_stats()
+        if not (stats['files'] or stats['hits'] or stats['misses'] or stats['pending']):
+            return
+        text = (f"Mirall local: {stats['hits']} encerts / {stats['misses']} fallades · "
+                f"{stats['files']} fitxers, {stats['used_mb']:.0f}/{stats['max_mb']:.0f} MB")
+        if stats['pending']:
+            text += f" · copiant {stats['pending']}"
+        if text != self.mirror_status_var.get():
+            self.mirror_status_var.set(text)
+    
+    def update_audio_display(self, now: Optional[float] = None) -> None:
         """Actualitza el display d'àudio."""
+        state = self.audio_player.state
+        if state != self._audio_state_shown:
+            self._audio_state_shown = state
+            if state == AudioPlayer.INITIALISING:
+                self.audio_time_var.set("Inicialitzant...")
+            elif state == AudioPlayer.UNAVAILABLE:
+                self.audio_time_var.set("Sense àudio")
+            else:
+                self.audio_time_var.set("00:00 / --:--")
+                self.audio_player.set_volume(self.volume_var.get() / 100.0)
+                self.cart_wall.preload_all(self._on_cart_preloaded)
+        if state != AudioPlayer.READY:
+            return
+        
         if self.audio_player.use_vlc and self.audio_player.vlc_player:
+            if self.scheduler.tasks['audio'].period is not None:
+                # VLC avisa quan canvia alguna cosa: la tasca passa a funcionar per esdeveniments
+                self.audio_player.vlc_events.waker = lambda: self.dispatcher.post(self.scheduler.wake, 'audio')
+                self.scheduler.add_task('audio', self.update_audio_display, period=None, priority=1)
             self._update_vlc_display()
-        elif PYGAME_AVAILABLE:
+        elif self.audio_player.use_pygame:
             self._update_pygame_display()
-        
-        self.root.after(250, self.update_audio_display)
     
     def _update_vlc_display(self) -> None:
-        """Actualitza display amb VLC."""
-        status = self.audio_player.get_status()
-        current_time = self.audio_player.get_current_time()
+        """Actualitza display amb VLC a partir dels esdeveniments encuats (sense crides a libvlc)."""
+        player = self.audio_player
+        events = player.poll_vlc_events()
+        if not events:
+            return
+        if events.get('ended'):
+            self._on_audio_playback_ended()
+            return
         
+        status = player.vlc_status
         if status == "playing" or status == "paused":
-            minutes = int(current_time // 60)
-            seconds = int(current_time % 60)
-            
-            try:
-                duration_ms = self.audio_player.vlc_player.get_length()
-                if duration_ms > 0:
-                    duration = duration_ms / 1000.0
-                    duration_min = int(duration // 60)
-                    duration_sec = int(duration % 60)
-                    
-                    # Mostrar temps restant en lloc d'elapsed
-                    remaining_time = duration - current_time
-                    remaining_min = int(remaining_time // 60)
-                    remaining_sec = int(remaining_time % 60)
-                    
-                    if status == "playing":
-                        self.audio_time_var.set(f"-{remaining_min:02d}:{remaining_sec:02d} / {duration_min:02d}:{duration_sec:02d}")
-                    else:  # paused
-                        self.audio_time_var.set(f"-{remaining_min:02d}:{remaining_sec:02d} [PAUSA]")
-                    
-                    # Càlcul més precís del progrés (mantenim la precisió interna)
-                    progress = min((current_time / duration) * 100, 100) if duration > 0 else 0
-                    self.audio_progress_var.set(progress)
-                else:
-                    if status == "playing":
-                        self.audio_time_var.set(f"{minutes:02d}:{seconds:02d} / --:--")
-                    else:
-                        self.audio_time_var.set(f"{minutes:02d}:{seconds:02d} [PAUSA]")
-                    self.audio_progress_var.set(0)
-            except Exception as e:
-                if status == "playing":
-                    self.audio_time_var.set(f"{minutes:02d}:{seconds:02d} / --:--")
-                else:
-                    self.audio_time_var.set(f"{minutes:02d}:{seconds:02d} [PAUSA]")
-                self.audio_progress_var.set(0)
-                
+            self._show_audio_time(status, player.vlc_time, player.duration)
         elif status == "stopped":
             self.audio_time_var.set("00:00 / --:--")
             self.audio_progress_var.set(0)
@@ -1360,30 +6965,45 @@ class TimerApp:
             self._on_audio_playback_ended()
             return # Exit early as the state has been reset
         
-        if status == "playing":
-            minutes = current_time // 60
-            seconds = current_time % 60
-            self.audio_time_var.set(f"{minutes:02d}:{seconds:02d} / --:--")
-            
-            max_time = 180
-            progress = min((current_time / max_time) * 100, 100)
-            self.audio_progress_var.set(progress)
-            
-        elif status == "paused":
-            minutes = current_time // 60
-            seconds = current_time % 60
-            self.audio_time_var.set(f"{minutes:02d}:{seconds:02d} [PAUSA]")
+        if status == "playing" or status == "paused":
+            self._show_audio_time(status, current_time, self.audio_player.duration)
             
         elif status == "stopped":
             self.audio_time_var.set("00:00 / --:--")
             self.audio_progress_var.set(0)
+    
+    def _show_audio_time(self, status: str, current_time: float, duration: float) -> None:
+        """Mostra el temps restant i el progrés (o el temps transcorregut si no hi ha durada)."""
+        if duration > 0:
+            # Mostrar temps restant en lloc d'elapsed
+            remaining_time = max(0.0, duration - current_time)
+            remaining_min = int(remaining_time // 60)
+            remaining_sec = int(remaining_time % 60)
+            duration_min = int(duration // 60)
+            duration_sec = int(duration % 60)
+            
+            if status == "playing":
+                self.audio_time_var.set(f"-{remaining_min:02d}:{remaining_sec:02d} / {duration_min:02d}:{duration_sec:02d}")
+            else:  # paused
+                self.audio_time_var.set(f"-{remaining_min:02d}:{remaining_sec:02d} [PAUSA]")
+            
+            # Càlcul més precís del progrés (mantenim la precisió interna)
+            self.audio_progress_var.set(min((current_time / duration) * 100, 100))
+        else:
+            minutes = int(current_time // 60)
+            seconds = int(current_time % 60)
+            if status == "playing":
+                self.audio_time_var.set(f"{minutes:02d}:{seconds:02d} / --:--")
+            else:
+                self.audio_time_var.set(f"{minutes:02d}:{seconds:02d} [PAUSA]")
+            self.audio_progress_var.set(0)
 
     def on_progress_click(self, event) -> None:
         """Gestiona el clic a la barra de progrés."""
         if not self.audio_player.current_file:
             return
             
-        bar_width = self.audio_progress_bar.winfo_width()
+        bar_width = self.audio_waveform.winfo_width()
         click_x = max(0, min(event.x, bar_width))
         click_position = click_x / bar_width if bar_width > 0 else 0
         
@@ -1418,13 +7038,183 @@ class TimerApp:
         audio_files = []
         for file_path in files:
             file_path = file_path.strip()
-            if file_path.lower().endswith(('.mp3', '.wav', '.ogg')) and os.path.exists(file_path):
+            if os.path.isdir(file_path):
+                self.import_audio_folder(file_path)
+            elif file_path.lower().endswith(AudioPlayer.EXTENSIONS) and os.path.exists(file_path):
                 audio_files.append(file_path)
         
         if audio_files:
-            added_files = self.audio_player.add_files(audio_files)
-            if added_files:
-                self.update_audio_list()
+            self._add_audio_files(audio_files)
+    
+    def _add_audio_files(self, file_paths: Iterable[str], mirror: bool = True) -> List[str]:
+        """Afegeix fitxers a la llista i només n'insereix les files noves."""
+        added = self.audio_player.add_files(file_paths, mirror)
+        if added:
+            if self._audio_search_query is None:
+                self.audio_listbox.rows_inserted(len(self.audio_player.files) - len(added), len(added))
+            self.audio_player.prefetch_durations(added)
+            if 'search_index' not in self.scheduler.tasks:
+                self.scheduler.add_task('search_index', self._index_audio_library, period=0.05, priority=7)
+        self._update_search_count()
+        return added
+    
+    SEARCH_INDEX_BUDGET = 0.004  # Segons per frame per indexar fitxers nous
+    SEARCH_RESULTS = 500
+    
+    def _index_audio_library(self, now: float) -> None:
+        """Tasca del planificador: indexa per a la cerca els fitxers afegits, a trossos."""
+        if self.audio_player.search_index.index_pending(self.SEARCH_INDEX_BUDGET) == 0:
+            self.scheduler.remove_task('search_index')
+            if self._audio_search_query is not None:
+                self.scheduler.wake('audio_search')  # Els resultats poden incloure els fitxers nous
+    
+    def _run_audio_search(self, now: float) -> None:
+        """Tasca del planificador: aplica la cerca escrita (un cop per frame com a molt)."""
+        query = self.audio_search_var.get()
+        results = self.audio_player.search_index.search(query, limit=self.SEARCH_RESULTS)
+        selected = self.selected_audio_path()
+        if results is None:
+            self._audio_search_query = None
+            if self.audio_listbox.rows is not self.audio_player.files:
+                self.audio_listbox.set_rows(self.audio_player.files)
+        else:
+            self._audio_search_query = query
+            self.audio_listbox.set_rows(results)
+        # Conserva la selecció si el fitxer continua a la llista
+        rows = self.audio_listbox.rows
+        if selected is not None and selected in rows and not self.audio_listbox.curselection():
+            row = rows.index(selected)
+            self.audio_listbox.selection_set(row)
+            self.audio_listbox.see(row)
+        self._update_search_count()
+    
+    def _update_search_count(self) -> None:
+        if self._audio_search_query is None:
+            self.audio_search_count_var.set("")
+        else:
+            count = len(self.audio_listbox.rows)
+            more = "+" if count >= self.SEARCH_RESULTS else ""
+            self.audio_search_count_var.set(f"{count}{more} de {len(self.audio_player.files)}")
+    
+    def selected_audio_path(self) -> Optional[str]:
+        """Ruta de la fila seleccionada (de la llista sencera o dels resultats de la cerca)."""
+        selection = self.audio_listbox.curselection()
+        if not selection or selection[0] >= len(self.audio_listbox.rows):
+            return None
+        return self.audio_listbox.rows[selection[0]]
+    
+    def play_first_search_result(self) -> None:
+        """Enter a la cerca: reprodueix el fitxer seleccionat o el primer resultat."""
+        self._run_audio_search(time.perf_counter())  # Per si l'última tecla encara no s'ha aplicat
+        if not self.audio_listbox.size() or not self._check_audio_ready():
+            return
+        if not self.audio_listbox.curselection():
+            self.audio_listbox.selection_set(0)
+        self._load_and_play(self.selected_audio_path())
+    
+    def import_audio_folder(self, folder: Optional[str] = None) -> None:
+        """Importa recursivament una carpeta d'àudio sense bloquejar la UI."""
+        if folder is None:
+            folder = filedialog.askdirectory(title="Importar carpeta d'àudio")
+            if not folder:
+                return
+        if self._folder_import is not None:
+            self._folder_import.cancel()
+        self._folder_import = self.audio_player.import_folder(folder)
+        self._folder_import_added = 0
+        self.library_status_var.set(f"Important {os.path.basename(folder) or folder}...")
+        self.scheduler.add_task('library_import', self._drain_folder_import, period=0.05, priority=6)
+    
+    def _drain_folder_import(self, now: float) -> None:
+        """Tasca del planificador: afegeix a la llista un tros de la importació en curs."""
+        folder_import = self._folder_import
+        if folder_import is None:
+            self.scheduler.remove_task('library_import')
+            return
+        paths = folder_import.take(self.IMPORT_ROWS_PER_FRAME)
+        if paths:
+            self._folder_import_added += len(self._add_audio_files(paths, mirror=False))
+        if folder_import.finished:
+            self.scheduler.remove_task('library_import')
+            self._folder_import = None
+            errors = f" ({folder_import.errors} errors de lectura)" if folder_import.errors else ""
+            self.library_status_var.set(
+                f"Importats {self._folder_import_added} fitxers nous de {folder_import.found}{errors}")
+        elif paths:
+            self.library_status_var.set(
+                f"Important... {self._folder_import_added} afegits, {folder_import.found} trobats")
+
+    # CARPETES VIGILADES
+    def open_watch_folders(self) -> None:
+        """Obre (o porta al davant) la finestra de carpetes vigilades."""
+        if self.watch_folders_window is not None:
+            self.watch_folders_window.lift()
+            return
+        self.watch_folders_window = WatchFoldersWindow(self)
+    
+    def watch_folder(self, folder: str) -> None:
+        """Comença a vigilar una carpeta: els fitxers nous s'afegiran sols a la llista."""
+        self.folder_watcher.add_folder(folder)
+        if self.watch_folders_window is not None:
+            self.watch_folders_window.refresh()
+    
+    def _apply_watched_changes(self, now: float) -> None:
+        """Tasca del planificador: aplica els canvis de les carpetes vigilades i en mostra el cost."""
+        watcher = self.folder_watcher
+        added, removed = watcher.take()
+        if len(added) > self.IMPORT_ROWS_PER_FRAME or self._watch_backlog:
+            # Un lot gran és el contingut inicial d'una carpeta: s'afegeix a trossos
+            # com una importació, i sense copiar-lo tot al mirall local
+            self._watch_backlog.extend(added)
+            if 'watch_import' not in self.scheduler.tasks:
+                self.scheduler.add_task('watch_import', self._drain_watch_backlog, period=0.05, priority=6)
+        elif added:
+            self._add_audio_files(added)
+        if removed:
+            self._remove_audio_paths(removed)
+        if not watcher.folders:
+            if self.watch_status_var.get():
+                self.watch_status_var.set("")
+            return
+        since, cpu_time, io_calls = self._watch_cost
+        elapsed = max(now - since, 1e-6)
+        self._watch_cost = (now, watcher.cpu_time, watcher.io_calls)
+        folders = "1 carpeta" if len(watcher.folders) == 1 else f"{len(watcher.folders)} carpetes"
+        self.watch_status_var.set(
+            f"Vigilant {folders} ({watcher.mode}) · "
+            f"CPU {(watcher.cpu_time - cpu_time) / elapsed * 100:.2f}% · "
+            f"{(watcher.io_calls - io_calls) / elapsed:.0f} E/S/s · "
+            f"passada {watcher.last_pass * 1000:.1f} ms")
+        if self.watch_folders_window is not None:
+            self.watch_folders_window.refresh()
+    
+    def _drain_watch_backlog(self, now: float) -> None:
+        """Tasca del planificador: afegeix un tros del contingut inicial d'una carpeta vigilada."""
+        chunk = self._watch_backlog[:self.IMPORT_ROWS_PER_FRAME]
+        del self._watch_backlog[:self.IMPORT_ROWS_PER_FRAME]
+        if chunk:
+            self._add_audio_files(chunk, mirror=False)
+        if not self._watch_backlog:
+            self.scheduler.remove_task('watch_import')
+    
+    def _remove_audio_paths(self, paths: Iterable[str]) -> None:
+        """Treu de la llista fitxers esborrats del disc (mai el que està sonant)."""
+        doomed = set(paths)
+        doomed.discard(self.audio_player.current_file)
+        if self._watch_backlog:
+            self._watch_backlog = [path for path in self._watch_backlog if path not in doomed]
+        indices = self.audio_player.remove_files(doomed)
+        if not indices:
+            return
+        if self._audio_search_query is None:
+            rows = indices
+        else:
+            results = self.audio_listbox.rows
+            rows = [row for row in range(len(results) - 1, -1, -1) if results[row] in doomed]
+            results[:] = [path for path in results if path not in doomed]
+        for row in rows:  # De gran a petit: cada índex és vàlid després de treure els anteriors
+            self.audio_listbox.rows_removed(row)
+        self._update_search_count()
 
     def show_audio_context_menu(self, event) -> None:
         """Mostra el menú contextual per àudio."""
@@ -1442,19 +7232,21 @@ class TimerApp:
 
     def delete_selected_audio_file(self) -> None:
         """Elimina el fitxer d'àudio seleccionat."""
-        selection = self.audio_listbox.curselection()
-        if not selection:
+        file_path = self.selected_audio_path()
+        if file_path is None:
             messagebox.showwarning("Avís", "Selecciona un fitxer per eliminar.")
             return
         
-        index = selection[0]
-        if 0 <= index < len(self.audio_player.files):
-            file_path = self.audio_player.files[index]
+        if file_path in self.audio_player.files:
             file_name = os.path.basename(file_path)
             
             if messagebox.askyesno("Eliminar fitxer", f'Eliminar "{file_name}" de la llista?'):
-                if self.audio_player.remove_file(index):
-                    self.update_audio_list()
+                row = self.audio_listbox.curselection()[0]
+                if self.audio_player.remove_file(self.audio_player.files.index(file_path)):
+                    if self._audio_search_query is not None:
+                        del self.audio_listbox.rows[row]  # Llista de resultats pròpia
+                    self.audio_listbox.rows_removed(row)
+                    self._update_search_count()
                     # Si no hi ha més fitxers, reinicia l'estat
                     if not self.audio_player.files:
                         self.current_audio_var.set("Cap fitxer seleccionat")
@@ -1464,28 +7256,18 @@ class TimerApp:
 
     def play_selected_audio_file(self) -> None:
         """Reprodueix el fitxer d'àudio seleccionat."""
-        selection = self.audio_listbox.curselection()
-        if not selection:
+        file_path = self.selected_audio_path()
+        if file_path is None:
             messagebox.showwarning("Avís", "Selecciona un fitxer per reproduir.")
             return
         
-        index = selection[0]
-        if 0 <= index < len(self.audio_player.files):
-            file_path = self.audio_player.files[index]
-            
-            if self.audio_player.load_file(file_path):
-                if self.audio_player.play():
-                    file_name = os.path.basename(file_path)
-                    if len(file_name) > 25:
-                        file_name = file_name[:22] + "..."
-                    self.current_audio_var.set(file_name)
-                    self.play_pause_btn.configure(text="⏸️")
+        if self._check_audio_ready():
+            self._load_and_play(file_path)
     
     # MÈTODES WHATSAPP I EXPORTAR
     def send_to_whatsapp(self, content: str) -> bool:
-        """Envia contingut a WhatsApp."""
-        whatsapp_content = self.format_for_whatsapp(content)
-        encoded_message = urllib.parse.quote(whatsapp_content)
+        """Obre WhatsApp Web amb el missatge (ja formatat per a WhatsApp)."""
+        encoded_message = urllib.parse.quote(content)
         url = f"https://web.whatsapp.com/send?text={encoded_message}"
         
         try:
@@ -1495,48 +7277,15 @@ class TimerApp:
             messagebox.showerror("Error", f"No s'ha pogut obrir WhatsApp: {e}")
             return False
 
-    def format_for_whatsapp(self, content: str) -> str:
-        """Formata contingut per WhatsApp."""
-        lines = content.split('\n')
-        whatsapp_content = ""
-        
-        for line in lines:
-            line = line.strip()
-            if not line:
-                whatsapp_content += "\n"
-                continue
-                
-            if line.startswith("REGISTRE LA RENAIXENÇA"):
-                whatsapp_content += f"📺 *{line}*\n"
-            elif line.startswith("Data:"):
-                whatsapp_content += f"📅 {line}\n"
-            elif line.startswith("Hora:"):
-                whatsapp_content += f"🕐 {line}\n"
-            elif line.startswith("TOTAL:"):
-                whatsapp_content += f"\n⏱️ *{line}*\n"
-            elif line.startswith("Nº") and "|" in line:
-                whatsapp_content += f"{line}\n"
-            elif "|" in line and not line.startswith("-"):
-                parts = [p.strip() for p in line.split("|")]
-                if len(parts) >= 3 and parts[0].isdigit():
-                    num = parts[0]
-                    name = parts[1][:29].ljust(29)
-                    duration = parts[2]
-                    whatsapp_content += f"▶️{num} | {name} | *{duration}*\n"
-            elif line.startswith("=") or line.startswith("-"):
-                continue
-            else:
-                whatsapp_content += f"{line}\n"
-        
-        return whatsapp_content.strip()
-
     def export_sections(self) -> None:
         """Exporta les seccions."""
         if not self.timer.sections:
             messagebox.showwarning("Avís", "No hi ha seccions!")
             return
     
-        content = self.timer.export_sections()
+        # Una sola instantània del programa per a la vista prèvia i tots els formats
+        record = ProgramRecord.from_timer(self.timer)
+        labels = {formatter.label: formatter for formatter in EXPORT_FORMATTERS.values()}
         
         export_window = tk.Toplevel(self.root)
         export_window.title("Exportar Seccions")
@@ -1544,8 +7293,16 @@ class TimerApp:
         export_window.transient(self.root)
         export_window.grab_set()
         
+        format_frame = ttk.Frame(export_window, padding=(10, 10, 10, 0))
+        format_frame.grid(row=0, column=0, sticky=(tk.W, tk.E))
+        ttk.Label(format_frame, text="Format:").pack(side=tk.LEFT)
+        format_var = tk.StringVar(value=get_formatter("text").label)
+        format_combo = ttk.Combobox(format_frame, textvariable=format_var, values=list(labels),
+                                    state='readonly', width=12)
+        format_combo.pack(side=tk.LEFT, padx=5)
+        
         text_frame = ttk.Frame(export_window, padding="10")
-        text_frame.grid(row=0, column=0, sticky=(tk.W, tk.E, tk.N, tk.S))
+        text_frame.grid(row=1, column=0, sticky=(tk.W, tk.E, tk.N, tk.S))
         
         text_widget = tk.Text(text_frame, wrap=tk.NONE, font=('Courier New', 9))
         text_widget.grid(row=0, column=0, sticky=(tk.W, tk.E, tk.N, tk.S))
@@ -1554,50 +7311,175 @@ class TimerApp:
         v_scrollbar.grid(row=0, column=1, sticky=(tk.N, tk.S))
         text_widget.configure(yscrollcommand=v_scrollbar.set)
         
-        text_widget.insert('1.0', content)
-        text_widget.configure(state='disabled')
+        def show_preview(event=None):
+            text_widget.configure(state='normal')
+            text_widget.delete('1.0', tk.END)
+            text_widget.insert('1.0', labels[format_var.get()].format(record))
+            text_widget.configure(state='disabled')
+        
+        format_combo.bind('<<ComboboxSelected>>', show_preview)
+        show_preview()
         
         button_frame = ttk.Frame(export_window)
-        button_frame.grid(row=1, column=0, pady=10)
+        button_frame.grid(row=2, column=0, pady=10)
+        whatsapp = get_formatter("whatsapp").format(record)
     
         def copy_only():
             self.root.clipboard_clear()
-            self.root.clipboard_append(self.format_for_whatsapp(content))
+            self.root.clipboard_append(whatsapp)
             messagebox.showinfo("OK", "Registre copiat al portapapers!")
     
         def copy_and_browser():
             self.root.clipboard_clear()
-            self.root.clipboard_append(self.format_for_whatsapp(content))
-            if self.send_to_whatsapp(content):
+            self.root.clipboard_append(whatsapp)
+            if self.send_to_whatsapp(whatsapp):
                 messagebox.showinfo("OK", "Text copiat al portapapers!\nWhatsApp Web obert al navegador.\nEnganxa amb Ctrl+V")
                 export_window.destroy()
             else:
                 messagebox.showinfo("OK", "Text copiat al portapapers!")
         
+        def save_file():
+            formatter = labels[format_var.get()]
+            path = filedialog.asksaveasfilename(
+                parent=export_window, title="Desar registre", defaultextension=formatter.extension,
+                initialfile=f"PGM_{record.number}{formatter.extension}",
+                filetypes=[(formatter.label, f"*{formatter.extension}"), ("Tots els arxius", "*.*")])
+            if not path:
+                return
+            try:
+                with open(path, 'w', encoding='utf-8', newline='') as f:
+                    export_programs((record,), formatter, f)
+            except OSError as e:
+                messagebox.showerror("Error", f"No s'ha pogut desar: {e}", parent=export_window)
+        
         ttk.Button(button_frame, text="Copiar", command=copy_only).pack(side=tk.LEFT, padx=10)
         ttk.Button(button_frame, text="Copiar i obrir WhatsApp Web", command=copy_and_browser).pack(side=tk.LEFT, padx=10)
+        ttk.Button(button_frame, text="Desar...", command=save_file).pack(side=tk.LEFT, padx=10)
         ttk.Button(button_frame, text="Tancar", command=export_window.destroy).pack(side=tk.LEFT, padx=10)
         
         export_window.columnconfigure(0, weight=1)
-        export_window.rowconfigure(0, weight=1)
+        export_window.rowconfigure(1, weight=1)
         text_frame.columnconfigure(0, weight=1)
         text_frame.rowconfigure(0, weight=1)
     
 
 
+def run_remote_client(args) -> int:
+    """Mode client (--remote): envia una ordre a una instància en marxa i mostra la latència."""
+    command = " ".join(args.remote)
+    try:
+        results = send_remote_command(command, args.host, args.port, args.repeat)
+    except (OSError, ValueError) as e:
+        print(f"No s'ha pogut contactar amb {args.host}:{args.port}: {e}")
+        return 1
+    reply, _ = results[-1]
+    print(json.dumps(reply, ensure_ascii=False))
+    round_trips = sorted(rtt for _, rtt in results)
+    actions = sorted(r.get('latency_ms', 0.0) for r, _ in results)
+    print(f"Anada i tornada: mediana {round_trips[len(round_trips) // 2] * 1000:.2f} ms, "
+          f"màx {round_trips[-1] * 1000:.2f} ms · recepció-acció: mediana {actions[len(actions) // 2]:.2f} ms "
+          f"({len(results)} ordres)")
+    return 0 if reply.get('ok') else 1
+
+
+def run_display_client(args) -> int:
+    """Mode pantalla (--display): rellotge d'estudi alimentat per la difusió UDP."""
+    try:
+        subscriber = StateSubscriber(args.group, args.broadcast_port)
+    except OSError as e:
+        print(f"No s'ha pogut escoltar {args.group}:{args.broadcast_port}: {e}")
+        return 1
+    
+    root = tk.Tk()
+    root.title("LA RENAIXENÇA - Rellotge")
+    root.configure(bg='black')
+    root.bind('<F11>', lambda event: root.attributes('-fullscreen', not root.attributes('-fullscreen')))
+    root.bind('<Escape>', lambda event: root.attributes('-fullscreen', False))
+    
+    labels = {}
+    for row, (key, size) in enumerate((('program', 20), ('name', 28), ('current', 120),
+                                       ('total', 48), ('remaining', 48))):
+        label = tk.Label(root, text="", font=('Arial', size, 'bold'), fg='white', bg='black')
+        label.grid(row=row, column=0, sticky='nsew', padx=20)
+        root.rowconfigure(row, weight=1)
+        labels[key] = label
+    root.columnconfigure(0, weight=1)
+    shown: Dict[str, Tuple[str, str]] = {}
+    format_time = PrecisionTimer.format_time
+    
+    def show(key: str, text: str, color: str = 'white') -> None:
+        if shown.get(key) != (text, color):
+            shown[key] = (text, color)
+            labels[key].configure(text=text, fg=color)
+    
+    def tick() -> None:
+        now = time.perf_counter()
+        subscriber.poll(now)
+        if not subscriber.synced:
+            show('name', "Esperant l'aplicació...", 'gray')
+        else:
+            view = subscriber.view(now)
+            state = subscriber.state
+            remaining = view['remaining']
+            show('program', f"PROGRAMA #{state.get('p', '')}", 'gray')
+            show('name', state.get('n', ''))
+            show('current', format_time(view['current']), 'white' if state.get('r') else 'orange')
+            show('total', f"Total {format_time(view['total'])}")
+            if remaining >= 0:
+                show('remaining', f"Restant {format_time(remaining)}", 'deep sky blue')
+            else:
+                show('remaining', f"Excés +{format_time(-remaining)}", 'red')
+        root.after(50, tick)
+    
+    tick()
+    try:
+        root.mainloop()
+    finally:
+        subscriber.close()
+    return 0
+
+
 def main():
     """Funció principal."""
+    parser = argparse.ArgumentParser(description="Aplicatiu LA RENAIXENÇA")
+    parser.add_argument("--remote", nargs='+', metavar="ORDRE",
+                        help="envia una ordre (start, stop, split [nom], status...) a l'aplicació en marxa i surt")
+    parser.add_argument("--host", default="127.0.0.1", help="adreça del control remot")
+    parser.add_argument("--port", type=int, default=RemoteControlServer.DEFAULT_PORT, help="port del control remot")
+    parser.add_argument("--repeat", type=int, default=1, help="repeteix l'ordre per mesurar la latència")
+    parser.add_argument("--no-remote-server", action='store_true', help="no obre el servidor de control remot")
+    parser.add_argument("--broadcast", action='store_true', help="difon l'estat del timer a les pantalles d'estudi")
+    parser.add_argument("--display", action='store_true', help="obre només un rellotge d'estudi que escolta la difusió")
+    parser.add_argument("--group", default=StatePublisher.GROUP, help="grup multicast de la difusió")
+    parser.add_argument("--broadcast-port", type=int, default=StatePublisher.PORT, help="port de la difusió")
+    args = parser.parse_args()
+    if args.remote:
+        sys.exit(run_remote_client(args))
+    if args.display:
+        sys.exit(run_display_client(args))
+    
     if DRAG_DROP_AVAILABLE:
         root = TkinterDnD.Tk()
     else:
         root = tk.Tk()
     
-    app = TimerApp(root)
+    if os.environ.get("RENAIXENCA_STARTUP_PROBE"):
+        # Mode de mesura d'arrencada (bench_renaixenca.py startup): avisa quan
+        # es mostra la primera finestra i surt.
+        def on_first_window(event):
+            print("FIRST_WINDOW", flush=True)
+            os._exit(0)
+        root.bind_all('<Map>', on_first_window)
+    
+    app = TimerApp(root, None if args.no_remote_server else (args.host, args.port),
+                   (args.group, args.broadcast_port) if args.broadcast else None)
     try:
         root.mainloop()
     except KeyboardInterrupt:
         print("\nAplicació tancada")
         sys.exit(0)
+    finally:
+        app.shutdown()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,607 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Benchmarks de l'Aplicatiu LA RENAIXENÇA.
+
+Ús:
+    python bench_renaixenca.py treeview
+    python bench_renaixenca.py startup
+    python bench_renaixenca.py sections
+    python bench_renaixenca.py broadcast
+    python bench_renaixenca.py library
+    python bench_renaixenca.py audiolist
+    python bench_renaixenca.py search
+    python bench_renaixenca.py watch
+"""
+
+import argparse
+import os
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+import tkinter as tk
+from datetime import datetime
+from tkinter import ttk
+
+import APLICATIU_RENAIXENCA_15_OPTIMIZED as app
+
+
+def _make_timer(count: int) -> app.PrecisionTimer:
+    """Crea un timer amb `count` seccions."""
+    timer = app.PrecisionTimer()
+    for i in range(count):
+        timer.add_section(f"Secció {i + 1}", 30 + i % 300)
+    return timer
+
+
+def _legacy_rebuild(tree: ttk.Treeview, timer: app.PrecisionTimer) -> None:
+    """Reconstrucció completa tal com es feia abans (referència)."""
+    for item in tree.get_children():
+        tree.delete(item)
+    for i, section in enumerate(timer.sections):
+        tree.insert('', 'end', values=(i + 1, section.name,
+                                       timer.format_time(section.duration), 'X'))
+    if timer.sections:
+        tree.insert('', 'end', values=('TOT', f"{len(timer.sections)}",
+                                       timer.format_time(timer.total_time), ''), tags=('total',))
+        tree.tag_configure('total', background='lightgray', font=('Arial', 9, 'bold'))
+
+
+def bench_treeview(ticks: int) -> None:
+    """Cost per tick de la taula de seccions a 10, 100 i 1000 seccions."""
+    try:
+        root = tk.Tk()
+    except tk.TclError as e:
+        print(f"No hi ha display disponible: {e}")
+        return
+    root.withdraw()
+
+    print(f"{'seccions':>9} | {'reconstrucció':>14} | {'incremental':>12} | {'1 canvi':>10}")
+    for count in (10, 100, 1000):
+        timer = _make_timer(count)
+
+        tree = ttk.Treeview(root, columns=('num', 'name', 'duration', 'actions'), show='headings')
+        start = time.perf_counter()
+        for _ in range(ticks):
+            _legacy_rebuild(tree, timer)
+            root.update_idletasks()
+        legacy = (time.perf_counter() - start) / ticks
+        tree.destroy()
+
+        tree = ttk.Treeview(root, columns=('num', 'name', 'duration', 'actions'), show='headings')
+        reconciler = app.TreeviewReconciler(tree)
+        reconciler.reconcile(app.TimerApp.build_section_rows(timer))
+        start = time.perf_counter()
+        for _ in range(ticks):
+            reconciler.reconcile(app.TimerApp.build_section_rows(timer))
+            root.update_idletasks()
+        incremental = (time.perf_counter() - start) / ticks
+
+        start = time.perf_counter()
+        for tick in range(ticks):
+            timer.retime_section(count - 1, tick + 1)
+            reconciler.reconcile(app.TimerApp.build_section_rows(timer))
+            root.update_idletasks()
+        changed = (time.perf_counter() - start) / ticks
+        tree.destroy()
+
+        print(f"{count:>9} | {legacy * 1000:>11.3f} ms | {incremental * 1000:>9.3f} ms | {changed * 1000:>7.3f} ms")
+
+    root.destroy()
+
+
+def bench_startup(runs: int, timeout: float) -> None:
+    """Temps des del llançament del procés fins a la primera finestra."""
+    script = os.path.abspath(app.__file__)
+    env = dict(os.environ, RENAIXENCA_STARTUP_PROBE="1")
+    times = []
+    for run in range(runs):
+        start = time.perf_counter()
+        process = subprocess.Popen([sys.executable, script], env=env, stdout=subprocess.PIPE,
+                                   stderr=subprocess.DEVNULL, text=True)
+        watchdog = threading.Timer(timeout, process.kill)
+        watchdog.start()
+        try:
+            for line in process.stdout:
+                if line.startswith("FIRST_WINDOW"):
+                    times.append(time.perf_counter() - start)
+                    break
+        finally:
+            watchdog.cancel()
+            process.kill()
+            process.wait()
+        if len(times) <= run:
+            print(f"Execució {run + 1}: no s'ha detectat cap finestra (cal un display)")
+            return
+        print(f"Execució {run + 1}: {times[-1] * 1000:.0f} ms")
+    times.sort()
+    print(f"Mediana: {times[len(times) // 2] * 1000:.0f} ms  (mín {times[0] * 1000:.0f} ms, màx {times[-1] * 1000:.0f} ms)")
+
+
+def _measure(label: str, legacy: float, current: float, unit: str = "ms") -> None:
+    """Imprimeix una fila de comparació."""
+    print(f"{label:<22} | {legacy:>12.2f} {unit} | {current:>12.2f} {unit}")
+
+
+def bench_sections(count: int, operations: int) -> None:
+    """Memòria i cost d'afegir, eliminar, moure i buscar per id amb `count` seccions."""
+    rng = random.Random(1)
+    durations = [rng.randint(1, 900) for _ in range(count)]
+    removals = [rng.random() for _ in range(operations)]
+    moves = [(rng.random(), rng.random()) for _ in range(operations)]
+    print(f"{count} seccions, {operations} operacions de cada tipus")
+    print(f"{'':<22} | {'dict':>15} | {'Section':>15}")
+    
+    def build_legacy():
+        return [{'id': i + 1, 'name': f"Secció {i + 1}", 'duration': duration,
+                 'timestamp': datetime.now().isoformat()} for i, duration in enumerate(durations)]
+    
+    def build_current():
+        timer = app.PrecisionTimer()
+        for i, duration in enumerate(durations):
+            timer.add_section(f"Secció {i + 1}", duration)
+        return timer
+    
+    # Memòria ocupada (passada a part: tracemalloc alenteix les altres mesures)
+    memory = []
+    for build in (build_legacy, build_current):
+        tracemalloc.start()
+        kept = build()
+        memory.append(tracemalloc.get_traced_memory()[0] / 1048576)
+        tracemalloc.stop()
+        del kept
+    
+    start = time.perf_counter()
+    legacy = build_legacy()
+    legacy_add = time.perf_counter() - start
+    start = time.perf_counter()
+    timer = build_current()
+    current_add = time.perf_counter() - start
+    _measure("afegir", legacy_add * 1000, current_add * 1000)
+    _measure("memòria", memory[0], memory[1], "MB")
+    
+    # Cerca per id (abans: recorregut lineal)
+    ids = [rng.randint(1, count) for _ in range(operations)]
+    start = time.perf_counter()
+    for section_id in ids:
+        next(i for i, section in enumerate(legacy) if section['id'] == section_id)
+    legacy_lookup = time.perf_counter() - start
+    start = time.perf_counter()
+    for section_id in ids:
+        timer.index_of(section_id)
+    _measure("buscar per id", legacy_lookup * 1000, (time.perf_counter() - start) * 1000)
+    
+    # Moure i tornar a buscar (la reindexació és mandrosa)
+    start = time.perf_counter()
+    for (a, b), section_id in zip(moves, ids):
+        n = len(legacy)
+        legacy.insert(int(b * n), legacy.pop(int(a * n)))
+        next(i for i, section in enumerate(legacy) if section['id'] == section_id)
+    legacy_move = time.perf_counter() - start
+    start = time.perf_counter()
+    for (a, b), section_id in zip(moves, ids):
+        n = len(timer.sections)
+        timer.move_section(int(a * n), int(b * n))
+        timer.index_of(section_id)
+    _measure("moure + buscar", legacy_move * 1000, (time.perf_counter() - start) * 1000)
+    
+    # Eliminar
+    start = time.perf_counter()
+    for r in removals:
+        legacy.pop(int(r * len(legacy)))
+    legacy_remove = time.perf_counter() - start
+    start = time.perf_counter()
+    for r in removals:
+        timer.remove_section(int(r * len(timer.sections)))
+    _measure("eliminar", legacy_remove * 1000, (time.perf_counter() - start) * 1000)
+
+
+def bench_broadcast(subscribers: int, seconds: float, group: str, port: int) -> None:
+    """Difusió de l'estat a `subscribers` clients locals (multicast en loopback)."""
+    try:
+        publisher = app.StatePublisher(group, port)
+        clients = [app.StateSubscriber(group, port) for _ in range(subscribers)]
+    except OSError as e:
+        print(f"Multicast no disponible: {e}")
+        return
+    timer = app.PrecisionTimer()
+    timer.start()
+    clock_changed = True
+    publish_time = 0.0
+    client_time = 0.0
+    worst_error = 0.0
+    process_start = time.process_time()
+    start = time.perf_counter()
+    next_event = start + 1.0
+    ticks = 0
+    
+    while True:
+        now = time.perf_counter()
+        if now - start >= seconds:
+            break
+        if now >= next_event:
+            # Un esdeveniment per segon: alterna parades i seccions
+            if timer.is_running and ticks % 3:
+                timer.split_section(f"Secció {len(timer.sections) + 1}")
+            elif timer.is_running:
+                timer.stop()
+            else:
+                timer.start()
+            clock_changed = True
+            next_event += 1.0
+        state = {'r': timer.is_running, 't': timer.total_time, 'g': timer.target_time,
+                 'n': f"Secció {len(timer.sections) + 1}", 'p': "157", 'c': len(timer.sections)}
+        t0 = time.perf_counter()
+        publisher.publish(state, timer.get_elapsed(now), clock_changed, now)
+        publish_time += time.perf_counter() - t0
+        clock_changed = False
+        
+        time.sleep(0.001)  # Deixa arribar els paquets
+        t0 = time.perf_counter()
+        for client in clients:
+            client.poll()
+        check = time.perf_counter()
+        client_time += check - t0
+        expected = timer.get_elapsed(check)
+        for client in clients:
+            if client.synced:
+                worst_error = max(worst_error, abs(client.elapsed(check) - expected))
+        ticks += 1
+        time.sleep(max(0.0, 0.1 - (time.perf_counter() - now)))
+    
+    elapsed = time.perf_counter() - start
+    cpu = time.process_time() - process_start
+    synced = sum(client.synced for client in clients)
+    lost = sum(client.lost for client in clients)
+    print(f"{subscribers} clients ({synced} sincronitzats), {elapsed:.1f} s, {ticks} ticks")
+    print(f"Paquets: {publisher.packets} ({publisher.packets / elapsed:.1f}/s), "
+          f"{publisher.bytes / elapsed:.0f} B/s, perduts als clients: {lost}")
+    print(f"Cost del publicador: {publish_time / elapsed * 1e6:.0f} µs/s ({publish_time / max(ticks, 1) * 1e6:.1f} µs/tick)")
+    print(f"Cost dels clients (tots): {client_time / elapsed * 1000:.2f} ms/s · CPU del procés: {cpu / elapsed * 100:.1f}%")
+    print(f"Error màxim del rellotge extrapolat: {worst_error * 1000:.2f} ms")
+    for client in clients:
+        client.close()
+    publisher.close()
+
+
+def _import_frames(folder: str, rows_per_frame: int) -> "app.AudioLibrary":
+    """Importa una carpeta recollint-la frame a frame com la UI i n'imprimeix el cost."""
+    library = app.AudioLibrary()
+    start = time.perf_counter()
+    folder_import = app.FolderImport(folder, app.AudioPlayer.EXTENSIONS)
+    worst = 0.0
+    most_rows = 0
+    frames = 0
+    while not folder_import.finished:
+        frame_start = time.perf_counter()
+        paths = folder_import.take(rows_per_frame)
+        library.extend(paths)
+        worst = max(worst, time.perf_counter() - frame_start)
+        most_rows = max(most_rows, len(paths))
+        frames += 1
+        time.sleep(0.005)
+    total = time.perf_counter() - start
+    print(f"{len(library)} fitxers en {total * 1000:.0f} ms ({frames} frames), "
+          f"pitjor frame {worst * 1000:.2f} ms, com a molt {most_rows} files per frame")
+    return library
+
+
+def bench_library(count: int, rows_per_frame: int) -> None:
+    """Importació d'una carpeta amb `count` fitxers: llista vs AudioLibrary i cost per frame."""
+    folder = tempfile.mkdtemp(prefix="renaixenca_bench_")
+    flat = tempfile.mkdtemp(prefix="renaixenca_bench_flat_")
+    try:
+        for i in range(count):
+            subfolder = os.path.join(folder, f"arxiu{i % 20:02d}", f"{i % 7}")
+            os.makedirs(subfolder, exist_ok=True)
+            open(os.path.join(subfolder, f"tall_{i:06d}.mp3"), 'w').close()
+            open(os.path.join(flat, f"tall_{i:06d}.mp3"), 'w').close()
+        
+        # Importació en segon pla, recollida frame a frame com fa la UI
+        print("Carpeta amb subcarpetes:")
+        library = _import_frames(folder, rows_per_frame)
+        print("Carpeta plana (tots els fitxers en un sol directori):")
+        _import_frames(flat, rows_per_frame)
+        
+        paths = list(library)
+        print(f"{'':<22} | {'list':>15} | {'AudioLibrary':>15}")
+        start = time.perf_counter()
+        legacy: list = []
+        for path in paths:
+            if path not in legacy:
+                legacy.append(path)
+        legacy_add = time.perf_counter() - start
+        start = time.perf_counter()
+        app.AudioLibrary().extend(paths)
+        _measure("afegir sense duplicats", legacy_add * 1000, (time.perf_counter() - start) * 1000)
+        
+        probes = [paths[i] for i in range(0, len(paths), max(1, len(paths) // 1000))]
+        start = time.perf_counter()
+        for path in probes:
+            legacy.index(path)
+        legacy_index = time.perf_counter() - start
+        start = time.perf_counter()
+        for path in probes:
+            library.index(path)
+        _measure(f"index() x{len(probes)}", legacy_index * 1000, (time.perf_counter() - start) * 1000)
+    finally:
+        shutil.rmtree(folder, ignore_errors=True)
+        shutil.rmtree(flat, ignore_errors=True)
+
+
+def bench_audiolist(count: int, operations: int) -> None:
+    """Llista d'àudio amb `count` fitxers: Listbox reconstruït vs VirtualListView."""
+    try:
+        root = tk.Tk()
+    except tk.TclError as e:
+        print(f"No hi ha display disponible: {e}")
+        return
+    root.geometry("400x400")
+    library = app.AudioLibrary(f"/arxiu/talls/tall_{i:06d}.mp3" for i in range(count))
+    labels = [0]
+    
+    def label(path: str) -> str:
+        labels[0] += 1
+        return os.path.basename(path)
+    
+    def rebuild(listbox: tk.Listbox) -> None:
+        listbox.delete(0, tk.END)
+        for path in library:
+            listbox.insert(tk.END, label(path))
+    
+    print(f"{count} fitxers, {operations} operacions de cada tipus")
+    print(f"{'':<22} | {'Listbox':>15} | {'VirtualListView':>15}")
+    
+    listbox = tk.Listbox(root)
+    listbox.pack(fill=tk.BOTH, expand=True)
+    start = time.perf_counter()
+    rebuild(listbox)
+    root.update()
+    legacy_fill = time.perf_counter() - start
+    listbox.destroy()
+    
+    view = app.VirtualListView(root, library, label)
+    view.pack(fill=tk.BOTH, expand=True)
+    start = time.perf_counter()
+    view.reset()
+    root.update()
+    _measure("omplir", legacy_fill * 1000, (time.perf_counter() - start) * 1000)
+    view.destroy()
+    
+    # Afegir i treure, com feia update_audio_list a cada canvi
+    listbox = tk.Listbox(root)
+    listbox.pack(fill=tk.BOTH, expand=True)
+    rebuild(listbox)
+    labels[0] = 0
+    start = time.perf_counter()
+    for i in range(operations):
+        library.append(f"/arxiu/nous/nou_{i}.mp3")
+        rebuild(listbox)
+        library.pop(len(library) // 2)
+        rebuild(listbox)
+        root.update()
+    legacy_edit = (time.perf_counter() - start) / operations
+    legacy_labels = labels[0] / operations
+    listbox.destroy()
+    
+    view = app.VirtualListView(root, library, label)
+    view.pack(fill=tk.BOTH, expand=True)
+    root.update()
+    labels[0] = 0
+    start = time.perf_counter()
+    for i in range(operations):
+        library.append(f"/arxiu/nous/altre_{i}.mp3")
+        view.rows_inserted(len(library) - 1)
+        middle = len(library) // 2
+        library.pop(middle)
+        view.rows_removed(middle)
+        root.update()
+    _measure("afegir + treure (ms)", legacy_edit * 1000, (time.perf_counter() - start) / operations * 1000)
+    _measure("textos per operació", legacy_labels, labels[0] / operations, "")
+    
+    # Desplaçament per tota la llista
+    start = time.perf_counter()
+    for i in range(operations):
+        view.yview('moveto', i / operations)
+        root.update()
+    print(f"{'desplaçar':<22} | {'':>15} | {(time.perf_counter() - start) / operations * 1000:>12.2f} ms"
+          f"  ({view.rendered_rows} files dibuixades)")
+    root.destroy()
+
+
+def bench_search(count: int, queries: list) -> None:
+    """Cerca a la biblioteca d'àudio amb `count` fitxers: recorregut lineal vs índex de trigrames."""
+    rng = random.Random(1)
+    words = ("renaixença música falca sintonia cortina entrevista hora català jingle tema cançó "
+             "notícies bloc esports ràdio concert orquestra cobla sardana himne presentació comiat "
+             "base ambient efecte aplaudiment").split()
+    syllables = ["ba", "ca", "da", "fe", "gi", "lo", "ma", "ne", "pi", "ro", "sa", "tu", "vi", "xa", "ll", "ny"]
+    artists = ["".join(rng.choice(syllables) for _ in range(rng.randint(2, 4))).title() for _ in range(2000)]
+    paths = []
+    for i in range(count):
+        folder = os.path.join("arxiu", rng.choice(words), rng.choice(artists))
+        title = " ".join(rng.choice(words + artists) for _ in range(rng.randint(1, 4)))
+        paths.append(os.path.join(folder, f"{i % 30 + 1:02d} - {rng.choice(artists)} - {title}.mp3"))
+    
+    tracemalloc.start()
+    index = app.AudioSearchIndex(paths)
+    memory = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del index
+    
+    # Indexació a trossos, com la tasca 'search_index' de la UI
+    start = time.perf_counter()
+    index = app.AudioSearchIndex()
+    index.queue(paths)
+    worst = 0.0
+    while index.pending:
+        frame_start = time.perf_counter()
+        index.index_pending(app.TimerApp.SEARCH_INDEX_BUDGET)
+        worst = max(worst, time.perf_counter() - frame_start)
+    build = time.perf_counter() - start
+    print(f"Índex de {len(index)} fitxers: {build * 1000:.0f} ms en total, pitjor frame {worst * 1000:.2f} ms, "
+          f"{memory / 1e6:.1f} MB")
+    
+    # Cada consulta s'escriu lletra a lletra, com a la UI
+    keystrokes = [query[:length] for query in queries for length in range(1, len(query) + 1)]
+    legacy_times, current_times = [], []
+    for text in keystrokes:
+        needle = text.lower()
+        start = time.perf_counter()
+        legacy = [path for path in paths if needle in os.path.basename(path).lower()]
+        legacy_times.append(time.perf_counter() - start)
+        start = time.perf_counter()
+        index.search(text, limit=app.TimerApp.SEARCH_RESULTS)
+        current_times.append(time.perf_counter() - start)
+    slowest = keystrokes[current_times.index(max(current_times))]
+    legacy_times.sort()
+    current_times.sort()
+    print(f"{len(keystrokes)} tecles (la més lenta amb l'índex: {slowest!r})")
+    print(f"{'':<22} | {'lineal':>15} | {'índex':>15}")
+    _measure("mediana per tecla", legacy_times[len(legacy_times) // 2] * 1000,
+             current_times[len(current_times) // 2] * 1000)
+    _measure("pitjor tecla", legacy_times[-1] * 1000, current_times[-1] * 1000)
+    
+    sample = paths[::max(1, len(paths) // 1000)]
+    start = time.perf_counter()
+    for path in sample:
+        index.remove(path)
+    for path in sample:
+        index.add(path)
+    print(f"treure + afegir: {(time.perf_counter() - start) / len(sample) * 1e6:.1f} µs per fitxer")
+
+
+def bench_watch(dirs: int, files_per_dir: int) -> None:
+    """Carpeta vigilada amb `dirs` directoris: recorregut sencer vs passada incremental."""
+    folder = tempfile.mkdtemp(prefix="renaixenca_bench_")
+    try:
+        for d in range(dirs):
+            subfolder = os.path.join(folder, f"dia{d // 10:02d}", f"bloc{d % 10}")
+            os.makedirs(subfolder, exist_ok=True)
+            for i in range(files_per_dir):
+                with open(os.path.join(subfolder, f"tall_{i:04d}.mp3"), 'wb') as f:
+                    f.write(b'\0' * 64)
+        old = time.time() - 3600
+        for directory, _, names in os.walk(folder):
+            for name in names:
+                os.utime(os.path.join(directory, name), (old, old))
+        
+        watcher = app.FolderWatcher(app.AudioPlayer.EXTENSIONS, os.path.join(folder, "watch.json"), interval=3600)
+        watcher.folders.append(folder)
+        watcher._open_inotify()
+        start = time.perf_counter()
+        watcher._pass()
+        found, _ = watcher.take()
+        print(f"Primera passada: {len(found)} fitxers a {len(watcher._dirs)} directoris en "
+              f"{(time.perf_counter() - start) * 1000:.0f} ms ({watcher.io_calls} crides E/S, mode {watcher.mode})")
+        
+        def full_walk() -> int:
+            count = 0
+            for _, _, names in os.walk(folder):
+                count += sum(1 for name in names if name.lower().endswith(app.AudioPlayer.EXTENSIONS))
+            return count
+        
+        passes = 10
+        start = time.perf_counter()
+        for _ in range(passes):
+            full_walk()
+        legacy = (time.perf_counter() - start) / passes
+        io_calls = watcher.io_calls
+        cpu_time = watcher.cpu_time
+        start = time.perf_counter()
+        for _ in range(passes):
+            watcher._pass()
+        current = (time.perf_counter() - start) / passes
+        print(f"{'':<22} | {'os.walk':>15} | {'incremental':>15}")
+        _measure("passada sense canvis", legacy * 1000, current * 1000)
+        print(f"{'':<22} | {'':>15} | {(watcher.io_calls - io_calls) / passes:>12.0f} E/S"
+              f"  ({(watcher.cpu_time - cpu_time) / passes * 1000:.2f} ms de CPU)")
+        
+        # Un fitxer nou que encara s'està escrivint: s'afegeix quan deixa de créixer
+        clip = os.path.join(folder, "dia00", "bloc0", "nou.mp3")
+        with open(clip, 'wb') as f:
+            f.write(b'\0' * 64)
+        start = time.perf_counter()
+        watcher._pass()
+        with open(clip, 'ab') as f:
+            f.write(b'\0' * 64)
+        passes_needed = 1
+        while True:
+            watcher._pass()
+            passes_needed += 1
+            added, _ = watcher.take()
+            if added:
+                break
+        print(f"Fitxer nou afegit després de {passes_needed} passades "
+              f"({passes_needed * app.FolderWatcher.INTERVAL:.0f} s amb l'interval per defecte), "
+              f"última passada {watcher.last_pass * 1000:.2f} ms")
+    finally:
+        shutil.rmtree(folder, ignore_errors=True)
+
+
+def main() -> int:
+    """Funció principal."""
+    parser = argparse.ArgumentParser(description="Benchmarks de l'Aplicatiu LA RENAIXENÇA")
+    subparsers = parser.add_subparsers(dest="benchmark", required=True)
+
+    treeview = subparsers.add_parser("treeview", help="cost per tick de la taula de seccions")
+    treeview.add_argument("--ticks", type=int, default=50)
+
+    startup = subparsers.add_parser("startup", help="temps fins a la primera finestra")
+    startup.add_argument("--runs", type=int, default=5)
+    startup.add_argument("--timeout", type=float, default=30.0)
+
+    sections = subparsers.add_parser("sections", help="memòria i operacions de seccions")
+    sections.add_argument("--count", type=int, default=10000)
+    sections.add_argument("--operations", type=int, default=1000)
+
+    broadcast = subparsers.add_parser("broadcast", help="difusió de l'estat a molts clients")
+    broadcast.add_argument("--subscribers", type=int, default=40)
+    broadcast.add_argument("--seconds", type=float, default=5.0)
+    broadcast.add_argument("--group", default=app.StatePublisher.GROUP)
+    broadcast.add_argument("--port", type=int, default=app.StatePublisher.PORT)
+
+    library = subparsers.add_parser("library", help="importació de carpetes i llista d'àudio")
+    library.add_argument("--count", type=int, default=20000)
+    library.add_argument("--rows-per-frame", type=int, default=app.TimerApp.IMPORT_ROWS_PER_FRAME)
+
+    audiolist = subparsers.add_parser("audiolist", help="llista d'àudio virtualitzada")
+    audiolist.add_argument("--count", type=int, default=100000)
+    audiolist.add_argument("--operations", type=int, default=20)
+
+    search = subparsers.add_parser("search", help="cerca incremental a la biblioteca d'àudio")
+    search.add_argument("--count", type=int, default=50000)
+    search.add_argument("queries", nargs="*", default=["renaixenca", "sardana cobla", "Música", "fe"])
+
+    watch = subparsers.add_parser("watch", help="carpetes vigilades")
+    watch.add_argument("--dirs", type=int, default=500)
+    watch.add_argument("--files-per-dir", type=int, default=40)
+
+    args = parser.parse_args()
+    if args.benchmark == "treeview":
+        bench_treeview(args.ticks)
+    elif args.benchmark == "startup":
+        bench_startup(args.runs, args.timeout)
+    elif args.benchmark == "sections":
+        bench_sections(args.count, args.operations)
+    elif args.benchmark == "broadcast":
+        bench_broadcast(args.subscribers, args.seconds, args.group, args.port)
+    elif args.benchmark == "library":
+        bench_library(args.count, args.rows_per_frame)
+    elif args.benchmark == "audiolist":
+        bench_audiolist(args.count, args.operations)
+    elif args.benchmark == "search":
+        bench_search(args.count, args.queries)
+    elif args.benchmark == "watch":
+        bench_watch(args.dirs, args.files_per_dir)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())